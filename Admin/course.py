@@ -1,103 +1,675 @@
+"""
+In-memory course engine with the same methods and return shapes as CourseService.
+
+    from course import Course                 # with Admin/ on sys.path
+    service = Course()                        # empty: fast test double, no database
+    service = Course.load(get_shared_db())    # snapshot of the database: hot read replica
+
+Every relation is indexed in both directions (course -> students, student -> courses,
+course -> professors, professor -> courses, course -> grades, student -> graded courses),
+so membership checks, enrollments and deletes are O(1) and a per-user view costs the size
+of that user's data, never the size of a table. Sorted name / key lists (bisect), also one
+per professor status, serve the ordered lists and the prefix searches; course requests are
+indexed per professor, the pending ones apart. One lock makes it safe from UI worker threads.
+
+A replica is not kept in sync with the database; call load() again to refresh it.
+Its changes_since() feed covers its own writes since it was built.
+benchmarks/bench_memory.py compares it with the DB-backed service.
+"""
+import bisect
+import decimal
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from course_service import (
+    CHANGE_LOG_LIMIT, CHANGE_LOG_MAX_LIMIT, CourseService, GRADE_MAX_LEN, SEARCH_LIMIT, SEARCH_MAX_LIMIT,
+    _uid, cap, write_csv,
+)
+
+ROLES = ("admin", "professor", "student")
+NO_FEES = decimal.Decimal("0.00")
+# changes_since() entries kept; the oldest half is dropped when the log outgrows this
+CHANGE_LOG_SIZE = 100000
+
 
 class Course:
     def __init__(self):
-        self.course = []  
-        self.name = []  
-        self.assignment = {}  
-        self.student_assignment = {}  
-        self.grades = {} 
-
-    
-    def add_course(self, new_course):
-        if new_course not in self.course:
-            self.course.append(new_course)
-            return True
-        return False  
+        self._lock = threading.RLock()
 
-    def delete_course(self, name):
-        for i in self.course:
-            if i.lower() == name.lower():
-                self.course.remove(i)
-                self.assignment.pop(i, None)
-                self.student_assignment.pop(i, None)
-                return True
-        return False  
-
-    def register_student_with_course(self, student_name, course_name):
-        if course_name not in self.course:
-            return False, f"Course '{course_name}' does not exist."
-        
-        if student_name not in self.name:
-            self.name.append(student_name)
-
-        if course_name not in self.student_assignment:
-            self.student_assignment[course_name] = []
-
-        if student_name not in self.student_assignment[course_name]:
-            self.student_assignment[course_name].append(student_name)
-            return True, f"Student '{student_name}' registered and assigned to '{course_name}'."
+        self._users = {}          # user_id -> (user_name, password, email, role, mobile_no)
+        self._by_email = {}       # email -> user_id
+        self._names = {r: [] for r in ROLES}  # role -> sorted [(lower(user_name), user_id)]
+        self._emails = []         # sorted [(email, user_id)], for e-mail prefix search
+        self._prof_status = {}    # professor_id -> 'waiting' / 'approved' / 'rejected'
+        self._prof_by_status = {}  # status -> sorted [(lower(user_name), professor_id)]
+        self._students = set()    # rows of the student table
+        self._admins = set()
+        self._role_rows = {}      # (role, approved only) -> tuple of get_users_by_role rows
+
+        self._courses = {}        # course_id -> (course_name, course_fees, course_duration)
+        self._course_ids = {}     # course_key -> course_id
+        self._course_keys = []    # sorted course keys, for prefix search
+
+        self._course_profs = {}   # course_id -> {professor_id: status}
+        self._prof_courses = {}   # professor_id -> {course_id: status}
+        self._enrolled = {}       # course_id -> {student_id: status}
+        self._enrollments = {}    # student_id -> {course_id: status}
+        self._grades = {}         # course_id -> {student_id: grade}
+        self._graded = {}         # student_id -> {course_id}
+
+        self._log = []            # change feed: [(seq, entity, key, op)], seq ascending
+        self._log_seq = 0
+
+        self._requests = {}       # (professor_name, course_name) -> [status, seq]
+        self._prof_requests = {}  # professor_name -> {course_name: the same [status, seq]}
+        self._pending = {}        # seq -> (professor_name, course_name) of the pending requests
+        self._request_seq = 0
+        self._next_user_id = 1
+        self._next_course_id = 1
+
+    @classmethod
+    def load(cls, db):
+        """Build a replica from a db.DB: every table is streamed once, indexes sorted at the end."""
+        mem = cls()
+        with mem._lock:
+            for uid, name, password, email, role, mobile in db.stream(
+                    "SELECT user_id, user_name, password, email, role, mobile_no FROM users"):
+                mem._add_user(uid, name, password, email, role, mobile, keep_sorted=False)
+            for pid, status in db.stream("SELECT professor_id, status FROM professor"):
+                mem._set_prof_status(pid, status, keep_sorted=False)
+            mem._role_rows.clear()
+            mem._students.update(r[0] for r in db.stream("SELECT student_id FROM student"))
+            mem._admins.update(r[0] for r in db.stream("SELECT admin_id FROM admin"))
+
+            for cid, name, fees, duration in db.stream(
+                    "SELECT course_id, course_name, course_fees, course_duration FROM course"):
+                mem._add_course(cid, name, fees, duration, keep_sorted=False)
+            for cid, pid, status in db.stream("SELECT course_id, professor_id, status FROM course_professor"):
+                mem._set_teaching(cid, pid, status)
+            for cid, sid, status in db.stream("SELECT course_id, student_id, status FROM enrollment"):
+                mem._set_enrollment(cid, sid, status)
+            for cid, sid, grade in db.stream("SELECT course_id, student_id, grade FROM grades"):
+                mem._set_grade(cid, sid, grade)
+            for pname, cname, status in db.stream(
+                    "SELECT professor_name, course_name, status FROM professor_course_requests "
+                    "ORDER BY requested_at, id"):
+                mem._set_request(pname, cname, status)
+
+            for names in mem._names.values():
+                names.sort()
+            for names in mem._prof_by_status.values():
+                names.sort()
+            mem._emails.sort()
+            mem._course_keys.sort()
+        return mem
+
+    def stats(self):
+        """Row counts per table."""
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "professor": len(self._prof_status),
+                "student": len(self._students),
+                "course": len(self._courses),
+                "course_professor": sum(len(p) for p in self._course_profs.values()),
+                "enrollment": sum(len(s) for s in self._enrolled.values()),
+                "grades": sum(len(g) for g in self._grades.values()),
+                "professor_course_requests": len(self._requests),
+            }
+
+    # ----------------- index maintenance -----------------
+    def _add_user(self, uid, name, password, email, role, mobile, keep_sorted=True):
+        add = bisect.insort if keep_sorted else list.append
+        self._role_rows.clear()
+        self._users[uid] = (name, password, email, role, mobile)
+        self._by_email[email] = uid
+        add(self._names[role], (name.lower(), uid))
+        add(self._emails, (email, uid))
+        self._next_user_id = max(self._next_user_id, uid + 1)
+
+    def _add_course(self, cid, name, fees, duration, keep_sorted=True):
+        key = self._course_key(name)
+        self._courses[cid] = (name, fees, duration)
+        self._course_ids[key] = cid
+        if keep_sorted:
+            bisect.insort(self._course_keys, key)
         else:
-            return False, f"Student '{student_name}' is already enrolled in '{course_name}'."
-
-    def remove_student(self, sname):
-        removed = False
-        for student in self.name:
-            if student.lower() == sname.lower():
-                self.name.remove(student)
-                removed = True
-                break
-        if not removed:
-            return False  
-
-        for course, students in self.student_assignment.items():
-            if sname in students:
-                students.remove(sname)
-        keys_to_remove = [key for key in self.grades if key[0].lower() == sname.lower()]
-        for key in keys_to_remove:
-            self.grades.pop(key)
+            self._course_keys.append(key)
+        self._next_course_id = max(self._next_course_id, cid + 1)
+
+    def _set_prof_status(self, pid, status, keep_sorted=True):
+        old = self._prof_status.get(pid)
+        if old != status:
+            item = (self._users[pid][0].lower(), pid)
+            if old is not None:
+                names = self._prof_by_status[old]
+                del names[bisect.bisect_left(names, item)]
+            names = self._prof_by_status.setdefault(status, [])
+            if keep_sorted:
+                bisect.insort(names, item)
+            else:
+                names.append(item)
+            self._prof_status[pid] = status
+            self._role_rows.pop(("professor", True), None)
+
+    def _set_teaching(self, cid, pid, status):
+        self._course_profs.setdefault(cid, {})[pid] = status
+        self._prof_courses.setdefault(pid, {})[cid] = status
+
+    def _set_enrollment(self, cid, sid, status):
+        self._enrolled.setdefault(cid, {})[sid] = status
+        self._enrollments.setdefault(sid, {})[cid] = status
+
+    def _set_grade(self, cid, sid, grade):
+        self._grades.setdefault(cid, {})[sid] = grade
+        self._graded.setdefault(sid, set()).add(cid)
+
+    def _clear_grade(self, cid, sid):
+        self._grades.get(cid, {}).pop(sid, None)
+        self._graded.get(sid, set()).discard(cid)
+
+    def _set_request(self, pname, cname, status):
+        entry = self._requests.get((pname, cname))
+        if entry is None:
+            self._request_seq += 1
+            entry = self._requests[(pname, cname)] = [status, self._request_seq]
+            self._prof_requests.setdefault(pname, {})[cname] = entry
+        else:
+            entry[0] = status
+        if status == "pending":
+            self._pending[entry[1]] = (pname, cname)
+        else:
+            self._pending.pop(entry[1], None)
+        return entry
+
+    def _log_change(self, entity, op, key):
+        self._log_seq += 1
+        self._log.append((self._log_seq, entity, key, op))
+        if len(self._log) > CHANGE_LOG_SIZE:
+            del self._log[:CHANGE_LOG_SIZE // 2]
+
+    def _is_enrolled(self, sid, cid):
+        return self._enrollments.get(sid, {}).get(cid) == "enrolled"
+
+    def _user_row(self, uid):
+        name, _, email, _, _ = self._users[uid]
+        return uid, name, email
+
+    # ----------------- helpers shared with CourseService -----------------
+    _validate_name = CourseService._validate_name
+    _validate_email = CourseService._validate_email
+    _validate_mobile = CourseService._validate_mobile
+    _course_key = CourseService._course_key
+
+    # CSV parsing/validation is CourseService's; it only calls the lookup helpers below
+    import_grades_csv = CourseService.import_grades_csv
+    _grade_csv_header = CourseService._grade_csv_header
+    _import_grade_batch = CourseService._import_grade_batch
+
+    def _get_course_id(self, course_name):
+        with self._lock:
+            return self._course_ids.get(self._course_key(course_name))
+
+    def _active_course_ids(self, professor_id):
+        with self._lock:
+            courses = self._prof_courses.get(_uid(professor_id), {})
+            return {cid for cid, status in courses.items() if status == "active"}
+
+    def _user_ids_by_email(self, emails):
+        with self._lock:
+            return {e: self._by_email[e] for e in emails if e in self._by_email}
+
+    def _enrolled_pairs(self, pairs):
+        with self._lock:
+            return {(sid, cid) for sid, cid in pairs if self._is_enrolled(sid, cid)}
+
+    def _write_grades(self, rows):
+        with self._lock:
+            for cid, sid, grade in rows:
+                self._set_grade(cid, sid, grade)
+                self._log_change("grade", "update", (cid, sid))
+        return True
+
+    # ----------------- dropdown data -----------------
+    def get_users_by_role(self, role, only_approved_professors=True):
+        return list(self._users_by_role(role, only_approved_professors))
+
+    def iter_users_by_role(self, role, only_approved_professors=True):
+        return iter(self._users_by_role(role, only_approved_professors))
+
+    def _users_by_role(self, role, only_approved_professors):
+        # built once per change of users / professor status, like CourseService's view cache
+        role = (role or "").strip().lower()
+        approved = bool(only_approved_professors) and role == "professor"
+        with self._lock:
+            rows = self._role_rows.get((role, approved))
+            if rows is None:
+                rows = self._role_rows[(role, approved)] = tuple(
+                    self._user_row(uid) for _, uid in self._names.get(role, ())
+                    if not approved or self._prof_status.get(uid) == "approved"
+                )
+            return rows
+
+    def export_users_csv(self, role, dest, only_approved_professors=True):
+        return write_csv(
+            dest,
+            ["user_id", "user_name", "email"],
+            self.iter_users_by_role(role, only_approved_professors)
+        )
+
+    # ----------------- type-ahead search -----------------
+    def search_courses(self, prefix="", limit=SEARCH_LIMIT, after=None):
+        prefix = (prefix or "").strip().lower()
+        limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+        with self._lock:
+            keys = self._course_keys
+            i = bisect.bisect_left(keys, prefix)
+            if after is not None:
+                i = max(i, bisect.bisect_right(keys, self._course_key(after)))
+            out = []
+            while i < len(keys) and len(out) < limit and keys[i].startswith(prefix):
+                cid = self._course_ids[keys[i]]
+                out.append((cid, self._courses[cid][0]))
+                i += 1
+            return out
+
+    def search_users(self, role, prefix="", limit=SEARCH_LIMIT, after=None, only_approved_professors=True):
+        role = (role or "").strip().lower()
+        prefix = (prefix or "").strip().lower()
+        limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+        approved = role == "professor" and only_approved_professors
+        start = (after[1].lower(), _uid(after[0])) if after is not None else None
+
+        def wanted(uid):
+            return (self._users[uid][3] == role
+                    and (not approved or self._prof_status.get(uid) == "approved"))
+
+        with self._lock:
+            if "@" in prefix:
+                # e-mail index gives the matches, the result is still ordered by name
+                i = bisect.bisect_left(self._emails, (prefix,))
+                hits = []
+                while i < len(self._emails) and self._emails[i][0].startswith(prefix):
+                    uid = self._emails[i][1]
+                    if wanted(uid):
+                        hits.append((self._users[uid][0].lower(), uid))
+                    i += 1
+                hits.sort()
+                if start is not None:
+                    hits = hits[bisect.bisect_right(hits, start):]
+                return [self._user_row(uid) for _, uid in hits[:limit]]
+
+            names = self._names.get(role, [])
+            i = bisect.bisect_left(names, (prefix,))
+            if start is not None:
+                i = max(i, bisect.bisect_right(names, start))
+            out = []
+            while i < len(names) and len(out) < limit and names[i][0].startswith(prefix):
+                if wanted(names[i][1]):
+                    out.append(self._user_row(names[i][1]))
+                i += 1
+            return out
+
+    # ----------------- AUTH -----------------
+    def register_user(self, user_name, email, password, role, mobile_no=""):
+        user_name = cap(user_name)
+        email = (email or "").strip().lower()
+        password = (password or "").strip()
+        if role == "admin":
+            return False, "Admin account cannot be registered from the app."
+        if role not in ROLES:
+            return False, "Invalid role."
+        if not user_name or not email or not password:
+            return False, "Name, email and password are required."
+        for ok, msg in (self._validate_name(user_name),
+                        self._validate_email(email, required=True),
+                        self._validate_mobile(mobile_no, required=False)):
+            if not ok:
+                return False, msg
+        mobile_no = (mobile_no or "").strip()
+
+        with self._lock:
+            if email in self._by_email:
+                return False, "Email already registered."
+            user_id = self._next_user_id
+            self._add_user(user_id, user_name, password, email, role, mobile_no)
+            if role == "professor":
+                self._set_prof_status(user_id, "waiting")
+            elif role == "student":
+                self._students.add(user_id)
+            else:
+                self._admins.add(user_id)
+            self._log_change("user", "insert", user_id)
+            if role == "professor":
+                self._log_change("professor", "insert", user_id)
+        return True, {"user_id": user_id, "user_name": user_name, "email": email, "role": role}
+
+    def login_user(self, email, password, role):
+        email = (email or "").strip().lower()
+        password = (password or "").strip()
+
+        ok_e, msg = self._validate_email(email, required=True)
+        if not ok_e:
+            return False, msg
+
+        with self._lock:
+            user_id = self._by_email.get(email)
+            if user_id is None:
+                return False, "No account found for this email."
+            user_name, db_pass, db_email, db_role, _ = self._users[user_id]
+            prof_status = self._prof_status.get(user_id)
+
+        if db_role != role:
+            return False, f"This email is registered as '{db_role}', not '{role}'."
+        if db_pass != password:
+            return False, "Wrong password."
+        if role == "professor":
+            status = prof_status or "waiting"
+            if status != "approved":
+                return False, f"Professor account is '{status}'. Ask admin to approve."
+
+        return True, {"user_id": user_id, "user_name": user_name, "email": db_email, "role": db_role}
+
+    # ----------------- Admin: professor approvals -----------------
+    def get_professors_by_status(self, status="waiting", after=None, limit=None, offset=None):
+        with self._lock:
+            names = self._prof_by_status.get(status, [])
+            i = 0 if after is None else bisect.bisect_right(names, (after[1].lower(), _uid(after[0])))
+            if limit is None:
+                page = names[i:]
+            else:
+                i += max(0, int(offset or 0))
+                page = names[i:i + max(1, int(limit))]
+            return [(*self._user_row(uid), status) for _, uid in page]
+
+    def count_professors_by_status(self, status="waiting"):
+        with self._lock:
+            return len(self._prof_by_status.get(status, ()))
+
+    def set_professor_account_status(self, professor_id, status):
+        return self.set_professor_account_status_bulk([professor_id], status)
+
+    def set_professor_account_status_bulk(self, professor_ids, status):
+        if status not in ("approved", "rejected", "waiting"):
+            return False
+        with self._lock:
+            for pid in professor_ids:
+                pid = int(pid)
+                if pid in self._prof_status:
+                    self._set_prof_status(pid, status)
+                    self._log_change("professor", "update", pid)
+        return True
+
+    # ==================== COURSE OPS ====================
+    def add_course(self, name):
+        name = cap(name)
+        with self._lock:
+            if self._course_key(name) in self._course_ids:
+                return False
+            cid = self._next_course_id
+            self._add_course(cid, name, NO_FEES, "NA")
+            self._log_change("course", "insert", cid)
+        return True
+
+    def delete_course(self, name):
+        """Removes the course with its assignments, enrollments and grades: O(their count)."""
+        with self._lock:
+            key = self._course_key(name)
+            cid = self._course_ids.pop(key, None)
+            if cid is None:
+                return False
+            del self._courses[cid]
+            del self._course_keys[bisect.bisect_left(self._course_keys, key)]
+            for pid in self._course_profs.pop(cid, {}):
+                self._prof_courses[pid].pop(cid, None)
+            for sid in self._enrolled.pop(cid, {}):
+                self._enrollments[sid].pop(cid, None)
+            for sid in self._grades.pop(cid, {}):
+                self._graded[sid].discard(cid)
+            self._log_change("course", "delete", cid)
+        return True
+
+    def show_courses(self, after=None, limit=None, offset=None):
+        with self._lock:
+            if after is None and limit is None:
+                return tuple((name,) for name, _, _ in self._courses.values())
+            keys = self._course_keys
+            i = 0 if after is None else bisect.bisect_right(keys, self._course_key(after))
+            if limit is not None:
+                i += max(0, int(offset or 0))
+            j = len(keys) if limit is None else i + max(1, int(limit))
+            return [(self._courses[self._course_ids[k]][0],) for k in keys[i:j]]
+
+    def count_courses(self):
+        with self._lock:
+            return len(self._courses)
+
+    # ----------------- change feed -----------------
+    def changes_since(self, seq=None, limit=CHANGE_LOG_LIMIT):
+        limit = max(1, min(int(limit), CHANGE_LOG_MAX_LIMIT))
+        with self._lock:
+            first = self._log[0][0] if self._log else self._log_seq + 1
+            if seq is None or not first - 1 <= int(seq) <= self._log_seq:
+                return {"seq": self._log_seq, "full": True, "more": False, "changes": []}
+            i = int(seq) - first + 1
+            changes = self._log[i:i + limit]
+            return {
+                "seq": changes[-1][0] if changes else int(seq),
+                "full": False,
+                "more": i + limit < len(self._log),
+                "changes": changes,
+            }
+
+    # ==================== PROFESSOR OPS ====================
+    def assign_professor_to_course_by_id(self, professor_id, course_name):
+        pid = _uid(professor_id)
+        with self._lock:
+            cid = self._get_course_id(course_name)
+            if not cid or pid not in self._users:
+                return False
+            if pid not in self._prof_status:
+                self._set_prof_status(pid, "waiting")
+            self._set_teaching(cid, pid, "active")
+            self._log_change("course_professor", "update", (cid, pid))
+        return True
+
+    def view_professor_courses_by_id(self, professor_id):
+        with self._lock:
+            courses = self._prof_courses.get(_uid(professor_id), {})
+            return tuple((self._courses[cid][0],) for cid, status in courses.items() if status == "active")
+
+    def get_professor_roster(self, professor_id):
+        with self._lock:
+            roster = []
+            for cid in self._active_course_ids(professor_id):
+                grades = self._grades.get(cid, {})
+                students = [
+                    (*self._user_row(sid), grades.get(sid))
+                    for sid, status in self._enrolled.get(cid, {}).items() if status == "enrolled"
+                ]
+                students.sort(key=lambda r: (r[1], r[0]))
+                roster.append((cid, self._courses[cid][0], students))
+        roster.sort(key=lambda r: (r[1], r[0]))
+        return roster
+
+    # ==================== ENROLLMENT OPS ====================
+    def enroll_student_by_id(self, student_id, course_name):
+        sid = _uid(student_id)
+        with self._lock:
+            cid = self._get_course_id(course_name)
+            if not cid or sid not in self._users:
+                return False
+            self._students.add(sid)
+            self._set_enrollment(cid, sid, "enrolled")
+            self._log_change("enrollment", "update", (cid, sid))
+        return True
+
+    def enroll_students_bulk(self, course_name, student_ids):
+        ids = list(dict.fromkeys(int(s) for s in student_ids))
+        cid = self._get_course_id(course_name)
+        if not cid:
+            return {sid: "course not found" for sid in ids}
+        result = self._enroll_pairs([(sid, cid) for sid in ids])
+        return {sid: result[(sid, cid)] for sid in ids}
+
+    def enroll_students_bulk_many(self, pairs):
+        pairs = list(dict.fromkeys((int(sid), course) for sid, course in pairs))
+        cids = {course: self._get_course_id(course) for _, course in pairs}
+        result = self._enroll_pairs([(sid, cids[course]) for sid, course in pairs if cids[course]])
+        return {
+            (sid, course): result[(sid, cids[course])] if cids[course] else "course not found"
+            for sid, course in pairs
+        }
+
+    def _enroll_pairs(self, pairs):
+        outcome = {}
+        with self._lock:
+            for sid, cid in pairs:
+                user = self._users.get(sid)
+                if user is None:
+                    outcome[(sid, cid)] = "no such user"
+                elif user[3] != "student":
+                    outcome[(sid, cid)] = "not a student"
+                elif self._is_enrolled(sid, cid):
+                    outcome[(sid, cid)] = "already enrolled"
+                else:
+                    self._students.add(sid)
+                    self._set_enrollment(cid, sid, "enrolled")
+                    self._log_change("enrollment", "update", (cid, sid))
+                    outcome[(sid, cid)] = "enrolled"
+        return outcome
+
+    def view_student_courses_by_id(self, student_id):
+        with self._lock:
+            courses = self._enrollments.get(_uid(student_id), {})
+            return tuple((self._courses[cid][0],) for cid, status in courses.items() if status == "enrolled")
+
+    def get_student_dashboard(self, student_id):
+        sid = _uid(student_id)
+        rows = []
+        with self._lock:
+            for cid, status in self._enrollments.get(sid, {}).items():
+                name, fees, duration = self._courses[cid]
+                rows.append((name, status, self._grades.get(cid, {}).get(sid), fees, duration))
+        rows.sort(key=lambda r: (r[1] != "enrolled", r[0]))
+        return tuple(rows)
+
+    def view_enrolled_students(self, course_name, professor_id=None):
+        return [(name,) for _, name, _ in self.iter_enrolled_students(course_name, professor_id)]
+
+    def _roster_course_id(self, course_name, professor_id=None):
+        with self._lock:
+            cid = self._get_course_id(course_name)
+            if cid and professor_id is not None and cid not in self._active_course_ids(professor_id):
+                return None
+            return cid
+
+    def iter_enrolled_students(self, course_name, professor_id=None):
+        with self._lock:
+            cid = self._roster_course_id(course_name, professor_id)
+            students = self._enrolled.get(cid, {}) if cid else {}
+            return iter([self._user_row(sid) for sid, status in students.items() if status == "enrolled"])
+
+    def export_enrolled_students_csv(self, course_name, dest, professor_id=None):
+        if not self._roster_course_id(course_name, professor_id):
+            return None
+        return write_csv(dest, ["user_id", "user_name", "email"], self.iter_enrolled_students(course_name))
+
+    # ==================== GRADES OPS ====================
+    def upload_student_grades_by_id(self, student_id, course_name, grade, professor_id=None):
+        sid = _uid(student_id)
+        with self._lock:
+            cid = self._get_course_id(course_name)
+            if not cid or not self._is_enrolled(sid, cid):
+                return False
+            if professor_id is not None and cid not in self._active_course_ids(professor_id):
+                return False
+            self._set_grade(cid, sid, grade)
+            self._log_change("grade", "update", (cid, sid))
+        return True
+
+    def view_student_grades_by_id(self, student_id, course_name):
+        with self._lock:
+            cid = self._get_course_id(course_name)
+            if not cid:
+                return None
+            return self._grades.get(cid, {}).get(_uid(student_id))
+
+    def get_gradebook(self, course_name, professor_id=None):
+        with self._lock:
+            cid = self._get_course_id(course_name)
+            if not cid:
+                return None
+            if professor_id is not None and cid not in self._active_course_ids(professor_id):
+                return None
+            grades = self._grades.get(cid, {})
+            rows = [
+                (*self._user_row(sid), grades.get(sid))
+                for sid, status in self._enrolled.get(cid, {}).items() if status == "enrolled"
+            ]
+        rows.sort(key=lambda r: (r[1], r[0]))
+        return rows
+
+    def save_grades(self, course_name, grades, professor_id=None):
+        result = {"saved": 0, "cleared": 0, "rejected": {}}
+        rejected = result["rejected"]
+        with self._lock:
+            cid = self._get_course_id(course_name)
+            if not cid:
+                result["rejected"] = {_uid(sid): "course not found" for sid in grades}
+                return result
+            mine = professor_id is None or cid in self._active_course_ids(professor_id)
+
+            for sid, grade in grades.items():
+                sid, grade = _uid(sid), (grade or "").strip()
+                if not isinstance(sid, int):
+                    rejected[sid] = "unknown student"
+                elif len(grade) > GRADE_MAX_LEN:
+                    rejected[sid] = "grade too long"
+                elif not mine:
+                    rejected[sid] = "not your course"
+                elif not self._is_enrolled(sid, cid):
+                    rejected[sid] = "not enrolled"
+                elif grade:
+                    self._set_grade(cid, sid, grade)
+                    self._log_change("grade", "update", (cid, sid))
+                    result["saved"] += 1
+                else:
+                    self._clear_grade(cid, sid)
+                    self._log_change("grade", "delete", (cid, sid))
+                    result["cleared"] += 1
+        return result
+
+    # ==================== PROFESSOR COURSE REQUESTS (old feature) ====================
+    def request_professor_course(self, professor_name, course_name):
+        professor_name = cap(professor_name)
+        course_name = cap(course_name)
+        with self._lock:
+            if self._get_course_id(course_name) is None:
+                return False
+            entry = self._set_request(professor_name, course_name, "pending")
+            self._log_change("professor_request", "update", entry[1])
+        return True
+
+    def get_pending_professor_requests(self):
+        with self._lock:
+            return [(*self._pending[seq], "pending") for seq in sorted(self._pending, reverse=True)]
 
+    def set_professor_request_status(self, professor_name, course_name, status):
+        if status not in ("accepted", "rejected"):
+            return False
+        with self._lock:
+            key = (cap(professor_name), cap(course_name))
+            if key in self._requests:
+                entry = self._set_request(*key, status)
+                self._log_change("professor_request", "update", entry[1])
         return True
 
-   
-    def course_assigned(self, prof_name, course_name):
-     if course_name not in self.course:
-        self.course.append(course_name)
-    
-     self.assignment[course_name] = prof_name
-     return True
-
-    
-    def course_assigned_student(self, student_name, course_name):
-        if course_name not in self.course:
-            self.course.append(course_name)
-        if course_name not in self.student_assignment:
-            self.student_assignment[course_name] = []
-        if student_name not in self.student_assignment[course_name]:
-            self.student_assignment[course_name].append(student_name)
-        return self.student_assignment
-    
-    
-
-    def show_details(self):
-        return self.course
-
-    def view_professor_courses(self, prof_name):
-        return [course for course, prof in self.assignment.items() if prof == prof_name]
-
-    def view_student_courses(self, student_name):
-        courses = []
-        for course, students in self.student_assignment.items():
-            if student_name in students:
-                courses.append(course)
-        return courses
-
-    def view_students_in_course(self, course_name):
-        return self.student_assignment.get(course_name, [])
-
-    def upload_student_grades(self, student_name, course_name, grade):
-        key = (student_name, course_name)
-        self.grades[key] = grade
-
-    def view_student_grades(self, student_name, course_name):
-        key = (student_name, course_name)
-        return self.grades.get(key, None)
+    def get_professor_requests(self, professor_name):
+        professor_name = cap(professor_name)
+        with self._lock:
+            rows = sorted(self._prof_requests.get(professor_name, {}).items(), key=lambda r: -r[1][1])
+            return [(c, st) for c, (st, _) in rows]
@@ -0,0 +1,141 @@
+"""
+Client for api_server.py with the same methods as CourseService.
+
+    from api_client import RemoteCourseService
+    service = RemoteCourseService("http://erp-server:8750")
+    ok, ctx = service.login_user(email, password, "student")   # keeps the session token
+    service.view_student_courses_by_id(ctx["user_id"])
+
+panels.py uses it instead of CourseService when UNIVERSITY_API_URL is set.
+Every call is one short HTTP request, so it is safe from the UI worker threads.
+"""
+import http.client
+import json
+import os
+from urllib.parse import urlsplit
+
+API_URL = os.environ.get("UNIVERSITY_API_URL", "")
+API_TIMEOUT = float(os.environ.get("UNIVERSITY_API_TIMEOUT", "30"))
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=None, kind=None):
+        super().__init__(message)
+        self.status = status
+        self.kind = kind
+
+
+class RemoteCourseService:
+    def __init__(self, url=API_URL, timeout=API_TIMEOUT):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Bad API url: {url!r}")
+        self.url = url
+        self.timeout = timeout
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname
+        self._port = parts.port or (443 if self._https else 80)
+        self._prefix = parts.path.rstrip("/")
+        self.token = None
+
+    def call(self, method, *args, _csv=None, _token=None, **kwargs):
+        """POST /api/<method>. Returns (result, full response dict)."""
+        payload = {"args": list(args), "kwargs": kwargs}
+        if _csv is not None:
+            payload["csv"] = _csv
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        token = _token or self.token
+        if token:
+            headers["X-Session"] = token
+
+        cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        conn = cls(self._host, self._port, timeout=self.timeout)
+        try:
+            conn.request("POST", f"{self._prefix}/api/{method}", body, headers)
+            resp = conn.getresponse()
+            raw = resp.read()
+        except OSError as e:
+            raise ApiError(f"Cannot reach the server at {self.url}: {e}") from e
+        finally:
+            conn.close()
+
+        try:
+            data = json.loads(raw or b"{}")
+        except ValueError:
+            raise ApiError(f"Bad response from server (HTTP {resp.status}).", resp.status)
+        if not data.get("ok"):
+            raise ApiError(data.get("error") or f"HTTP {resp.status}", resp.status, data.get("type"))
+        return from_json(data.get("result")), data
+
+    def __getattr__(self, name):
+        # every other CourseService method maps 1:1 onto /api/<name>
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            return self.call(name, *args, **kwargs)[0]
+
+        method.__name__ = name
+        return method
+
+    # ----------------- session -----------------
+    def login_user(self, email, password, role):
+        result, _ = self.call("login_user", email, password, role)
+        ok, ctx = result
+        if ok:
+            self.token = ctx.get("token")
+        return ok, ctx
+
+    def logout(self):
+        # forget the token first, a slow server must not undo a later login
+        token, self.token = self.token, None
+        if token:
+            self.call("logout", _token=token)
+
+    def enroll_students_bulk_many(self, pairs):
+        return self.call("enroll_students_bulk_many", [list(p) for p in pairs])[0]
+
+    # ----------------- files stay on this machine -----------------
+    def export_users_csv(self, role, dest, only_approved_professors=True):
+        result, data = self.call("export_users_csv", role, only_approved_professors=only_approved_professors)
+        _write_text(dest, data.get("csv", ""))
+        return result
+
+    def export_enrolled_students_csv(self, course_name, dest, professor_id=None):
+        result, data = self.call("export_enrolled_students_csv", course_name, professor_id=professor_id)
+        if result is not None:
+            _write_text(dest, data.get("csv", ""))
+        return result
+
+    def import_grades_csv(self, source, professor_id=None, **kwargs):
+        if isinstance(source, str):
+            with open(source, newline="", encoding="utf-8-sig") as f:
+                text = f.read()
+        else:
+            text = source.read()
+        result, _ = self.call("import_grades_csv", professor_id=professor_id, _csv=text, **kwargs)
+        return result
+
+
+def from_json(obj):
+    """Undo api_server.to_json() for dicts with non-string keys (lists come back as lists)."""
+    if isinstance(obj, dict):
+        if set(obj) == {"__items__"}:
+            return {_key(from_json(k)): from_json(v) for k, v in obj["__items__"]}
+        return {k: from_json(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [from_json(v) for v in obj]
+    return obj
+
+
+def _key(k):
+    return tuple(k) if isinstance(k, list) else k
+
+
+def _write_text(dest, text):
+    if isinstance(dest, str):
+        with open(dest, "w", newline="", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        dest.write(text)
@@ -0,0 +1,323 @@
+"""
+HTTP/JSON front end for CourseService, so desktops talk to one server instead of MySQL.
+
+    python api_server.py --host 0.0.0.0 --port 8750 --workers 16
+    UNIVERSITY_API_URL=http://erp-server:8750 python Student/student_app.py
+
+Requests are handled by a fixed pool of worker threads sharing one DB connection pool
+(sized to the workers), so MySQL connections scale with --workers, not with users.
+
+    POST /api/<method>   {"args": [...], "kwargs": {...}}  ->  {"ok": true, "result": ...}
+    GET  /health
+
+login_user returns a session token (ctx["token"]) and logout drops it; every other
+call except register_user needs it in the X-Session header. Students and professors
+may only call their own methods, for their own ids (see METHODS). Stdlib only.
+"""
+import argparse
+import datetime
+import decimal
+import inspect
+import io
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from course_service import CourseService, cap
+from db import DB
+
+API_HOST = os.environ.get("UNIVERSITY_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("UNIVERSITY_API_PORT", "8750"))
+API_WORKERS = int(os.environ.get("UNIVERSITY_API_WORKERS", "16"))
+SESSION_TTL = 8 * 3600     # seconds of inactivity before a token expires
+MAX_BODY = 16 * 1024 * 1024  # grade imports are sent inline
+REQUEST_TIMEOUT = 30       # a slow client can't hold a worker longer than this
+
+ADMIN = {"admin"}
+STAFF = {"admin", "professor"}
+STUDENTS = {"admin", "student"}
+ANYONE = {"admin", "professor", "student"}
+
+# method -> (roles allowed, argument that must equal the caller's user_id unless admin)
+# roles None = no session needed
+METHODS = {
+    "login_user": (None, None),
+    "register_user": (None, None),
+    "logout": (None, None),
+    "search_courses": (ANYONE, None),
+    "show_courses": (ANYONE, None),
+    "count_courses": (ANYONE, None),
+    "changes_since": (ADMIN, None),
+    "search_users": (STAFF, None),
+    "get_users_by_role": (ADMIN, None),
+    "export_users_csv": (ADMIN, None),
+    "get_professors_by_status": (ADMIN, None),
+    "count_professors_by_status": (ADMIN, None),
+    "set_professor_account_status": (ADMIN, None),
+    "set_professor_account_status_bulk": (ADMIN, None),
+    "add_course": (ADMIN, None),
+    "delete_course": (ADMIN, None),
+    "assign_professor_to_course_by_id": (ADMIN, None),
+    "enroll_students_bulk": (ADMIN, None),
+    "enroll_students_bulk_many": (ADMIN, None),
+    "course_cache_stats": (ADMIN, None),
+    "view_cache_stats": (ADMIN, None),
+    "get_pending_professor_requests": (ADMIN, None),
+    "set_professor_request_status": (ADMIN, None),
+    "view_professor_courses_by_id": (STAFF, "professor_id"),
+    "get_professor_roster": (STAFF, "professor_id"),
+    "get_gradebook": (STAFF, "professor_id"),
+    "save_grades": (STAFF, "professor_id"),
+    "view_enrolled_students": (STAFF, "professor_id"),
+    "export_enrolled_students_csv": (STAFF, "professor_id"),
+    "upload_student_grades_by_id": (STAFF, "professor_id"),
+    "import_grades_csv": (STAFF, "professor_id"),
+    "request_professor_course": (STAFF, None),
+    "get_professor_requests": (STAFF, None),
+    "server_stats": (ADMIN, None),
+    "enroll_student_by_id": (STUDENTS, "student_id"),
+    "view_student_courses_by_id": (STUDENTS, "student_id"),
+    "view_student_grades_by_id": (STUDENTS, "student_id"),
+    "get_student_dashboard": (STUDENTS, "student_id"),
+}
+# old name-keyed request feature: this argument must be the caller's own user_name unless admin
+OWN_NAME = {
+    "request_professor_course": "professor_name",
+    "get_professor_requests": "professor_name",
+}
+# the file argument is replaced by an in-memory buffer; CSV text travels in the "csv" field
+CSV_OUT = {"export_users_csv", "export_enrolled_students_csv"}
+CSV_IN = {"import_grades_csv"}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ======================= JSON =======================
+def to_json(obj):
+    """Tuples become lists; dicts with non-string keys become {"__items__": [[k, v], ...]}."""
+    if isinstance(obj, dict):
+        if all(isinstance(k, str) for k in obj):
+            return {k: to_json(v) for k, v in obj.items()}
+        return {"__items__": [[to_json(k), to_json(v)] for k, v in obj.items()]}
+    if isinstance(obj, (list, tuple)):
+        return [to_json(v) for v in obj]
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    return obj
+
+
+# ======================= sessions =======================
+class SessionStore:
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions = {}  # token -> [user_ctx, last_seen]
+
+    def create(self, user_ctx):
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._sessions[token] = [dict(user_ctx), time.monotonic()]
+        return token
+
+    def get(self, token):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(token or "")
+            if entry is None:
+                return None
+            if now - entry[1] > self.ttl:
+                del self._sessions[token]
+                return None
+            entry[1] = now
+            return entry[0]
+
+    def drop(self, token):
+        with self._lock:
+            self._sessions.pop(token or "", None)
+
+    def purge(self):
+        now = time.monotonic()
+        with self._lock:
+            for token in [t for t, (_, seen) in self._sessions.items() if now - seen > self.ttl]:
+                del self._sessions[token]
+
+
+# ======================= dispatch =======================
+class Api:
+    def __init__(self, service):
+        self.service = service
+        self.sessions = SessionStore()
+        self._signatures = {name: inspect.signature(self._target(name)) for name in METHODS}
+
+    def _target(self, name):
+        # api_<name> methods are served here, everything else by CourseService
+        return getattr(self, f"api_{name}", None) or getattr(self.service, name)
+
+    def api_logout(self):
+        return True  # the session itself is dropped in call()
+
+    def api_server_stats(self):
+        db = self.service.db
+        return {"pool": db.pool_stats(), "queries": db.query_report()}
+
+    def call(self, name, body, token=None):
+        if name not in METHODS:
+            raise ApiError(404, f"Unknown method '{name}'.")
+        roles, own_arg = METHODS[name]
+        args = list(body.get("args") or [])
+        kwargs = dict(body.get("kwargs") or {})
+
+        user = None
+        if roles is not None:
+            user = self.sessions.get(token)
+            if user is None:
+                raise ApiError(401, "Not logged in (or session expired).")
+            if user["role"] not in roles:
+                raise ApiError(403, f"'{name}' is not allowed for {user['role']} accounts.")
+
+        if name in CSV_OUT:
+            kwargs["dest"] = io.StringIO()
+        if name in CSV_IN:
+            kwargs["source"] = io.StringIO(body.get("csv") or "")
+
+        try:
+            bound = self._signatures[name].bind(*args, **kwargs)
+        except TypeError as e:
+            raise ApiError(400, str(e))
+
+        if user is not None and user["role"] != "admin":
+            if name == "search_users" and bound.arguments.get("role") != "student":
+                raise ApiError(403, "Professors can only search students.")
+            if own_arg:
+                if own_arg not in bound.arguments or bound.arguments[own_arg] is None:
+                    bound.arguments[own_arg] = user["user_id"]
+                elif str(bound.arguments[own_arg]) != str(user["user_id"]):
+                    raise ApiError(403, "You can only do this for your own account.")
+            name_arg = OWN_NAME.get(name)
+            if name_arg and cap(bound.arguments.get(name_arg)) != cap(user["user_name"]):
+                raise ApiError(403, "You can only do this for your own account.")
+
+        result = self._target(name)(*bound.args, **bound.kwargs)
+
+        if name == "login_user" and result and result[0]:
+            result[1]["token"] = self.sessions.create(result[1])
+        elif name == "logout":
+            self.sessions.drop(token)
+        out = {"ok": True, "result": to_json(result)}
+        if name in CSV_OUT:
+            out["csv"] = kwargs["dest"].getvalue()
+        return out
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "UniversityERP/1.0"
+    timeout = REQUEST_TIMEOUT
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self._send(200, {"ok": True})
+        self._send(404, {"ok": False, "error": "Not found."})
+
+    def do_POST(self):
+        if not self.path.startswith("/api/"):
+            return self._send(404, {"ok": False, "error": "Not found."})
+        name = self.path[len("/api/"):].strip("/")
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY:
+                raise ApiError(413, "Request too large.")
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            if not isinstance(body, dict):
+                raise ApiError(400, "Body must be a JSON object.")
+            out = self.server.api.call(name, body, self.headers.get("X-Session"))
+            self._send(200, out)
+        except ApiError as e:
+            self._send(e.status, {"ok": False, "error": str(e), "type": "ApiError"})
+        except json.JSONDecodeError:
+            self._send(400, {"ok": False, "error": "Invalid JSON.", "type": "ApiError"})
+        except Exception as e:
+            self.log_error("%s failed: %r", name, e)
+            self._send(500, {"ok": False, "error": str(e), "type": type(e).__name__})
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        if not getattr(self.server, "quiet", False):
+            super().log_message(fmt, *args)
+
+
+class ApiServer(HTTPServer):
+    """HTTPServer whose requests run on a fixed ThreadPoolExecutor instead of a thread each."""
+
+    daemon_threads = True
+
+    def __init__(self, address, service, workers=API_WORKERS, quiet=False):
+        super().__init__(address, ApiHandler)
+        self.api = Api(service)
+        self.quiet = quiet
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def service_actions(self):
+        # called between requests by serve_forever()
+        self.api.sessions.purge()
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def make_server(host=API_HOST, port=API_PORT, workers=API_WORKERS, db=None, quiet=False):
+    db = db or DB(max_size=workers)
+    return ApiServer((host, port), CourseService(db=db), workers=workers, quiet=quiet)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve CourseService over HTTP/JSON.")
+    ap.add_argument("--host", default=API_HOST)
+    ap.add_argument("--port", type=int, default=API_PORT)
+    ap.add_argument("--workers", type=int, default=API_WORKERS, help="request threads = max DB connections")
+    ap.add_argument("--quiet", action="store_true", help="no per-request access log")
+    args = ap.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.workers, quiet=args.quiet)
+    print(f"✅ Serving on http://{args.host}:{args.port} with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.api.service.db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Login throughput under concurrent clients.
+
+    python benchmarks/bench_login.py --database erp_bench
+    python benchmarks/bench_login.py --database erp_bench --clients 1,8,32 --seconds 10 --label login-v2
+    python benchmarks/bench_login.py --backend sqlite --database erp_bench.sqlite3 --label login-sqlite
+
+Each client is a thread calling CourseService.login_user with a random valid
+account (plus a share of wrong passwords). The pool is sized to the largest client
+count so the numbers measure the query path, not pool waits.
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_service import Fixture, git_revision, save_results, summarize
+from course_service import CourseService
+from db import DB, DB_BACKEND
+
+
+def run_clients(service, fixture, clients, seconds, bad_password_ratio=0.1):
+    """Returns summarize() of every login made by `clients` threads during `seconds`."""
+    stop = time.perf_counter() + seconds
+    lat, failed, errors = [], [0], [0]
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = random.Random(seed)
+        mine, bad, err = [], 0, 0
+        while time.perf_counter() < stop:
+            email, password, role = rng.choice(fixture.logins)
+            if rng.random() < bad_password_ratio:
+                password += "x"
+            t = time.perf_counter()
+            try:
+                ok, _ = service.login_user(email, password, role)
+                bad += 0 if ok else 1
+            except Exception:
+                err += 1
+            mine.append(time.perf_counter() - t)
+        with lock:
+            lat.extend(mine)
+            failed[0] += bad
+            errors[0] += err
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    result = summarize(sorted(lat), wall, errors[0])
+    result["rejected_logins"] = failed[0]
+    return result
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark concurrent logins.")
+    ap.add_argument("--backend", choices=("mysql", "sqlite"), default=DB_BACKEND)
+    ap.add_argument("--database", default=os.environ.get("UNIVERSITY_BENCH_DB", "erp_bench"),
+                    help="database name (MySQL) or file path (SQLite)")
+    ap.add_argument("--clients", default="1,4,16,32", help="comma-separated client counts")
+    ap.add_argument("--seconds", type=float, default=5.0, help="run time per client count")
+    ap.add_argument("--label", default=None, help="save results as benchmarks/results/<label>.json")
+    args = ap.parse_args(argv)
+
+    counts = [int(c) for c in args.clients.split(",") if c.strip()]
+    db = DB(backend=args.backend, database=args.database, sqlite_path=args.database,
+            max_size=max(counts) + 1)
+    service = CourseService(db=db)
+    fixture = Fixture(service)
+    if not fixture.logins:
+        raise SystemExit("No loginable accounts, run benchmarks/datagen.py first.")
+
+    results = {}
+    for n in counts:
+        r = results[f"login_user x{n}"] = run_clients(service, fixture, n, args.seconds)
+        print(f"{n:>4} clients  {r['ops_per_sec']:>9.1f} logins/s  p50 {r['p50_ms']:>7.2f}  "
+              f"p95 {r['p95_ms']:>7.2f}  p99 {r['p99_ms']:>7.2f} ms  ({r['errors']} errors)")
+
+    print(f"pool: {db.pool_stats()}")
+    if args.label:
+        meta = {
+            "git_rev": git_revision(),
+            "when": datetime.datetime.now().isoformat(timespec="seconds"),
+            "backend": args.backend,
+            "database": args.database,
+            "seconds": args.seconds,
+            "counts": fixture.counts,
+            "python": sys.version.split()[0],
+        }
+        print("saved", save_results(args.label, results, meta))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+DB-backed CourseService vs the in-memory engine (Admin/course.py) on the same data.
+
+    python benchmarks/datagen.py --database erp_bench --reset
+    python benchmarks/bench_memory.py --database erp_bench
+    python benchmarks/bench_memory.py --backend sqlite --database erp_bench.sqlite3 --only view --threads 4
+
+The in-memory engine is loaded from the database with Course.load() (timed), then the
+same BENCHMARKS as bench_service.py run against both. Write benchmarks change the
+database, so re-generate before comparing numbers across runs.
+
+--label saves the same flat results file as bench_service.py: the database engine under
+the benchmark names, the in-memory engine under "<name> [memory]", so either script's
+--compare can read it.
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "Admin"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_service import Fixture, compare, git_revision, run_suite, save_results
+from course import Course
+from course_service import CourseService
+from db import DB, DB_BACKEND
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark CourseService against the in-memory engine.")
+    ap.add_argument("--backend", choices=("mysql", "sqlite"), default=DB_BACKEND)
+    ap.add_argument("--database", default=os.environ.get("UNIVERSITY_BENCH_DB", "erp_bench"),
+                    help="database name (MySQL) or file path (SQLite)")
+    ap.add_argument("--iterations", type=int, default=200, help="base calls per benchmark")
+    ap.add_argument("--threads", type=int, default=1, help="concurrent callers")
+    ap.add_argument("--only", action="append", help="run benchmarks whose name contains this (repeatable)")
+    ap.add_argument("--label", default=None, help="save results as benchmarks/results/<label>.json")
+    ap.add_argument("--compare", default=None, help="results JSON to compare against")
+    args = ap.parse_args(argv)
+
+    db = DB(backend=args.backend, database=args.database, sqlite_path=args.database,
+            max_size=max(2, args.threads + 1))
+    service = CourseService(db=db)
+    fixture = Fixture(service)
+    print(f"{args.backend} data: {fixture.counts}")
+
+    t = time.perf_counter()
+    memory = Course.load(db)
+    load_seconds = time.perf_counter() - t
+    print(f"Course.load: {load_seconds:.2f}s")
+
+    results = {}
+    for name, svc in (("memory", memory), (args.backend, service)):
+        print(f"\n--- {name}")
+        results[name] = run_suite(svc, fixture, iterations=args.iterations, threads=args.threads, only=args.only)
+
+    db_results = results[args.backend]
+    print(f"\n{'benchmark':<34} {'memory/s':>11} {args.backend + '/s':>11} {'speedup':>8}   {'p95 ms':>8} {'db p95':>8}")
+    for name, m in results["memory"].items():
+        d = db_results[name]
+        speedup = m["ops_per_sec"] / d["ops_per_sec"] if d["ops_per_sec"] else 0.0
+        print(f"{name:<34} {m['ops_per_sec']:>11.1f} {d['ops_per_sec']:>11.1f} {speedup:>7.1f}x   "
+              f"{m['p95_ms']:>8.3f} {d['p95_ms']:>8.3f}")
+
+    flat = dict(db_results)
+    flat.update((f"{name} [memory]", r) for name, r in results["memory"].items())
+    if args.label:
+        meta = {
+            "git_rev": git_revision(),
+            "when": datetime.datetime.now().isoformat(timespec="seconds"),
+            "backend": args.backend,
+            "database": args.database,
+            "iterations": args.iterations,
+            "threads": args.threads,
+            "counts": fixture.counts,
+            "load_seconds": load_seconds,
+            "python": sys.version.split()[0],
+        }
+        print("saved", save_results(args.label, flat, meta))
+    if args.compare:
+        compare(flat, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
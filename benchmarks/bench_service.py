@@ -0,0 +1,319 @@
+"""
+Time every public CourseService method against a local database filled by datagen.py.
+
+    python benchmarks/datagen.py --database erp_bench --reset
+    python benchmarks/bench_service.py --database erp_bench --label v2
+    python benchmarks/bench_service.py --database erp_bench --label v3 --compare benchmarks/results/v2.json
+
+Engines side by side (same data from the same --seed):
+
+    python benchmarks/datagen.py --backend sqlite --database erp_bench.sqlite3 --reset
+    python benchmarks/bench_service.py --database erp_bench --label mysql
+    python benchmarks/bench_service.py --backend sqlite --database erp_bench.sqlite3 --label sqlite \
+        --compare benchmarks/results/mysql.json
+
+Every benchmark reports ops/s and p50/p95/p99 latency. Results are saved as JSON under
+benchmarks/results/<label>.json (with git revision and data scale) so two versions
+can be compared with --compare. Write benchmarks change the data, so re-generate
+before comparing numbers across runs.
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from course_service import CourseService
+from db import DB, DB_BACKEND
+from query_stats import percentile
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# ======================= fixtures =======================
+class Fixture:
+    """Ids/names sampled from the database once, so the timed calls don't pay for them."""
+
+    def __init__(self, service, sample=2000, seed=7):
+        db = service.db
+        self.rng = random.Random(seed)
+        self.run_id = int(time.time())
+
+        self.students = self._sample(db.stream("SELECT student_id FROM student"), sample)
+        self.professors = self._sample(
+            db.stream("SELECT professor_id FROM professor WHERE status='approved'"), sample)
+        self.courses = self._sample(db.stream("SELECT course_id, course_name FROM course"), sample)
+        self.enrolled = self._sample(db.stream(
+            "SELECT e.student_id, c.course_name FROM enrollment e "
+            "JOIN course c ON c.course_id=e.course_id WHERE e.status='enrolled'"), sample)
+        self.logins = self._sample(db.stream(
+            "SELECT u.email, u.password, u.role FROM users u "
+            "LEFT JOIN professor p ON p.professor_id=u.user_id "
+            "WHERE u.role='student' OR p.status='approved'"), sample)
+        # whole classes for save_grades: up to 50 enrolled students of a few sampled courses
+        self.gradebooks = []
+        for name in dict.fromkeys(c for _, c in self.enrolled[:20]):
+            ids = [r[0] for r in db.run(
+                "SELECT e.student_id FROM enrollment e JOIN course c ON c.course_id=e.course_id "
+                "WHERE c.course_key=%s AND e.status='enrolled' LIMIT 50",
+                (name.strip().lower(),), fetch=True) or []]
+            self.gradebooks.append((name, ids))
+        self.cursors = {}  # (engine, rows back) -> changes_since cursor, see _feed_cursor
+        self.counts = {
+            t: db.run(f"SELECT COUNT(*) FROM {t}", fetchone=True)[0]
+            for t in ("users", "student", "professor", "course", "enrollment", "grades")
+        }
+        if not (self.students and self.professors and self.courses and self.enrolled):
+            raise SystemExit("Database looks empty, run benchmarks/datagen.py first.")
+
+    def _sample(self, rows, k):
+        # reservoir sample from a stream
+        out = []
+        for i, r in enumerate(rows):
+            r = r[0] if len(r) == 1 else tuple(r)
+            if i < k:
+                out.append(r)
+            else:
+                j = self.rng.randrange(i + 1)
+                if j < k:
+                    out[j] = r
+        return out
+
+    def student(self):
+        return self.rng.choice(self.students)
+
+    def professor(self):
+        return self.rng.choice(self.professors)
+
+    def course_name(self):
+        return self.rng.choice(self.courses)[1]
+
+    def enrolled_pair(self):
+        return self.rng.choice(self.enrolled)
+
+    def prefix(self):
+        return self.course_name()[:3]
+
+    def gradebook(self):
+        return self.rng.choice(self.gradebooks)
+
+
+# ======================= benchmarks =======================
+# name -> (fn(service, fixture, i), iterations multiplier)
+# the multiplier keeps whole-table reads (x0.02) from dominating the run time
+def _grades_csv(fx, n=1000):
+    buf = io.StringIO()
+    buf.write("student,course,grade\n")
+    for _ in range(n):
+        sid, course = fx.enrolled_pair()
+        buf.write(f"{sid},{course},B\n")
+    buf.seek(0)
+    return buf
+
+
+def _save_grades(s, fx):
+    course, ids = fx.gradebook()
+    return s.save_grades(course, {sid: fx.rng.choice("ABCDF") for sid in ids})
+
+
+def _feed_cursor(s, fx, back=0):
+    # taken on first use, per engine: CourseService and the in-memory engine number
+    # their change logs separately
+    key = (id(s), back)
+    if key not in fx.cursors:
+        fx.cursors[key] = max(0, s.changes_since(None)["seq"] - back)
+    return fx.cursors[key]
+
+
+def _add_delete_course(s, fx, i):
+    name = f"Bench Tmp {fx.run_id} {i} {fx.rng.randrange(10 ** 9)}"
+    s.add_course(name)
+    s.delete_course(name)
+
+
+BENCHMARKS = {
+    # ---- reads
+    "login_user": (lambda s, fx, i: s.login_user(*fx.rng.choice(fx.logins)), 1),
+    "show_courses": (lambda s, fx, i: s.show_courses(), 0.05),
+    "show_courses(page of 100)": (lambda s, fx, i: s.show_courses(after=fx.course_name(), limit=100), 1),
+    "search_courses": (lambda s, fx, i: s.search_courses(fx.prefix(), limit=20), 1),
+    "search_users": (lambda s, fx, i: s.search_users("student", fx.rng.choice("ABCDEFGHKLMNOPRSZ"), limit=20), 1),
+    "get_users_by_role(professor)": (lambda s, fx, i: s.get_users_by_role("professor"), 0.05),
+    "get_users_by_role(student)": (lambda s, fx, i: s.get_users_by_role("student", False), 0.02),
+    "export_users_csv(student)": (lambda s, fx, i: s.export_users_csv("student", io.StringIO(), False), 0.02),
+    "get_professors_by_status": (lambda s, fx, i: s.get_professors_by_status("waiting"), 0.1),
+    "get_professors_by_status(page of 100)": (
+        lambda s, fx, i: s.get_professors_by_status("waiting", limit=100), 1),
+    "view_professor_courses_by_id": (lambda s, fx, i: s.view_professor_courses_by_id(fx.professor()), 1),
+    "get_professor_roster": (lambda s, fx, i: s.get_professor_roster(fx.professor()), 0.5),
+    "get_gradebook": (lambda s, fx, i: s.get_gradebook(fx.course_name()), 0.5),
+    "view_student_courses_by_id": (lambda s, fx, i: s.view_student_courses_by_id(fx.student()), 1),
+    "view_enrolled_students": (lambda s, fx, i: s.view_enrolled_students(fx.course_name()), 1),
+    "export_enrolled_students_csv": (lambda s, fx, i: s.export_enrolled_students_csv(fx.course_name(), io.StringIO()), 0.5),
+    "view_student_grades_by_id": (lambda s, fx, i: s.view_student_grades_by_id(*fx.enrolled_pair()), 1),
+    "get_student_dashboard": (lambda s, fx, i: s.get_student_dashboard(fx.student()), 1),
+    "get_pending_professor_requests": (lambda s, fx, i: s.get_pending_professor_requests(), 0.2),
+    "get_professor_requests": (lambda s, fx, i: s.get_professor_requests("Bench Professor"), 0.2),
+    # ---- writes
+    "enroll_student_by_id": (lambda s, fx, i: s.enroll_student_by_id(fx.student(), fx.course_name()), 1),
+    "enroll_students_bulk(100)": (
+        lambda s, fx, i: s.enroll_students_bulk(fx.course_name(), fx.rng.sample(fx.students, min(100, len(fx.students)))), 0.1),
+    "enroll_students_bulk_many(100)": (
+        lambda s, fx, i: s.enroll_students_bulk_many((fx.student(), fx.course_name()) for _ in range(100)), 0.1),
+    "upload_student_grades_by_id": (
+        lambda s, fx, i: s.upload_student_grades_by_id(*fx.enrolled_pair(), fx.rng.choice("ABCDF")), 1),
+    "save_grades(class of <=50)": (lambda s, fx, i: _save_grades(s, fx), 0.5),
+    "import_grades_csv(1000)": (lambda s, fx, i: s.import_grades_csv(_grades_csv(fx)), 0.05),
+    "assign_professor_to_course_by_id": (
+        lambda s, fx, i: s.assign_professor_to_course_by_id(fx.professor(), fx.course_name()), 1),
+    "set_professor_account_status": (
+        lambda s, fx, i: s.set_professor_account_status(fx.professor(), "approved"), 1),
+    "set_professor_account_status_bulk(100)": (
+        lambda s, fx, i: s.set_professor_account_status_bulk(
+            fx.rng.sample(fx.professors, min(100, len(fx.professors))), "approved"), 0.2),
+    "register_user": (
+        lambda s, fx, i: s.register_user("Bench User", f"bench{fx.run_id}x{i}x{fx.rng.random():.8f}@bench.edu",
+                                         "pw", "student", "9999999999"), 1),
+    "add_course+delete_course": (lambda s, fx, i: _add_delete_course(s, fx, i), 0.2),
+    "request_professor_course": (
+        lambda s, fx, i: s.request_professor_course("Bench Professor", fx.course_name()), 0.5),
+    # ---- change feed (after the writes above, so the log has rows to return)
+    "changes_since(idle poll)": (lambda s, fx, i: s.changes_since(_feed_cursor(s, fx)), 1),
+    "changes_since(500 behind)": (lambda s, fx, i: s.changes_since(_feed_cursor(s, fx, 500)), 0.5),
+}
+
+
+def time_calls(fn, iterations, threads=1):
+    """Returns (latencies_sorted_seconds, wall_seconds, errors)."""
+    errors = []
+
+    def one(i):
+        t = time.perf_counter()
+        try:
+            fn(i)
+        except Exception as e:
+            errors.append(e)  # list.append is atomic, fine from many threads
+        return time.perf_counter() - t
+
+    start = time.perf_counter()
+    if threads <= 1:
+        lat = [one(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            lat = list(pool.map(one, range(iterations)))
+    wall = time.perf_counter() - start
+    return sorted(lat), wall, len(errors)
+
+
+def summarize(lat, wall, errors):
+    n = len(lat)
+    return {
+        "iterations": n,
+        "errors": errors,
+        "ops_per_sec": n / wall if wall else 0.0,
+        "p50_ms": percentile(lat, 50) * 1000,
+        "p95_ms": percentile(lat, 95) * 1000,
+        "p99_ms": percentile(lat, 99) * 1000,
+        "max_ms": (lat[-1] if lat else 0.0) * 1000,
+    }
+
+
+def run_suite(service, fixture, iterations=200, threads=1, only=None, warmup=3, log=print):
+    results = {}
+    for name, (fn, factor) in BENCHMARKS.items():
+        if only and not any(o in name for o in only):
+            continue
+        n = max(3, int(iterations * factor))
+        call = lambda i, fn=fn: fn(service, fixture, i)
+        for i in range(warmup):
+            call(-1 - i)
+        results[name] = summarize(*time_calls(call, n, threads))
+        r = results[name]
+        log(f"{name:<34} {r['ops_per_sec']:>9.1f}/s  p50 {r['p50_ms']:>8.2f}  p95 {r['p95_ms']:>8.2f}  "
+            f"p99 {r['p99_ms']:>8.2f} ms  ({r['iterations']} calls, {r['errors']} errors)")
+    return results
+
+
+# ======================= results =======================
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def save_results(label, results, meta):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{label}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+    return path
+
+
+def compare(results, baseline_path, log=print):
+    with open(baseline_path, encoding="utf-8") as f:
+        base = json.load(f)
+    log(f"\nvs {baseline_path} ({base['meta'].get('backend', 'mysql')}, rev {base['meta'].get('git_rev')}):")
+    log(f"{'benchmark':<34} {'ops/s':>10} {'base':>10} {'change':>8}   {'p95 ms':>8} {'base':>8}")
+    for name, r in results.items():
+        b = base["results"].get(name)
+        if not b:
+            continue
+        change = (r["ops_per_sec"] / b["ops_per_sec"] - 1) * 100 if b["ops_per_sec"] else 0.0
+        log(f"{name:<34} {r['ops_per_sec']:>10.1f} {b['ops_per_sec']:>10.1f} {change:>+7.1f}%   "
+            f"{r['p95_ms']:>8.2f} {b['p95_ms']:>8.2f}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark CourseService.")
+    ap.add_argument("--backend", choices=("mysql", "sqlite"), default=DB_BACKEND)
+    ap.add_argument("--database", default=os.environ.get("UNIVERSITY_BENCH_DB", "erp_bench"),
+                    help="database name (MySQL) or file path (SQLite)")
+    ap.add_argument("--iterations", type=int, default=200, help="base calls per benchmark")
+    ap.add_argument("--threads", type=int, default=1, help="concurrent callers")
+    ap.add_argument("--only", action="append", help="run benchmarks whose name contains this (repeatable)")
+    ap.add_argument("--label", default=None, help="save results as benchmarks/results/<label>.json")
+    ap.add_argument("--compare", default=None, help="results JSON to compare against")
+    ap.add_argument("--queries", action="store_true", help="print the per-statement query report at the end")
+    args = ap.parse_args(argv)
+
+    db = DB(backend=args.backend, database=args.database, sqlite_path=args.database,
+            max_size=max(2, args.threads + 1))
+    service = CourseService(db=db)
+    fixture = Fixture(service)
+    print(f"{args.backend} data: {fixture.counts}")
+
+    results = run_suite(service, fixture, iterations=args.iterations, threads=args.threads, only=args.only)
+
+    meta = {
+        "git_rev": git_revision(),
+        "when": datetime.datetime.now().isoformat(timespec="seconds"),
+        "backend": args.backend,
+        "database": args.database,
+        "iterations": args.iterations,
+        "threads": args.threads,
+        "counts": fixture.counts,
+        "python": sys.version.split()[0],
+    }
+    if args.label:
+        print("saved", save_results(args.label, results, meta))
+    if args.compare:
+        compare(results, args.compare)
+    if args.queries:
+        print()
+        print(db.query_report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
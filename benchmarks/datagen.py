@@ -0,0 +1,221 @@
+"""
+Fill a database with a synthetic university.
+
+    python benchmarks/datagen.py --database erp_bench --reset
+    python benchmarks/datagen.py --database erp_bench --reset --students 100000 \
+        --professors 3000 --courses 5000 --enrollments 1000000
+    python benchmarks/datagen.py --backend sqlite --database erp_bench.sqlite3 --reset
+
+The schema is created/upgraded with migrations.py first (sqlite_backend.py for
+--backend sqlite, where --database is the file path). Generation is deterministic
+for a given --seed, so two runs at the same scale produce the same data.
+Never point this at a production database: --reset empties every table.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pymysql
+
+import sqlite_backend
+from db import DB_BACKEND
+from migrations import connect, migrate
+
+BATCH = 2000
+
+FIRST = ["Aarav", "Maya", "Liam", "Noah", "Emma", "Olivia", "Ava", "Zara", "Ivan", "Mei", "Omar", "Sara",
+         "Lucas", "Nina", "Arjun", "Priya", "Diego", "Lena", "Kofi", "Amara", "Yuki", "Hana", "Ravi", "Ella"]
+LAST = ["Smith", "Patel", "Garcia", "Kim", "Nguyen", "Brown", "Singh", "Lopez", "Khan", "Chen", "Muller",
+        "Rossi", "Silva", "Okafor", "Ivanova", "Sato", "Cohen", "Haddad", "Novak", "Larsen", "Moreau"]
+SUBJECTS = ["Algebra", "Biology", "Chemistry", "Databases", "Economics", "French", "Geology", "History",
+            "Informatics", "Journalism", "Kinesiology", "Linguistics", "Marketing", "Networks", "Optics",
+            "Physics", "Robotics", "Statistics", "Theology", "Urban Design", "Virology", "Zoology"]
+GRADES = ["A", "A-", "B+", "B", "B-", "C+", "C", "D", "F"]
+
+
+def person_name(rng):
+    return f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+
+
+def insert_rows(cur, sql_head, row_sql, rows, sql_tail=""):
+    """Multi-row INSERT in batches of BATCH rows."""
+    n = 0
+    for i in range(0, len(rows), BATCH):
+        part = rows[i:i + BATCH]
+        cur.execute(
+            f"{sql_head} VALUES {','.join([row_sql] * len(part))} {sql_tail}",
+            tuple(v for r in part for v in r)
+        )
+        n += len(part)
+    return n
+
+
+def ensure_database(name):
+    conn = connect(database=None)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE DATABASE IF NOT EXISTS `{name}` CHARACTER SET utf8mb4")
+    finally:
+        conn.close()
+
+
+TABLES = ("grades", "enrollment", "course_professor", "professor_course_requests", "change_log",
+          "course", "student", "professor", "admin", "users")
+
+
+def reset(cur, backend="mysql"):
+    if backend == "sqlite":
+        # children first, so the cascades have nothing left to do
+        for t in TABLES:
+            cur.execute(f"DELETE FROM {t}")
+        return
+    cur.execute("SET FOREIGN_KEY_CHECKS=0")
+    for t in TABLES:
+        cur.execute(f"TRUNCATE TABLE {t}")
+    cur.execute("SET FOREIGN_KEY_CHECKS=1")
+
+
+def open_database(backend, database):
+    """Connection to a database with the latest schema, created if needed."""
+    if backend == "sqlite":
+        conn = sqlite_backend.connect(database)
+        sqlite_backend.ensure_schema(conn)
+        return conn
+    ensure_database(database)
+    conn = connect(database=database)
+    migrate(conn)
+    return conn
+
+
+def generate(conn, students, professors, courses, enrollments, grade_ratio=0.5, seed=42, log=print):
+    """
+    Returns dict of row counts written. Users are created with explicit ids so every
+    other table can be generated without reading ids back.
+    """
+    rng = random.Random(seed)
+    counts = {}
+    t0 = time.perf_counter()
+
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MAX(user_id), 0) FROM users")
+        next_id = cur.fetchone()[0] + 1
+        cur.execute("SELECT COALESCE(MAX(course_id), 0) FROM course")
+        next_course = cur.fetchone()[0] + 1
+
+        conn.begin()
+
+        # ---- users: students then professors
+        student_ids = list(range(next_id, next_id + students))
+        prof_ids = list(range(next_id + students, next_id + students + professors))
+        users = [(uid, person_name(rng), "bench", f"s{uid}@bench.edu", "student", f"9{uid:09d}"[:10])
+                 for uid in student_ids]
+        users += [(uid, person_name(rng), "bench", f"p{uid}@bench.edu", "professor", f"8{uid:09d}"[:10])
+                  for uid in prof_ids]
+        counts["users"] = insert_rows(
+            cur, "INSERT INTO users(user_id, user_name, password, email, role, mobile_no)",
+            "(%s,%s,%s,%s,%s,%s)", users
+        )
+        del users
+        counts["student"] = insert_rows(cur, "INSERT INTO student(student_id)", "(%s)", [(s,) for s in student_ids])
+
+        statuses = rng.choices(["approved", "waiting", "rejected"], weights=[90, 8, 2], k=len(prof_ids))
+        counts["professor"] = insert_rows(
+            cur, "INSERT INTO professor(professor_id, status)", "(%s,%s)", list(zip(prof_ids, statuses))
+        )
+        approved = [p for p, st in zip(prof_ids, statuses) if st == "approved"] or prof_ids
+        log(f"   users: {counts['users']}")
+
+        # ---- courses (+ 1-2 professors each)
+        course_ids = list(range(next_course, next_course + courses))
+        course_rows = [(cid, f"{rng.choice(SUBJECTS)} {cid:05d}", rng.choice([0, 500, 1200, 2500]), "1 term")
+                       for cid in course_ids]
+        counts["course"] = insert_rows(
+            cur, "INSERT INTO course(course_id, course_name, course_fees, course_duration)",
+            "(%s,%s,%s,%s)", course_rows
+        )
+        del course_rows
+
+        cp = set()
+        if approved:
+            for cid in course_ids:
+                for p in rng.sample(approved, k=min(len(approved), rng.choice([1, 1, 1, 2]))):
+                    cp.add((cid, p))
+        counts["course_professor"] = insert_rows(
+            cur, "INSERT INTO course_professor(course_id, professor_id, status)", "(%s,%s,'active')", sorted(cp)
+        )
+        log(f"   courses: {counts['course']}")
+
+        # ---- enrollments: spread evenly over students, random courses, no duplicates
+        enrollments = min(enrollments, students * courses)
+        per_student, extra = divmod(enrollments, students) if students else (0, 0)
+        written = 0
+        graded = 0
+        batch, grade_batch = [], []
+        for i, sid in enumerate(student_ids):
+            k = per_student + (1 if i < extra else 0)
+            if not k:
+                continue
+            for cid in rng.sample(course_ids, k=min(k, len(course_ids))):
+                st = "enrolled" if rng.random() < 0.9 else rng.choice(["completed", "dropped"])
+                batch.append((cid, sid, st))
+                if st != "dropped" and rng.random() < grade_ratio:
+                    grade_batch.append((cid, sid, rng.choice(GRADES)))
+            if len(batch) >= BATCH * 5:
+                written += insert_rows(cur, "INSERT INTO enrollment(course_id, student_id, status)", "(%s,%s,%s)", batch)
+                graded += insert_rows(cur, "INSERT INTO grades(course_id, student_id, grade)", "(%s,%s,%s)", grade_batch)
+                batch, grade_batch = [], []
+                conn.commit()
+                conn.begin()
+                log(f"   enrollments: {written}", end="\r")
+        written += insert_rows(cur, "INSERT INTO enrollment(course_id, student_id, status)", "(%s,%s,%s)", batch)
+        graded += insert_rows(cur, "INSERT INTO grades(course_id, student_id, grade)", "(%s,%s,%s)", grade_batch)
+        counts["enrollment"] = written
+        counts["grades"] = graded
+        conn.commit()
+        log(f"   enrollments: {written}, grades: {graded}")
+
+    counts["seconds"] = round(time.perf_counter() - t0, 2)
+    return counts
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate a synthetic university dataset.")
+    ap.add_argument("--backend", choices=("mysql", "sqlite"), default=DB_BACKEND)
+    ap.add_argument("--database", default=os.environ.get("UNIVERSITY_BENCH_DB", "erp_bench"),
+                    help="database name (MySQL) or file path (SQLite)")
+    ap.add_argument("--students", type=int, default=10000)
+    ap.add_argument("--professors", type=int, default=300)
+    ap.add_argument("--courses", type=int, default=500)
+    ap.add_argument("--enrollments", type=int, default=100000)
+    ap.add_argument("--grade-ratio", type=float, default=0.5, help="share of enrollments that get a grade")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--reset", action="store_true", help="empty all tables first")
+    args = ap.parse_args(argv)
+
+    conn = open_database(args.backend, args.database)
+    try:
+        with conn.cursor() as cur:
+            if args.reset:
+                reset(cur, args.backend)
+        print(f"Generating into {args.backend} `{args.database}` (seed {args.seed})...")
+        counts = generate(
+            conn, args.students, args.professors, args.courses, args.enrollments,
+            grade_ratio=args.grade_ratio, seed=args.seed,
+            log=lambda *a, **k: print(*a, **k, flush=True),
+        )
+    except pymysql.err.IntegrityError as e:
+        print("❌ Duplicate ids/emails, run again with --reset:", e)
+        return 1
+    finally:
+        conn.close()
+
+    print("✅ Done:", counts)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,505 @@
+"""
+Bulk loader for onboarding a campus.
+
+    python bulk_load.py --users users.csv --courses courses.csv \
+        --assignments assignments.jsonl --enrollments enrollments.csv
+
+Input files are CSV (with a header) or JSON Lines (.jsonl / .ndjson), one object per line:
+
+    users        user_name, email, password, role (student|professor), mobile_no, [status]
+    courses      course_name, [course_fees], [course_duration]
+    assignments  professor (email or id), course
+    enrollments  student (email or id), course, [status]
+
+student/professor rows are derived from users.role with one INSERT ... SELECT.
+Every table written is also logged to change_log, so CourseService caches, open admin
+panels and other changes_since() consumers pick the load up: new users, professors and
+courses with one INSERT ... SELECT over the ids the load added, assignments and
+enrollments batch by batch (with --method load-data: after the LOAD DATA commits).
+Emails and course names are resolved to ids in memory, from the very tables the
+foreign keys point at (student / professor / course), so assignment and enrollment
+rows are written with foreign key checks off; everything else keeps them on.
+
+--method insert     multi-row INSERTs (default, works everywhere)
+--method load-data  LOAD DATA LOCAL INFILE from a temp file (server needs local_infile=ON)
+--rebuild-indexes   drop non-unique secondary indexes before a big load, rebuild after
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pymysql
+
+from course_service import cap
+from migrations import connect
+
+BATCH = 5000
+COMMIT_EVERY = 20  # batches per transaction
+
+# non-unique secondary indexes that are cheaper to rebuild once than to maintain per row
+SECONDARY_INDEXES = {
+    "users": [("idx_users_role_name", "role, user_name")],
+}
+
+
+# ======================= input =======================
+def read_records(path):
+    """Yield dicts from a CSV (header row) or JSON Lines file."""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if ext in (".jsonl", ".ndjson", ".json"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(f):
+                yield {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+
+
+def _get(rec, *names, default=""):
+    for n in names:
+        v = rec.get(n)
+        if v not in (None, ""):
+            return str(v).strip()
+    return default
+
+
+# ======================= writers =======================
+class Loader:
+    def __init__(self, conn, method="insert", log=print):
+        self.conn = conn
+        self.method = method
+        self.log = log
+        self.report = {}
+
+    def write(self, table, columns, rows, ignore=False, upsert=None, log=None):
+        """
+        rows: iterable of tuples. Returns number of rows sent.
+        ignore -> INSERT IGNORE, upsert -> 'ON DUPLICATE KEY UPDATE ...' tail.
+        log=(entity, op) -> also write a change_log row per input row, keyed on its
+        first two columns: in the same transaction with --method insert, right after the
+        load with load-data. Either way in short transactions (see _insert).
+        """
+        if self.method == "load-data":
+            return self._load_data(table, columns, rows, ignore, log)
+        return self._insert(table, columns, rows, ignore, upsert, log)
+
+    def _insert(self, table, columns, rows, ignore, upsert, log=None):
+        head = f"INSERT {'IGNORE ' if ignore else ''}INTO {table}({', '.join(columns)}) VALUES "
+        one = "(" + ",".join(["%s"] * len(columns)) + ")"
+        tail = f" ON DUPLICATE KEY UPDATE {upsert}" if upsert else ""
+        # logged loads commit every batch: change_log readers skip a seq gap once the rows
+        # after it are a few seconds old, so a logged transaction must not stay open long
+        commit_every = 1 if log else COMMIT_EVERY
+
+        sent = 0
+        batches = 0
+        batch = []
+        with self.conn.cursor() as cur:
+            def flush():
+                cur.execute(head + ",".join([one] * len(batch)) + tail, tuple(v for row in batch for v in row))
+                if log:
+                    _log_pairs(cur, log, batch)
+
+            self.conn.begin()
+            for r in rows:
+                batch.append(r)
+                if len(batch) >= BATCH:
+                    flush()
+                    sent += len(batch)
+                    batch = []
+                    batches += 1
+                    if batches % commit_every == 0:
+                        self.conn.commit()
+                        self.conn.begin()
+            if batch:
+                flush()
+                sent += len(batch)
+            self.conn.commit()
+        return sent
+
+    def _load_data(self, table, columns, rows, ignore, log=None):
+        sent = 0
+        paths = []
+        try:
+            data = _temp_tsv(table, paths)
+            keys = _temp_tsv("keys", paths) if log else None
+            w = _tsv_writer(data)
+            kw = _tsv_writer(keys) if log else None
+            for r in rows:
+                w.writerow(r)
+                if kw:
+                    kw.writerow(r[:2])
+                sent += 1
+            data.close()
+            with self.conn.cursor() as cur:
+                _load_file(cur, paths[0], table, columns, ignore)  # one statement, commits alone
+            if log:
+                # not one LOAD DATA into change_log: a statement that outlives the feed's gap
+                # window (CHANGE_OVERLAP_SECS) would have its rows skipped by every reader,
+                # so the keys are logged BATCH rows per (autocommitted) INSERT
+                keys.close()
+                self._log_file(paths[1], log)
+        finally:
+            for path in paths:
+                os.remove(path)
+        return sent
+
+    def _log_file(self, path, log):
+        with open(path, newline="", encoding="utf-8") as f, self.conn.cursor() as cur:
+            batch = []
+            for pair in csv.reader(f, delimiter="\t"):
+                batch.append(pair)
+                if len(batch) >= BATCH:
+                    _log_pairs(cur, log, batch)
+                    batch = []
+            if batch:
+                _log_pairs(cur, log, batch)
+
+    def timed(self, name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        with self.conn.cursor() as cur:
+            before = _row_count(cur, name)
+        sent, rejected = fn(*args, **kwargs)
+        secs = time.perf_counter() - start
+        with self.conn.cursor() as cur:
+            added = _row_count(cur, name) - before
+        self.report[name] = {
+            "read": sent + rejected,
+            "added": added,
+            "skipped": sent - added,
+            "rejected": rejected,
+            "seconds": round(secs, 2),
+            "rows_per_sec": round(sent / secs) if secs else 0,
+        }
+        r = self.report[name]
+        self.log(f"   {name:<16} added {r['added']:>9}  skipped {r['skipped']:>7}  "
+                 f"rejected {r['rejected']:>7}  {r['rows_per_sec']:>8}/s  ({r['seconds']}s)")
+
+
+def _temp_tsv(table, paths):
+    fd, path = tempfile.mkstemp(suffix=".tsv", prefix=f"load_{table}_")
+    paths.append(path)
+    return os.fdopen(fd, "w", newline="", encoding="utf-8")
+
+
+def _tsv_writer(f):
+    return csv.writer(f, delimiter="\t", lineterminator="\n", quoting=csv.QUOTE_NONE, escapechar="\\")
+
+
+def _load_file(cur, path, table, columns, ignore):
+    cur.execute(
+        f"LOAD DATA LOCAL INFILE %s {'IGNORE' if ignore else ''} INTO TABLE {table} "
+        "CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+        f"LINES TERMINATED BY '\\n' ({', '.join(columns)})",
+        (path,)
+    )
+
+
+def _log_pairs(cur, log, rows):
+    """change_log rows (entity, rows[i][0], rows[i][1], op) for log=(entity, op)."""
+    cur.execute(
+        "INSERT INTO change_log(entity, entity_id, ref_id, op) VALUES "
+        + ",".join(["(%s,%s,%s,%s)"] * len(rows)),
+        tuple(v for row in rows for v in (log[0], row[0], row[1], log[1]))
+    )
+
+
+def _row_count(cur, table):
+    cur.execute(f"SELECT COUNT(*) FROM {table}")
+    return cur.fetchone()[0]
+
+
+def _max_id(conn, table, column):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT COALESCE(MAX({column}), 0) FROM {table}")
+        return cur.fetchone()[0]
+
+
+def log_new_rows(conn, entity, table, column, after):
+    """
+    change_log 'insert' rows for every id above `after` (AUTO_INCREMENT ids the load added),
+    one short INSERT ... SELECT per BATCH ids so no statement outlives the feed's gap window.
+    """
+    last = _max_id(conn, table, column)
+    logged = 0
+    with conn.cursor() as cur:
+        for lo in range(after, last, BATCH):
+            cur.execute(
+                f"INSERT INTO change_log(entity, entity_id, op) "
+                f"SELECT %s, {column}, 'insert' FROM {table} WHERE {column} > %s AND {column} <= %s "
+                f"ORDER BY {column}",
+                (entity, lo, lo + BATCH)
+            )
+            logged += cur.rowcount
+    return logged
+
+
+# ======================= lookups =======================
+# role -> (table, id column) the enrollment / course_professor foreign keys point at
+ROLE_TABLES = {"student": ("student", "student_id"), "professor": ("professor", "professor_id")}
+
+
+def email_map(conn, role):
+    """email -> user_id for users that have a row in the role's table."""
+    table, column = ROLE_TABLES[role]
+    with conn.cursor(pymysql.cursors.SSCursor) as cur:
+        cur.execute(f"SELECT u.email, u.user_id FROM users u JOIN {table} r ON r.{column}=u.user_id")
+        return {e: uid for e, uid in cur}
+
+
+def course_map(conn):
+    with conn.cursor(pymysql.cursors.SSCursor) as cur:
+        cur.execute("SELECT course_key, course_id FROM course")
+        return {k: cid for k, cid in cur}
+
+
+def _resolve_user(value, by_email, ids):
+    if "@" in value:
+        return by_email.get(value.lower())
+    if value.isdigit() and int(value) in ids:
+        return int(value)
+    return None
+
+
+# ======================= entities =======================
+def load_users(loader, path, rejects):
+    bad = [0]
+
+    def rows():
+        for rec in read_records(path):
+            name = cap(_get(rec, "user_name", "name"))
+            email = _get(rec, "email").lower()
+            role = _get(rec, "role").lower()
+            if not name or "@" not in email or role not in ("student", "professor"):
+                bad[0] += 1
+                rejects.append(("users", rec, "need user_name, email and role student|professor"))
+                continue
+            yield (name, _get(rec, "password", default="changeme"), email, role, _get(rec, "mobile_no", "mobile"))
+
+    # email is UNIQUE: existing accounts are skipped, not overwritten
+    last = _max_id(loader.conn, "users", "user_id")
+    sent = loader.write("users", ["user_name", "password", "email", "role", "mobile_no"], rows(), ignore=True)
+    log_new_rows(loader.conn, "user", "users", "user_id", last)
+    return sent, bad[0]
+
+
+def load_role_rows(loader, path=None):
+    """student/professor rows for every user that has none yet (set-based anti-join)."""
+    missing = ("FROM users u LEFT JOIN professor p ON p.professor_id=u.user_id "
+               "WHERE u.role='professor' AND p.professor_id IS NULL")
+    with loader.conn.cursor() as cur:
+        cur.execute(
+            "INSERT IGNORE INTO student(student_id) "
+            "SELECT u.user_id FROM users u LEFT JOIN student s ON s.student_id=u.user_id "
+            "WHERE u.role='student' AND s.student_id IS NULL"
+        )
+        students = cur.rowcount
+        cur.execute(f"SELECT u.user_id {missing}")
+        new_profs = [r[0] for r in cur.fetchall()]
+        cur.execute(f"INSERT IGNORE INTO professor(professor_id, status) SELECT u.user_id, 'waiting' {missing}")
+        professors = cur.rowcount
+        for i in range(0, len(new_profs), BATCH):
+            _log_pairs(cur, ("professor", "insert"), [(pid, None) for pid in new_profs[i:i + BATCH]])
+
+    # optional status column for professors in the users file
+    if path:
+        by_email = email_map(loader.conn, "professor")
+        ok = ("waiting", "approved", "rejected")
+        with loader.conn.cursor() as cur:
+            by_status = {}
+            for rec in read_records(path):
+                st = _get(rec, "status").lower()
+                uid = by_email.get(_get(rec, "email").lower())
+                if uid and st in ok:
+                    by_status.setdefault(st, []).append(uid)
+            for st, ids in by_status.items():
+                for i in range(0, len(ids), BATCH):
+                    part = ids[i:i + BATCH]
+                    marks = ",".join(["%s"] * len(part))
+                    loader.conn.begin()
+                    cur.execute(f"UPDATE professor SET status=%s WHERE professor_id IN ({marks})", (st, *part))
+                    cur.execute(
+                        "INSERT INTO change_log(entity, entity_id, op) "
+                        f"SELECT 'professor', professor_id, 'update' FROM professor WHERE professor_id IN ({marks})",
+                        tuple(part)
+                    )
+                    loader.conn.commit()
+    loader.log(f"   role rows: +{students} student, +{professors} professor")
+
+
+def load_courses(loader, path, rejects):
+    bad = [0]
+
+    def rows():
+        for rec in read_records(path):
+            name = cap(_get(rec, "course_name", "course", "name"))
+            if not name or not any(ch.isalpha() for ch in name):
+                bad[0] += 1
+                rejects.append(("course", rec, "need course_name with a letter"))
+                continue
+            yield (name, _get(rec, "course_fees", "fees", default="0"), _get(rec, "course_duration", "duration", default="NA"))
+
+    # uq_course_key: existing courses are skipped
+    last = _max_id(loader.conn, "course", "course_id")
+    sent = loader.write("course", ["course_name", "course_fees", "course_duration"], rows(), ignore=True)
+    log_new_rows(loader.conn, "course", "course", "course_id", last)
+    return sent, bad[0]
+
+
+def _pairs(loader, path, rejects, table, role, person_keys):
+    by_email = email_map(loader.conn, role)
+    ids = set(by_email.values())
+    courses = course_map(loader.conn)
+    seen = set()
+    bad = [0]
+
+    def rows():
+        for rec in read_records(path):
+            uid = _resolve_user(_get(rec, *person_keys), by_email, ids)
+            cid = courses.get(cap(_get(rec, "course", "course_name")).lower())
+            if uid is None or cid is None:
+                bad[0] += 1
+                rejects.append((table, rec, f"unknown {role}" if uid is None else "unknown course"))
+                continue
+            if (cid, uid) in seen:
+                continue
+            seen.add((cid, uid))
+            yield cid, uid, rec
+
+    return rows, bad
+
+
+def _without_fk_checks(conn, fn, *args, **kwargs):
+    # only for rows whose parent ids were all read from the parent tables (see _pairs)
+    with conn.cursor() as cur:
+        cur.execute("SET SESSION foreign_key_checks=0")
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("SET SESSION foreign_key_checks=1")
+
+
+def load_assignments(loader, path, rejects):
+    rows, bad = _pairs(loader, path, rejects, "course_professor", "professor", ("professor", "professor_id", "email"))
+    sent = _without_fk_checks(
+        loader.conn, loader.write,
+        "course_professor", ["course_id", "professor_id", "status"],
+        ((cid, uid, "active") for cid, uid, _ in rows()),
+        upsert="status=VALUES(status)" if loader.method == "insert" else None,
+        ignore=loader.method != "insert",
+        log=("course_professor", "update"),
+    )
+    return sent, bad[0]
+
+
+def load_enrollments(loader, path, rejects):
+    rows, bad = _pairs(loader, path, rejects, "enrollment", "student", ("student", "student_id", "email"))
+    ok = ("enrolled", "completed", "dropped")
+
+    def status(rec):
+        st = _get(rec, "status", default="enrolled").lower()
+        return st if st in ok else "enrolled"
+
+    sent = _without_fk_checks(
+        loader.conn, loader.write,
+        "enrollment", ["course_id", "student_id", "status"],
+        ((cid, uid, status(rec)) for cid, uid, rec in rows()),
+        upsert="status=VALUES(status)" if loader.method == "insert" else None,
+        ignore=loader.method != "insert",
+        log=("enrollment", "update"),
+    )
+    return sent, bad[0]
+
+
+# ======================= index maintenance =======================
+def drop_secondary_indexes(conn, table, log=print):
+    dropped = []
+    with conn.cursor() as cur:
+        for name, cols in SECONDARY_INDEXES.get(table, []):
+            cur.execute(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema=DATABASE() AND table_name=%s AND index_name=%s LIMIT 1",
+                (table, name)
+            )
+            if cur.fetchone():
+                cur.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+                dropped.append((name, cols))
+                log(f"   dropped {table}.{name} for the load")
+    return dropped
+
+
+def rebuild_secondary_indexes(conn, table, dropped, log=print):
+    with conn.cursor() as cur:
+        for name, cols in dropped:
+            start = time.perf_counter()
+            cur.execute(f"ALTER TABLE {table} ADD INDEX {name} ({cols}), ALGORITHM=INPLACE, LOCK=NONE")
+            log(f"   rebuilt {table}.{name} in {time.perf_counter() - start:.1f}s")
+
+
+# ======================= main =======================
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bulk-load users, courses, assignments and enrollments.")
+    ap.add_argument("--users")
+    ap.add_argument("--courses")
+    ap.add_argument("--assignments", help="professor -> course")
+    ap.add_argument("--enrollments", help="student -> course")
+    ap.add_argument("--method", choices=["insert", "load-data"], default="insert")
+    ap.add_argument("--rebuild-indexes", action="store_true",
+                    help="drop non-unique secondary indexes during the load and rebuild them after")
+    ap.add_argument("--rejects", help="write rejected input rows to this JSON Lines file")
+    ap.add_argument("--database", default=None)
+    args = ap.parse_args(argv)
+
+    if not any([args.users, args.courses, args.assignments, args.enrollments]):
+        ap.error("nothing to load")
+
+    overrides = {"local_infile": True} if args.method == "load-data" else {}
+    if args.database:
+        overrides["database"] = args.database
+    conn = connect(**overrides)
+    loader = Loader(conn, method=args.method)
+    rejects = []
+    start = time.perf_counter()
+
+    try:
+        if args.users:
+            dropped = drop_secondary_indexes(conn, "users") if args.rebuild_indexes else []
+            try:
+                loader.timed("users", load_users, loader, args.users, rejects)
+            finally:
+                rebuild_secondary_indexes(conn, "users", dropped)
+            load_role_rows(loader, args.users)
+        if args.courses:
+            loader.timed("course", load_courses, loader, args.courses, rejects)
+        if args.assignments:
+            loader.timed("course_professor", load_assignments, loader, args.assignments, rejects)
+        if args.enrollments:
+            loader.timed("enrollment", load_enrollments, loader, args.enrollments, rejects)
+    except pymysql.err.OperationalError as e:
+        if args.method == "load-data" and e.args and e.args[0] in (1148, 3948, 2068):
+            print("❌ LOAD DATA LOCAL is disabled on the server (local_infile=OFF); use --method insert.")
+            return 1
+        raise
+    finally:
+        conn.close()
+
+    if args.rejects and rejects:
+        with open(args.rejects, "w", encoding="utf-8") as f:
+            for table, rec, reason in rejects:
+                f.write(json.dumps({"table": table, "reason": reason, "row": rec}) + "\n")
+
+    total = sum(r["read"] for r in loader.report.values())
+    secs = time.perf_counter() - start
+    print(f"✅ {total} input rows in {secs:.1f}s ({total / secs if secs else 0:.0f} rows/s), {len(rejects)} rejected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,269 @@
 from os import name
-from db import DB
+from db import get_shared_db
+from cache import LRUCache, MISSING
+import csv
+import datetime
+import pymysql
 import re
+import threading
+import time
+
+# course name -> course_id cache
+COURSE_CACHE_SIZE = 5000
+# how often (seconds) the caches read the change feed for other clients' writes
+COURSE_CACHE_CHECK_SECS = 5.0
+# rows per multi-row INSERT / IN (...) list in bulk operations
+BULK_BATCH_SIZE = 500
+# CSV rows validated + written per transaction by import_grades_csv
+GRADE_IMPORT_BATCH = 2000
+GRADE_MAX_LEN = 20  # grades.grade VARCHAR(20)
+# default page size for type-ahead search
+SEARCH_LIMIT = 50
+SEARCH_MAX_LIMIT = 500
+# per-user views (my courses, my grade, user lists); TTL bounds staleness from other clients
+VIEW_CACHE_SIZE = 10000
+VIEW_CACHE_TTL = 30.0
+# change feed: a change_log seq gap younger than this may still be an open transaction
+CHANGE_OVERLAP_SECS = 5.0
+# change feed (changes_since): rows per call, how long change_log rows are kept,
+# how often the cache sync purges older ones, and rows per purge DELETE
+CHANGE_LOG_LIMIT = 500
+CHANGE_LOG_MAX_LIMIT = 5000
+CHANGE_LOG_KEEP_DAYS = 7
+CHANGE_LOG_PURGE_SECS = 3600.0
+CHANGE_LOG_PURGE_BATCH = 5000
+
+
+def chunks(seq, size=BULK_BATCH_SIZE):
+    seq = list(seq)
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def placeholders(n, row="%s"):
+    return ",".join([row] * n)
+
+
+def write_csv(dest, header, rows):
+    """Write rows (any iterable, e.g. a DB.stream) to a path or open file. Returns row count."""
+    f = open(dest, "w", newline="", encoding="utf-8") if isinstance(dest, str) else dest
+    try:
+        w = csv.writer(f)
+        w.writerow(header)
+        n = 0
+        for row in rows:
+            w.writerow(row)
+            n += 1
+        return n
+    finally:
+        if f is not dest:
+            f.close()
+
+
+def like_prefix(text):
+    """'ab_c' -> 'ab\\_c%' : LIKE pattern that matches a literal prefix (index range scan)."""
+    text = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return text + "%"
 
 
 def cap(text: str) -> str:
     return (text or "").strip().title()
 
 
+def _stamp(value):
+    """
+    DB timestamp (datetime, or text from SQLite) -> 'YYYY-MM-DD HH:MM:SS.fff'.
+    Milliseconds, like SQLite's text stamps, so they compare as text too.
+    """
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    return value.isoformat(" ", "milliseconds")
+
+
+def _stamp_minus(stamp, seconds):
+    return _stamp(datetime.datetime.fromisoformat(stamp) - datetime.timedelta(seconds=seconds))
+
+
+def _uid(value):
+    # ids arrive as int from the panels and as str from entries / JSON
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
 class CourseService:
-    def __init__(self):
-        self.db = DB()
+    def __init__(self, db=None):
+        # all services in a process share one connection pool unless a DB is passed in
+        self.db = db or get_shared_db()
+
+        self._course_ids = LRUCache(maxsize=COURSE_CACHE_SIZE)
+        self._course_lock = threading.Lock()
+        self._course_version = None      # (COUNT(*), MAX(course_id)) when the cache was filled
+        self._course_checked_at = 0.0
+        self._course_cache_complete = False  # True when every course fits in the cache
+
+        self._views = LRUCache(maxsize=VIEW_CACHE_SIZE, ttl=VIEW_CACHE_TTL)
+        self._views_gen = 0  # bumped by every invalidation, see _cached()
+        self._views_lock = threading.Lock()
+
+        self._sync_lock = threading.Lock()
+        self._synced_seq = None          # changes_since() cursor of the caches
+        self._synced_at = 0.0
+        self._log_purged_at = 0.0
 
     # ----------------- helpers -----------------
+    def _course_key(self, course_name: str):
+        # same normalization as the course.course_key generated column
+        return cap(course_name).lower()
+
+    def _invalidate_course_cache(self):
+        with self._course_lock:
+            self._course_ids.clear()
+            self._course_version = None
+            self._course_checked_at = 0.0
+            self._course_cache_complete = False
+
+    def _refresh_course_cache(self):
+        """
+        Warm the cache on first use and drop it when a course was added or deleted.
+        _sync_caches() sees what was logged in change_log; courses written around
+        CourseService (datagen, manual SQL) are caught by a cheap version stamp: adding a
+        course bumps MAX(course_id), deleting one drops COUNT(*). Checked at most every
+        COURSE_CACHE_CHECK_SECS.
+        """
+        self._sync_caches()
+        now = time.monotonic()
+        with self._course_lock:
+            if self._course_version is not None and now - self._course_checked_at < COURSE_CACHE_CHECK_SECS:
+                return
+            self._course_checked_at = now
+
+            row = self.db.run("SELECT COUNT(*), MAX(course_id) FROM course", fetchone=True)
+            version = tuple(row) if row else (0, None)
+            if version == self._course_version:
+                return
+
+            self._course_ids.clear()
+            rows = self.db.run(
+                "SELECT course_id, course_key FROM course ORDER BY course_id LIMIT %s",
+                (COURSE_CACHE_SIZE,),
+                fetch=True
+            ) or []
+            for cid, ckey in rows:
+                self._course_ids.set(ckey, cid)
+            self._course_version = version
+            self._course_cache_complete = version[0] <= COURSE_CACHE_SIZE
+
     def _get_course_id(self, course_name: str):
-        course_name = cap(course_name)
+        key = self._course_key(course_name)
+
+        self._refresh_course_cache()
+        cid = self._course_ids.get(key)
+        if cid is not MISSING:
+            return cid
+        if self._course_cache_complete:
+            # whole table is cached, so a miss means the course does not exist
+            return None
+
         row = self.db.run(
-            "SELECT course_id FROM course WHERE LOWER(course_name)=LOWER(%s)",
-            (course_name,),
+            "SELECT course_id FROM course WHERE course_key=%s",
+            (key,),
             fetchone=True
         )
-        return row[0] if row else None
+        if not row:
+            return None
+        self._course_ids.set(key, row[0])
+        return row[0]
+
+    def course_cache_stats(self):
+        return self._course_ids.stats()
+
+    # ----------------- per-user view cache -----------------
+    def _cached(self, key, load):
+        """
+        Read-through: return the cached value for key or load() and cache it.
+        A value loaded while a write invalidated something is not stored (it may be stale).
+        """
+        self._sync_caches()
+        value = self._views.get(key)
+        if value is not MISSING:
+            return value
+        gen = self._views_gen
+        value = load()
+        with self._views_lock:
+            if gen == self._views_gen:
+                self._views.set(key, value)
+        return value
+
+    def _invalidate_views(self, *keys):
+        with self._views_lock:
+            self._views_gen += 1
+            for key in keys:
+                self._views.pop(key)
+
+    def _invalidate_all_views(self):
+        with self._views_lock:
+            self._views_gen += 1
+            self._views.clear()
+
+    def view_cache_stats(self):
+        return self._views.stats()
+
+    def _sync_caches(self):
+        """
+        Drop what other clients' writes made stale (other processes, the API server): the
+        change feed is read at most every COURSE_CACHE_CHECK_SECS, by one thread at a time.
+        The view TTL stays as a backstop for writes that bypass change_log (the course-id
+        cache has its own version check, see _refresh_course_cache). Every
+        CHANGE_LOG_PURGE_SECS the sync also purges old change_log rows, outside any write.
+        """
+        if time.monotonic() - self._synced_at < COURSE_CACHE_CHECK_SECS:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return  # another thread is syncing, go on with the current entries
+        try:
+            self._synced_at = time.monotonic()
+            courses = everything = False
+            keys = set()
+            while True:
+                feed = self.changes_since(self._synced_seq, CHANGE_LOG_MAX_LIMIT)
+                self._synced_seq = feed["seq"]
+                if feed["full"]:
+                    courses = everything = True
+                for _, entity, key, op in feed["changes"]:
+                    if entity == "course":
+                        courses = True
+                        everything = everything or op == "delete"  # cascades to everything under it
+                    elif entity in ("user", "professor"):
+                        keys.update(("users", role, approved)
+                                    for role in ("student", "professor") for approved in (True, False))
+                    elif entity == "course_professor":
+                        keys.add(("professor_courses", key[1]))
+                    elif entity == "enrollment":
+                        keys.update((("student_courses", key[1]), ("dashboard", key[1])))
+                    elif entity == "grade":
+                        keys.update((("grade", key[1], key[0]), ("dashboard", key[1])))
+                if not feed["more"]:
+                    break
+            if time.monotonic() - self._log_purged_at > CHANGE_LOG_PURGE_SECS and not self.db.in_transaction():
+                self._log_purged_at = time.monotonic()
+                self.purge_change_log()
+        finally:
+            self._sync_lock.release()
+
+        if courses:
+            self._invalidate_course_cache()
+        if everything:
+            self._invalidate_all_views()
+        elif keys:
+            self._invalidate_views(*keys)
 
     def _get_user_by_email(self, email: str):
         email = (email or "").strip().lower()
         return self.db.run(
             "SELECT user_id, user_name, password, role, email, mobile_no "
-            "FROM users WHERE LOWER(email)=LOWER(%s)",
+            "FROM users WHERE email=%s",
             (email,),
             fetchone=True
         )
@@ -88,29 +326,101 @@ class CourseService:
     # ----------------- dropdown data -----------------
     def get_users_by_role(self, role: str, only_approved_professors: bool = True):
         """
-        Returns list[(user_id, user_name, email)]
+        Returns list[(user_id, user_name, email)] (cached, see VIEW_CACHE_TTL)
+        """
+        role = (role or "").strip().lower()
+        approved = bool(only_approved_professors) and role == "professor"
+        rows = self._cached(
+            ("users", role, approved),
+            lambda: tuple(self.iter_users_by_role(role, approved))
+        )
+        return list(rows)
+
+    def iter_users_by_role(self, role: str, only_approved_professors: bool = True):
+        """
+        Streams (user_id, user_name, email) rows, ordered by name.
         """
         role = (role or "").strip().lower()
 
         if role == "professor" and only_approved_professors:
-            rows = self.db.run(
+            return self.db.stream(
                 "SELECT u.user_id, u.user_name, u.email "
                 "FROM users u "
                 "JOIN professor p ON p.professor_id = u.user_id "
                 "WHERE u.role='professor' AND p.status='approved' "
-                "ORDER BY u.user_name",
-                fetch=True
+                "ORDER BY u.user_name"
             )
-            return rows or []
 
-        rows = self.db.run(
+        return self.db.stream(
             "SELECT user_id, user_name, email "
             "FROM users WHERE role=%s "
             "ORDER BY user_name",
-            (role,),
-            fetch=True
+            (role,)
         )
-        return rows or []
+
+    def export_users_csv(self, role, dest, only_approved_professors: bool = True):
+        """
+        Write every user of `role` to a CSV (path or open file) without loading them all.
+        Returns number of rows written.
+        """
+        return write_csv(
+            dest,
+            ["user_id", "user_name", "email"],
+            self.iter_users_by_role(role, only_approved_professors)
+        )
+
+    # ----------------- type-ahead search -----------------
+    def search_courses(self, prefix="", limit=SEARCH_LIMIT, after=None):
+        """
+        Courses whose name starts with `prefix` (case-insensitive), ordered by name.
+        Page with after=<last course_name of the previous page>.
+        Returns list[(course_id, course_name)]
+        """
+        prefix = (prefix or "").strip().lower()
+        limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+
+        sql = "SELECT course_id, course_name FROM course WHERE course_key LIKE %s"
+        params = [like_prefix(prefix)]
+        if after is not None:
+            sql += " AND course_key > %s"
+            params.append(self._course_key(after))
+        sql += " ORDER BY course_key LIMIT %s"
+        params.append(limit)
+
+        return list(self.db.run(sql, tuple(params), fetch=True) or [])
+
+    def search_users(self, role, prefix="", limit=SEARCH_LIMIT, after=None, only_approved_professors=True):
+        """
+        Users of `role` whose name starts with `prefix` (or whose email does, if prefix has '@').
+        Ordered by (user_name, user_id); page with after=<last row of the previous page>.
+        Returns list[(user_id, user_name, email)]
+        """
+        role = (role or "").strip().lower()
+        prefix = (prefix or "").strip()
+        limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+
+        sql = "SELECT u.user_id, u.user_name, u.email FROM users u "
+        if role == "professor" and only_approved_professors:
+            sql += "JOIN professor p ON p.professor_id = u.user_id AND p.status='approved' "
+        sql += "WHERE u.role=%s"
+        params = [role]
+
+        if "@" in prefix:
+            sql += " AND u.email LIKE %s"
+            params.append(like_prefix(prefix.lower()))
+        elif prefix:
+            sql += " AND u.user_name LIKE %s"
+            params.append(like_prefix(prefix))
+
+        if after is not None:
+            last_id, last_name = after[0], after[1]
+            sql += " AND (u.user_name > %s OR (u.user_name = %s AND u.user_id > %s))"
+            params += [last_name, last_name, last_id]
+
+        sql += " ORDER BY u.user_name, u.user_id LIMIT %s"
+        params.append(limit)
+
+        return list(self.db.run(sql, tuple(params), fetch=True) or [])
 
     # ----------------- AUTH -----------------
     def register_user(self, user_name, email, password, role, mobile_no=""):
@@ -142,31 +452,30 @@ class CourseService:
 
         mobile_no = (mobile_no or "").strip()
 
-        if self._get_user_by_email(email):
-            return False, "Email already registered."
-
-        ok = self.db.run(
-            "INSERT INTO users(user_name,password,email,role,mobile_no) VALUES(%s,%s,%s,%s,%s)",
-            (user_name, password, email, role, mobile_no)
-        )
-        if not ok:
-            return False, "DB error while creating user."
-
-        user = self._get_user_by_email(email)
-        if not user:
-            return False, "User created but cannot read back."
-
-        user_id = user[0]
-
-        if role == "admin":
-            self.db.run("INSERT IGNORE INTO admin(admin_id) VALUES(%s)", (user_id,))
-        elif role == "student":
-            self.db.run("INSERT IGNORE INTO student(student_id) VALUES(%s)", (user_id,))
-        elif role == "professor":
-            self.db.run(
-                "INSERT IGNORE INTO professor(professor_id, status) VALUES(%s,'waiting')",
-                (user_id,)
+        # one transaction: the UNIQUE(email) index is the duplicate check, lastrowid gives the id
+        role_sql = {
+            "admin": "INSERT IGNORE INTO admin(admin_id) VALUES(%s)",
+            "student": "INSERT IGNORE INTO student(student_id) VALUES(%s)",
+            "professor": "INSERT IGNORE INTO professor(professor_id, status) VALUES(%s,'waiting')",
+        }[role]
+        def create():
+            user_id = self.db.run(
+                "INSERT INTO users(user_name,password,email,role,mobile_no) VALUES(%s,%s,%s,%s,%s)",
+                (user_name, password, email, role, mobile_no),
+                lastrowid=True
             )
+            self.db.run(role_sql, (user_id,))
+            self._log_changes("user", "insert", [user_id])
+            if role == "professor":
+                self._log_changes("professor", "insert", [user_id])
+            return user_id
+
+        try:
+            user_id = self.db.atomic(create)
+        except pymysql.err.IntegrityError:
+            return False, "Email already registered."
+        # a new professor is 'waiting', so only the full professor list changes
+        self._invalidate_views(("users", role, False))
 
         return True, {"user_id": user_id, "user_name": user_name, "email": email, "role": role}
 
@@ -178,11 +487,18 @@ class CourseService:
         if not ok_e:
             return False, msg
 
-        row = self._get_user_by_email(email)
+        # user + professor status in one round trip
+        row = self.db.run(
+            "SELECT u.user_id, u.user_name, u.password, u.role, u.email, p.status "
+            "FROM users u LEFT JOIN professor p ON p.professor_id=u.user_id "
+            "WHERE u.email=%s",
+            (email,),
+            fetchone=True
+        )
         if not row:
             return False, "No account found for this email."
 
-        user_id, user_name, db_pass, db_role, db_email, db_mobile = row
+        user_id, user_name, db_pass, db_role, db_email, prof_status = row
 
         if db_role != role:
             return False, f"This email is registered as '{db_role}', not '{role}'."
@@ -191,52 +507,251 @@ class CourseService:
             return False, "Wrong password."
 
         if role == "professor":
-            pr = self.db.run(
-                "SELECT status FROM professor WHERE professor_id=%s",
-                (user_id,),
-                fetchone=True
-            )
-            status = pr[0] if pr else "waiting"
+            status = prof_status or "waiting"
             if status != "approved":
                 return False, f"Professor account is '{status}'. Ask admin to approve."
 
         return True, {"user_id": user_id, "user_name": user_name, "email": db_email, "role": db_role}
 
     # ----------------- Admin: professor approvals -----------------
-    def get_professors_by_status(self, status="waiting"):
-        rows = self.db.run(
+    def get_professors_by_status(self, status="waiting", after=None, limit=None, offset=None):
+        """
+        (user_id, user_name, email, status) rows ordered by (user_name, user_id).
+        Page with limit= and after=<last row of the previous page>; without limit, every row.
+        offset= (with limit) skips that many rows, at O(offset): for jumping into the middle
+        of the list once, then paging on with after=.
+        """
+        sql = (
             "SELECT u.user_id, u.user_name, u.email, p.status "
             "FROM professor p JOIN users u ON u.user_id=p.professor_id "
-            "WHERE p.status=%s ORDER BY u.user_name",
-            (status,),
-            fetch=True
+            "WHERE p.status=%s"
         )
+        params = [status]
+        if after is not None:
+            last_id, last_name = after[0], after[1]
+            sql += " AND (u.user_name > %s OR (u.user_name = %s AND u.user_id > %s))"
+            params += [last_name, last_name, last_id]
+        sql += " ORDER BY u.user_name, u.user_id"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(max(1, int(limit)))
+            if offset:
+                sql += " OFFSET %s"
+                params.append(max(0, int(offset)))
+
+        rows = self.db.run(sql, tuple(params), fetch=True)
         return rows or []
 
+    def count_professors_by_status(self, status="waiting"):
+        return self.db.run("SELECT COUNT(*) FROM professor WHERE status=%s", (status,), fetchone=True)[0]
+
     def set_professor_account_status(self, professor_id, status):
         if status not in ("approved", "rejected", "waiting"):
             return False
-        return self.db.run(
-            "UPDATE professor SET status=%s WHERE professor_id=%s",
-            (status, professor_id)
-        )
+        def work():
+            ok = self.db.run(
+                "UPDATE professor SET status=%s WHERE professor_id=%s",
+                (status, professor_id)
+            )
+            self._log_professors([professor_id])
+            return ok
+
+        ok = self.db.atomic(work)
+        self._invalidate_views(("users", "professor", True))
+        return ok
+
+    def set_professor_account_status_bulk(self, professor_ids, status):
+        """
+        Set the same status on many professors: one UPDATE ... IN (...) per
+        BULK_BATCH_SIZE ids, all in one transaction.
+        """
+        if status not in ("approved", "rejected", "waiting"):
+            return False
+        ids = list(dict.fromkeys(int(pid) for pid in professor_ids))
+        if not ids:
+            return True
+
+        def work():
+            for part in chunks(ids):
+                self.db.run(
+                    f"UPDATE professor SET status=%s WHERE professor_id IN ({placeholders(len(part))})",
+                    (status, *part)
+                )
+            self._log_professors(ids)
+
+        self.db.atomic(work)
+        self._invalidate_views(("users", "professor", True))
+        return True
+
+    def _log_professors(self, ids):
+        # only ids that are professors; caller owns the transaction
+        for part in chunks(ids):
+            self.db.run(
+                "INSERT INTO change_log(entity, entity_id, op) "
+                "SELECT 'professor', professor_id, 'update' FROM professor "
+                f"WHERE professor_id IN ({placeholders(len(part))})",
+                tuple(part)
+            )
 
     # ==================== COURSE OPS ====================
     def add_course(self, name):
         name = cap(name)
-        return self.db.run(
-            "INSERT INTO course(course_name, course_fees, course_duration) VALUES(%s, %s, %s)",
-            (name, 0.00, "NA")
-        )
+
+        def work():
+            cid = self.db.run(
+                "INSERT INTO course(course_name, course_fees, course_duration) VALUES(%s, %s, %s)",
+                (name, 0.00, "NA"),
+                lastrowid=True
+            )
+            self._log_changes("course", "insert", [cid])
+
+        try:
+            self.db.atomic(work)
+        except pymysql.err.IntegrityError:
+            return False  # uq_course_key: course already exists
+        self._invalidate_course_cache()
+        return True
 
     def delete_course(self, name):
         cid = self._get_course_id(name)
         if not cid:
             return False
-        return self.db.run("DELETE FROM course WHERE course_id=%s", (cid,))
+        def work():
+            ok = self.db.run("DELETE FROM course WHERE course_id=%s", (cid,))
+            self._log_changes("course", "delete", [cid])
+            return ok
+
+        ok = self.db.atomic(work)
+        self._invalidate_course_cache()
+        self._invalidate_all_views()  # enrollments, assignments and grades cascade
+        return ok
+
+    def show_courses(self, after=None, limit=None, offset=None):
+        """
+        (course_name,) rows. With after= / limit=: ordered by name, starting after the course
+        named `after`, a range scan on the course_key index so a deep page costs the same as
+        the first. offset= (with limit) skips that many rows instead, at O(offset), for a
+        one-off jump. Without them every course, unordered.
+        """
+        if after is None and limit is None:
+            return self.db.run("SELECT course_name FROM course", fetch=True)
+
+        sql = "SELECT course_name FROM course"
+        params = []
+        if after is not None:
+            sql += " WHERE course_key > %s"
+            params.append(self._course_key(after))
+        sql += " ORDER BY course_key"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(max(1, int(limit)))
+            if offset:
+                sql += " OFFSET %s"
+                params.append(max(0, int(offset)))
+        return list(self.db.run(sql, tuple(params), fetch=True) or [])
+
+    def count_courses(self):
+        return self.db.run("SELECT COUNT(*) FROM course", fetchone=True)[0]
+
+    # ----------------- change feed -----------------
+    def _db_now(self):
+        return _stamp(self.db.run("SELECT CURRENT_TIMESTAMP(6)", fetchone=True)[0])
+
+    def _log_changes(self, entity, op, keys):
+        """
+        Record writes for changes_since(). Call inside the transaction that makes them,
+        after the data writes, so the log rows commit or roll back with the change.
+        keys: ids, or (id, ref_id) pairs for link rows.
+        """
+        rows = [(entity, *k, op) if isinstance(k, tuple) else (entity, k, None, op) for k in keys]
+        for part in chunks(rows):
+            self.db.run(
+                "INSERT INTO change_log(entity, entity_id, ref_id, op) "
+                f"VALUES {placeholders(len(part), '(%s,%s,%s,%s)')}",
+                tuple(v for r in part for v in r)
+            )
+
+    def purge_change_log(self, keep_days=CHANGE_LOG_KEEP_DAYS, batch=CHANGE_LOG_PURGE_BATCH):
+        """
+        Delete change_log rows older than keep_days, `batch` seqs per DELETE (each its own
+        short transaction, a primary-key range). Returns the number of rows deleted.
+        Called from the cache sync every CHANGE_LOG_PURGE_SECS; never inside a write.
+        """
+        cutoff = _stamp_minus(self._db_now(), keep_days * 86400)
+        row = self.db.run(
+            "SELECT seq FROM change_log WHERE changed_at < %s ORDER BY changed_at DESC LIMIT 1",
+            (cutoff,),
+            fetchone=True
+        )
+        if not row:
+            return 0
+        last = row[0]
+        oldest, count = self.db.run(
+            "SELECT MIN(seq), COUNT(*) FROM change_log WHERE seq <= %s AND changed_at < %s",
+            (last, cutoff),
+            fetchone=True
+        )
+        batch = max(1, int(batch))
+        for lo in range(oldest - 1, last, batch):
+            self.db.run(
+                "DELETE FROM change_log WHERE seq > %s AND seq <= %s AND changed_at < %s",
+                (lo, min(lo + batch, last), cutoff)
+            )
+        return count
+
+    def changes_since(self, seq=None, limit=CHANGE_LOG_LIMIT):
+        """
+        Change feed for panels, caches and external consumers: writes logged after `seq`
+        (the "seq" of the previous call), oldest first, from a range scan on the
+        change_log primary key. Returns
+            {"seq": cursor for the next call, "full": bool, "more": bool,
+             "changes": [(seq, entity, key, op)]}
+        entity / key: "user", "professor" -> user_id; "course" -> course_id;
+        "course_professor" -> (course_id, professor_id); "enrollment", "grade" ->
+        (course_id, student_id); "professor_request" -> request id.
+        op is 'insert', 'update' or 'delete'; deleting a course also removes its
+        assignments, enrollments and grades, which are not logged one by one.
+
+        full=True (seq=None, or the log no longer reaches back to seq): reload what you
+        keep, then continue from the returned seq. more=True: call again right away.
+        """
+        limit = max(1, min(int(limit), CHANGE_LOG_MAX_LIMIT))
+        oldest, newest = self.db.run("SELECT MIN(seq), MAX(seq) FROM change_log", fetchone=True)
+        if seq is not None:
+            seq = int(seq)
+            if (oldest - 1 <= seq <= newest) if newest is not None else seq == 0:
+                return self._changes_after(seq, limit)
+
+        # cursor for a full reload: the newest row old enough that no transaction with a
+        # smaller seq can still be open (see _changes_after); replaying a little is harmless
+        row = self.db.run(
+            "SELECT seq FROM change_log WHERE changed_at < %s ORDER BY changed_at DESC LIMIT 1",
+            (_stamp_minus(self._db_now(), CHANGE_OVERLAP_SECS),),
+            fetchone=True
+        )
+        start = row[0] if row else (oldest or 1) - 1
+        return {"seq": start, "full": True, "more": False, "changes": []}
 
-    def show_courses(self):
-        return self.db.run("SELECT course_name FROM course", fetch=True)
+    def _changes_after(self, seq, limit):
+        rows = self.db.run(
+            "SELECT seq, entity, entity_id, ref_id, op, changed_at FROM change_log "
+            "WHERE seq > %s ORDER BY seq LIMIT %s",
+            (seq, limit + 1),
+            fetch=True
+        ) or []
+        changes = []
+        recent = None
+        for s, entity, entity_id, ref_id, op, changed_at in rows[:limit]:
+            if s != seq + 1:
+                # a missing seq is a rollback, or a transaction that has not committed yet:
+                # wait for it while the row after the gap is recent
+                recent = recent or _stamp_minus(self._db_now(), CHANGE_OVERLAP_SECS)
+                if _stamp(changed_at) >= recent:
+                    return {"seq": seq, "full": False, "more": False, "changes": changes}
+            key = entity_id if ref_id is None else (entity_id, ref_id)
+            changes.append((s, entity, key, op))
+            seq = s
+        return {"seq": seq, "full": False, "more": len(rows) > limit, "changes": changes}
 
     # ==================== PROFESSOR OPS ====================
     def assign_professor_to_course_by_id(self, professor_id, course_name):
@@ -244,23 +759,57 @@ class CourseService:
         if not cid:
             return False
 
-        self.db.run("INSERT IGNORE INTO professor(professor_id) VALUES(%s)", (professor_id,))
+        def work():
+            self.db.run("INSERT IGNORE INTO professor(professor_id) VALUES(%s)", (professor_id,))
+            ok = self.db.run(
+                "INSERT INTO course_professor(course_id, professor_id, status) VALUES(%s,%s,'active') "
+                "ON DUPLICATE KEY UPDATE status='active'",
+                (cid, professor_id)
+            )
+            self._log_changes("course_professor", "update", [(cid, _uid(professor_id))])
+            return ok
 
-        return self.db.run(
-            "INSERT INTO course_professor(course_id, professor_id, status) VALUES(%s,%s,'active') "
-            "ON DUPLICATE KEY UPDATE status='active'",
-            (cid, professor_id)
-        )
+        ok = self.db.atomic(work)
+        self._invalidate_views(("professor_courses", _uid(professor_id)))
+        return ok
 
     def view_professor_courses_by_id(self, professor_id):
-        return self.db.run(
-            "SELECT c.course_name "
+        return self._cached(
+            ("professor_courses", _uid(professor_id)),
+            lambda: self.db.run(
+                "SELECT c.course_name "
+                "FROM course_professor cp "
+                "JOIN course c ON c.course_id = cp.course_id "
+                "WHERE cp.professor_id=%s AND cp.status='active'",
+                (professor_id,),
+                fetch=True
+            )
+        )
+
+    def get_professor_roster(self, professor_id):
+        """
+        All active courses of a professor with their enrolled students, in one streamed query.
+        Returns list[(course_id, course_name, [(user_id, user_name, email, grade or None), ...])],
+        courses by name; a course with nobody enrolled has an empty list.
+        """
+        roster = []
+        rows = self.db.stream(
+            "SELECT c.course_id, c.course_name, u.user_id, u.user_name, u.email, g.grade "
             "FROM course_professor cp "
             "JOIN course c ON c.course_id = cp.course_id "
-            "WHERE cp.professor_id=%s AND cp.status='active'",
-            (professor_id,),
-            fetch=True
+            "LEFT JOIN enrollment e ON e.course_id = cp.course_id AND e.status='enrolled' "
+            "LEFT JOIN users u ON u.user_id = e.student_id "
+            "LEFT JOIN grades g ON g.course_id = e.course_id AND g.student_id = e.student_id "
+            "WHERE cp.professor_id=%s AND cp.status='active' "
+            "ORDER BY c.course_name, c.course_id, u.user_name, u.user_id",
+            (professor_id,)
         )
+        for cid, cname, uid, uname, email, grade in rows:
+            if not roster or roster[-1][0] != cid:
+                roster.append((cid, cname, []))
+            if uid is not None:
+                roster[-1][2].append((uid, uname, email, grade))
+        return roster
 
     # ==================== ENROLLMENT OPS ====================
     def enroll_student_by_id(self, student_id, course_name):
@@ -268,68 +817,525 @@ class CourseService:
         if not cid:
             return False
 
-        self.db.run("INSERT IGNORE INTO student(student_id) VALUES(%s)", (student_id,))
+        def work():
+            self.db.run("INSERT IGNORE INTO student(student_id) VALUES(%s)", (student_id,))
+            ok = self.db.run(
+                "INSERT INTO enrollment(course_id, student_id, status) VALUES(%s,%s,'enrolled') "
+                "ON DUPLICATE KEY UPDATE status='enrolled'",
+                (cid, student_id)
+            )
+            self._log_changes("enrollment", "update", [(cid, _uid(student_id))])
+            return ok
 
-        return self.db.run(
-            "INSERT INTO enrollment(course_id, student_id, status) VALUES(%s,%s,'enrolled') "
-            "ON DUPLICATE KEY UPDATE status='enrolled'",
-            (cid, student_id)
-        )
+        ok = self.db.atomic(work)
+        self._invalidate_views(("student_courses", _uid(student_id)), ("dashboard", _uid(student_id)))
+        return ok
+
+    def enroll_students_bulk(self, course_name, student_ids):
+        """
+        Enroll many students in one course (one transaction).
+        Returns dict {student_id: outcome}, outcome is one of
+        'enrolled', 'already enrolled', 'no such user', 'not a student', 'course not found'.
+        """
+        ids = list(dict.fromkeys(int(s) for s in student_ids))
+        cid = self._get_course_id(course_name)
+        if not cid:
+            return {sid: "course not found" for sid in ids}
+
+        result = self._enroll_pairs([(sid, cid) for sid in ids])
+        return {sid: result[(sid, cid)] for sid in ids}
+
+    def enroll_students_bulk_many(self, pairs):
+        """
+        pairs: iterable of (student_id, course_name).
+        Every course name is resolved once, everything is written in one transaction.
+        Returns dict {(student_id, course_name): outcome} (see enroll_students_bulk).
+        """
+        pairs = list(dict.fromkeys((int(sid), course) for sid, course in pairs))
+        cids = {}
+        for _, course in pairs:
+            if course not in cids:
+                cids[course] = self._get_course_id(course)
+
+        id_pairs = [(sid, cids[course]) for sid, course in pairs if cids[course]]
+        result = self._enroll_pairs(id_pairs)
+
+        out = {}
+        for sid, course in pairs:
+            cid = cids[course]
+            out[(sid, course)] = result[(sid, cid)] if cid else "course not found"
+        return out
+
+    def _enroll_pairs(self, pairs):
+        """pairs: list of unique (student_id, course_id). Returns {pair: outcome}."""
+        outcome = {}
+        if not pairs:
+            return outcome
+
+        def work():
+            outcome.clear()  # re-run from scratch after a deadlock
+
+            # 1) which ids are real students
+            roles = {}
+            student_ids = list(dict.fromkeys(sid for sid, _ in pairs))
+            for part in chunks(student_ids):
+                rows = self.db.run(
+                    f"SELECT user_id, role FROM users WHERE user_id IN ({placeholders(len(part))})",
+                    tuple(part),
+                    fetch=True
+                ) or []
+                roles.update(rows)
+
+            # 2) who is already enrolled
+            candidates = []
+            for sid, cid in pairs:
+                if sid not in roles:
+                    outcome[(sid, cid)] = "no such user"
+                elif roles[sid] != "student":
+                    outcome[(sid, cid)] = "not a student"
+                else:
+                    candidates.append((sid, cid))
+
+            enrolled = self._enrolled_pairs(candidates)
+
+            todo = []
+            for pair in candidates:
+                if pair in enrolled:
+                    outcome[pair] = "already enrolled"
+                else:
+                    todo.append(pair)
+
+            # 3) multi-row writes
+            new_students = list(dict.fromkeys(sid for sid, _ in todo))
+            for part in chunks(new_students):
+                self.db.run(
+                    f"INSERT IGNORE INTO student(student_id) VALUES {placeholders(len(part), '(%s)')}",
+                    tuple(part)
+                )
+            for part in chunks(todo):
+                rows_sql = placeholders(len(part), "(%s,%s,'enrolled')")
+                self.db.run(
+                    "INSERT INTO enrollment(course_id, student_id, status) "
+                    f"VALUES {rows_sql} "
+                    "ON DUPLICATE KEY UPDATE status='enrolled'",
+                    tuple(v for sid, cid in part for v in (cid, sid))
+                )
+            self._log_changes("enrollment", "update", [(cid, sid) for sid, cid in todo])
+            return todo
+
+        todo = self.db.atomic(work)
+        self._invalidate_views(*{
+            (view, _uid(sid)) for sid, _ in todo for view in ("student_courses", "dashboard")
+        })
+
+        for pair in todo:
+            outcome[pair] = "enrolled"
+        return outcome
+
+    def _enrolled_pairs(self, pairs):
+        """pairs: iterable of (student_id, course_id). Returns the subset currently enrolled (set-based query)."""
+        enrolled = set()
+        for part in chunks(dict.fromkeys(pairs)):
+            rows = self.db.run(
+                "SELECT student_id, course_id FROM enrollment "
+                f"WHERE status='enrolled' AND (student_id, course_id) IN ({placeholders(len(part), '(%s,%s)')})",
+                tuple(v for pair in part for v in pair),
+                fetch=True
+            ) or []
+            enrolled.update((sid, cid) for sid, cid in rows)
+        return enrolled
 
     def view_student_courses_by_id(self, student_id):
-        return self.db.run(
-            "SELECT c.course_name "
-            "FROM enrollment e "
-            "JOIN course c ON c.course_id = e.course_id "
-            "WHERE e.student_id=%s AND e.status='enrolled'",
-            (student_id,),
-            fetch=True
+        return self._cached(
+            ("student_courses", _uid(student_id)),
+            lambda: self.db.run(
+                "SELECT c.course_name "
+                "FROM enrollment e "
+                "JOIN course c ON c.course_id = e.course_id "
+                "WHERE e.student_id=%s AND e.status='enrolled'",
+                (student_id,),
+                fetch=True
+            )
+        )
+
+    def get_student_dashboard(self, student_id):
+        """
+        Every enrollment of a student with its grade, in one joined query (cached).
+        Returns list[(course_name, status, grade or None, course_fees, course_duration)],
+        enrolled courses first.
+        """
+        return self._cached(
+            ("dashboard", _uid(student_id)),
+            lambda: self.db.run(
+                "SELECT c.course_name, e.status, g.grade, c.course_fees, c.course_duration "
+                "FROM enrollment e "
+                "JOIN course c ON c.course_id = e.course_id "
+                "LEFT JOIN grades g ON g.course_id = e.course_id AND g.student_id = e.student_id "
+                "WHERE e.student_id=%s "
+                "ORDER BY e.status='enrolled' DESC, c.course_name",
+                (student_id,),
+                fetch=True
+            )
         )
 
-    def view_enrolled_students(self, course_name):
+    def view_enrolled_students(self, course_name, professor_id=None):
+        return [(name,) for _, name, _ in self.iter_enrolled_students(course_name, professor_id)]
+
+    def _roster_course_id(self, course_name, professor_id=None):
+        # course_id, or None if there is no such course (or it is not this professor's)
         cid = self._get_course_id(course_name)
+        if cid and professor_id is not None and not self._teaches(professor_id, cid):
+            return None
+        return cid
+
+    def iter_enrolled_students(self, course_name, professor_id=None):
+        """
+        Streams (user_id, user_name, email) of students enrolled in the course.
+        If professor_id is given, only for a course that professor teaches.
+        """
+        cid = self._roster_course_id(course_name, professor_id)
         if not cid:
-            return []
-        return self.db.run(
-            "SELECT u.user_name "
+            return iter(())
+        return self.db.stream(
+            "SELECT u.user_id, u.user_name, u.email "
             "FROM enrollment e "
             "JOIN users u ON u.user_id = e.student_id "
             "WHERE e.course_id=%s AND e.status='enrolled'",
-            (cid,),
-            fetch=True
+            (cid,)
+        )
+
+    def export_enrolled_students_csv(self, course_name, dest, professor_id=None):
+        """
+        Write the course roster to a CSV (path or open file). Returns rows written,
+        None if no such course (or, with professor_id, not that professor's course).
+        """
+        if not self._roster_course_id(course_name, professor_id):
+            return None
+        return write_csv(
+            dest,
+            ["user_id", "user_name", "email"],
+            self.iter_enrolled_students(course_name)
         )
 
     # ==================== GRADES OPS ====================
-    def upload_student_grades_by_id(self, student_id, course_name, grade):
+    def upload_student_grades_by_id(self, student_id, course_name, grade, professor_id=None):
+        """If professor_id is given, only for a course that professor teaches."""
         cid = self._get_course_id(course_name)
         if not cid:
             return False
 
-        enrolled = self.db.run(
-            "SELECT 1 FROM enrollment WHERE course_id=%s AND student_id=%s AND status='enrolled'",
-            (cid, student_id),
-            fetchone=True
-        )
-        if not enrolled:
-            return False
+        # the share lock keeps the enrollment from being dropped between check and write
+        def work():
+            if professor_id is not None and not self._teaches(professor_id, cid):
+                return False
+            enrolled = self.db.run(
+                "SELECT 1 FROM enrollment WHERE course_id=%s AND student_id=%s AND status='enrolled' "
+                "LOCK IN SHARE MODE",
+                (cid, student_id),
+                fetchone=True
+            )
+            if not enrolled:
+                return False
 
-        return self.db.run(
-            "INSERT INTO grades(course_id, student_id, grade) VALUES(%s,%s,%s) "
-            "ON DUPLICATE KEY UPDATE grade=%s",
-            (cid, student_id, grade, grade)
-        )
+            ok = self.db.run(
+                "INSERT INTO grades(course_id, student_id, grade) VALUES(%s,%s,%s) "
+                "ON DUPLICATE KEY UPDATE grade=%s",
+                (cid, student_id, grade, grade)
+            )
+            self._log_changes("grade", "update", [(cid, _uid(student_id))])
+            return ok
+
+        ok = self.db.atomic(work)
+        if not ok:
+            return False
+        self._invalidate_views(("grade", _uid(student_id), cid), ("dashboard", _uid(student_id)))
+        return ok
 
     def view_student_grades_by_id(self, student_id, course_name):
         cid = self._get_course_id(course_name)
         if not cid:
             return None
 
-        row = self.db.run(
-            "SELECT grade FROM grades WHERE course_id=%s AND student_id=%s",
-            (cid, student_id),
+        def load():
+            row = self.db.run(
+                "SELECT grade FROM grades WHERE course_id=%s AND student_id=%s",
+                (cid, student_id),
+                fetchone=True
+            )
+            return row[0] if row else None
+
+        return self._cached(("grade", _uid(student_id), cid), load)
+
+    def import_grades_csv(self, source, professor_id=None, batch_size=GRADE_IMPORT_BATCH):
+        """
+        Stream a gradebook CSV: student (email or user id), course, grade.
+        A header row (student/email/student_id, course/course_name, grade) is optional.
+        If professor_id is given, only that professor's active courses are accepted.
+
+        Rows are validated and written batch by batch (one set-based enrollment check and
+        one executemany upsert per batch), so a 50k-row file never sits in memory at once.
+
+        Returns {"rows": n, "imported": n, "rejected": [(line_no, row, reason)], "seconds": t}
+        """
+        start = time.perf_counter()
+        report = {"rows": 0, "imported": 0, "rejected": [], "seconds": 0.0}
+
+        allowed = self._active_course_ids(professor_id) if professor_id is not None else None
+
+        f = open(source, newline="", encoding="utf-8-sig") if isinstance(source, str) else source
+        try:
+            reader = csv.reader(f)
+            cols = (0, 1, 2)
+            first = True
+            batch = []
+            for row in reader:
+                if not any(c.strip() for c in row):
+                    continue
+                if first:
+                    first = False
+                    header = self._grade_csv_header(row)
+                    if header:
+                        cols = header
+                        continue
+
+                report["rows"] += 1
+                batch.append((reader.line_num, row))
+                if len(batch) >= batch_size:
+                    self._import_grade_batch(batch, cols, allowed, report)
+                    batch = []
+            if batch:
+                self._import_grade_batch(batch, cols, allowed, report)
+        finally:
+            if f is not source:
+                f.close()
+
+        report["rejected"].sort(key=lambda r: r[0])
+        report["seconds"] = time.perf_counter() - start
+        return report
+
+    def _grade_csv_header(self, row):
+        names = [c.strip().lower() for c in row]
+
+        def find(*options):
+            for o in options:
+                if o in names:
+                    return names.index(o)
+            return None
+
+        student = find("student", "student_id", "email", "student_email")
+        course = find("course", "course_name")
+        grade = find("grade")
+        if student is None or course is None or grade is None:
+            return None
+        return student, course, grade
+
+    def _import_grade_batch(self, batch, cols, allowed, report):
+        s_col, c_col, g_col = cols
+        rejected = report["rejected"]
+
+        # 1) parse + resolve courses (cached) and collect emails to resolve
+        parsed = []
+        emails = set()
+        for line_no, row in batch:
+            try:
+                student = row[s_col].strip()
+                course = row[c_col].strip()
+                grade = row[g_col].strip()
+            except IndexError:
+                rejected.append((line_no, row, "missing column"))
+                continue
+            if not student or not course or not grade:
+                rejected.append((line_no, row, "missing student/course/grade"))
+                continue
+            if len(grade) > GRADE_MAX_LEN:
+                rejected.append((line_no, row, "grade too long"))
+                continue
+
+            cid = self._get_course_id(course)
+            if not cid:
+                rejected.append((line_no, row, "unknown course"))
+                continue
+            if allowed is not None and cid not in allowed:
+                rejected.append((line_no, row, "not your course"))
+                continue
+
+            if "@" in student:
+                student = student.lower()
+                emails.add(student)
+            elif student.isdigit():
+                student = int(student)
+            else:
+                rejected.append((line_no, row, "unknown student"))
+                continue
+            parsed.append((line_no, row, student, cid, grade))
+
+        ids_by_email = self._user_ids_by_email(emails)
+
+        # 2) set-based enrollment check
+        resolved = []
+        for line_no, row, student, cid, grade in parsed:
+            sid = ids_by_email.get(student) if isinstance(student, str) else student
+            if sid is None:
+                rejected.append((line_no, row, "unknown student"))
+                continue
+            resolved.append((line_no, row, sid, cid, grade))
+
+        enrolled = self._enrolled_pairs((sid, cid) for _, _, sid, cid, _ in resolved)
+
+        # 3) one executemany upsert per batch
+        to_write = []
+        for line_no, row, sid, cid, grade in resolved:
+            if (sid, cid) not in enrolled:
+                rejected.append((line_no, row, "not enrolled"))
+                continue
+            to_write.append((cid, sid, grade))
+
+        self._write_grades(to_write)
+        report["imported"] += len(to_write)
+
+    def _active_course_ids(self, professor_id):
+        rows = self.db.run(
+            "SELECT course_id FROM course_professor WHERE professor_id=%s AND status='active'",
+            (professor_id,),
+            fetch=True
+        ) or []
+        return {r[0] for r in rows}
+
+    def _user_ids_by_email(self, emails):
+        ids_by_email = {}
+        for part in chunks(emails):
+            rows = self.db.run(
+                f"SELECT email, user_id FROM users WHERE email IN ({placeholders(len(part))})",
+                tuple(part),
+                fetch=True
+            ) or []
+            ids_by_email.update(rows)
+        return ids_by_email
+
+    def _write_grades(self, rows):
+        """rows: list of (course_id, student_id, grade), already validated. One transaction."""
+        if not rows:
+            return True
+        self.db.atomic(self._upsert_grades, rows)
+        self._invalidate_grade_views(rows)
+        return True
+
+    def _upsert_grades(self, rows):
+        # caller owns the transaction
+        for part in chunks(rows):
+            self.db.run_many(
+                "INSERT INTO grades(course_id, student_id, grade) VALUES(%s,%s,%s) "
+                "ON DUPLICATE KEY UPDATE grade=VALUES(grade)",
+                part
+            )
+        self._log_changes("grade", "update", [(cid, sid) for cid, sid, _ in rows])
+
+    def _invalidate_grade_views(self, rows):
+        self._invalidate_views(*{
+            key for cid, sid, _ in rows for key in (("grade", _uid(sid), cid), ("dashboard", _uid(sid)))
+        })
+
+    # ----------------- gradebook -----------------
+    def _teaches(self, professor_id, course_id):
+        return bool(self.db.run(
+            "SELECT 1 FROM course_professor WHERE professor_id=%s AND course_id=%s AND status='active'",
+            (professor_id, course_id),
             fetchone=True
+        ))
+
+    def get_gradebook(self, course_name, professor_id=None):
+        """
+        Enrolled students of a course with their current grade, one query.
+        Returns list[(user_id, user_name, email, grade or None)] by name,
+        or None if the course does not exist (or is not this professor's, when professor_id is given).
+        """
+        cid = self._get_course_id(course_name)
+        if not cid:
+            return None
+        if professor_id is None:
+            return list(self.db.run(
+                "SELECT u.user_id, u.user_name, u.email, g.grade "
+                "FROM enrollment e "
+                "JOIN users u ON u.user_id = e.student_id "
+                "LEFT JOIN grades g ON g.course_id = e.course_id AND g.student_id = e.student_id "
+                "WHERE e.course_id=%s AND e.status='enrolled' "
+                "ORDER BY u.user_name, u.user_id",
+                (cid,),
+                fetch=True
+            ) or [])
+
+        # driven from course_professor: no rows = not this professor's course,
+        # one all-NULL row = their course with nobody enrolled
+        rows = self.db.run(
+            "SELECT u.user_id, u.user_name, u.email, g.grade "
+            "FROM course_professor cp "
+            "LEFT JOIN enrollment e ON e.course_id = cp.course_id AND e.status='enrolled' "
+            "LEFT JOIN users u ON u.user_id = e.student_id "
+            "LEFT JOIN grades g ON g.course_id = e.course_id AND g.student_id = e.student_id "
+            "WHERE cp.course_id=%s AND cp.professor_id=%s AND cp.status='active' "
+            "ORDER BY u.user_name, u.user_id",
+            (cid, professor_id),
+            fetch=True
         )
-        return row[0] if row else None
+        if not rows:
+            return None
+        return [r for r in rows if r[0] is not None]
+
+    def save_grades(self, course_name, grades, professor_id=None):
+        """
+        Save a gradebook edit: grades is {student_id: grade}, "" clears a grade.
+        Enrollment is checked set-wise and every change is written in one transaction.
+        Returns {"saved": n, "cleared": n, "rejected": {student_id: reason}}
+        """
+        result = {"saved": 0, "cleared": 0, "rejected": {}}
+        cid = self._get_course_id(course_name)
+        if not cid:
+            result["rejected"] = {_uid(sid): "course not found" for sid in grades}
+            return result
+
+        changes = {}
+        for sid, grade in grades.items():
+            sid, grade = _uid(sid), (grade or "").strip()
+            if not isinstance(sid, int):
+                result["rejected"][sid] = "unknown student"
+            elif len(grade) > GRADE_MAX_LEN:
+                result["rejected"][sid] = "grade too long"
+            else:
+                changes[sid] = grade
+        if not changes:
+            return result
+
+        def work():
+            rejected = {}
+            if professor_id is not None and not self._teaches(professor_id, cid):
+                return {sid: "not your course" for sid in changes}, [], []
+
+            enrolled = self._enrolled_pairs((sid, cid) for sid in changes)
+            upserts, clears = [], []
+            for sid, grade in changes.items():
+                if (sid, cid) not in enrolled:
+                    rejected[sid] = "not enrolled"
+                elif grade:
+                    upserts.append((cid, sid, grade))
+                else:
+                    clears.append(sid)
+
+            self._upsert_grades(upserts)
+            for part in chunks(clears):
+                self.db.run(
+                    f"DELETE FROM grades WHERE course_id=%s AND student_id IN ({placeholders(len(part))})",
+                    (cid, *part)
+                )
+            self._log_changes("grade", "delete", [(cid, sid) for sid in clears])
+            return rejected, upserts, clears
+
+        rejected, upserts, clears = self.db.atomic(work)
+        self._invalidate_grade_views(upserts + [(cid, sid, None) for sid in clears])
+
+        result["rejected"].update(rejected)
+        result["saved"] = len(upserts)
+        result["cleared"] = len(clears)
+        return result
 
     # ==================== PROFESSOR COURSE REQUESTS (old feature) ====================
     def request_professor_course(self, professor_name, course_name):
@@ -339,12 +1345,17 @@ class CourseService:
         if self._get_course_id(course_name) is None:
             return False
 
-        return self.db.run(
-            "INSERT INTO professor_course_requests (professor_name, course_name, status) "
-            "VALUES (%s, %s, 'pending') "
-            "ON DUPLICATE KEY UPDATE status='pending'",
-            (professor_name, course_name)
-        )
+        def work():
+            ok = self.db.run(
+                "INSERT INTO professor_course_requests (professor_name, course_name, status) "
+                "VALUES (%s, %s, 'pending') "
+                "ON DUPLICATE KEY UPDATE status='pending'",
+                (professor_name, course_name)
+            )
+            self._log_request(professor_name, course_name)
+            return ok
+
+        return self.db.atomic(work)
 
     def get_pending_professor_requests(self):
         rows = self.db.run(
@@ -368,10 +1379,23 @@ class CourseService:
             # If you want name->id mapping, tell me and I’ll convert it.
             pass
 
-        return self.db.run(
-            "UPDATE professor_course_requests SET status=%s "
+        def work():
+            ok = self.db.run(
+                "UPDATE professor_course_requests SET status=%s "
+                "WHERE professor_name=%s AND course_name=%s",
+                (status, professor_name, course_name)
+            )
+            self._log_request(professor_name, course_name)
+            return ok
+
+        return self.db.atomic(work)
+
+    def _log_request(self, professor_name, course_name):
+        self.db.run(
+            "INSERT INTO change_log(entity, entity_id, op) "
+            "SELECT 'professor_request', id, 'update' FROM professor_course_requests "
             "WHERE professor_name=%s AND course_name=%s",
-            (status, professor_name, course_name)
+            (professor_name, course_name)
         )
 
     def get_professor_requests(self, professor_name):
@@ -1,24 +1,439 @@
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
 import pymysql
+import pymysql.cursors
+from pymysql.constants import SERVER_STATUS
+
+from query_stats import STATS
+
+# ---------------------------
+# CONFIG (env vars override these)
+# ---------------------------
+DB_HOST = os.environ.get("UNIVERSITY_DB_HOST", "localhost")
+DB_USER = os.environ.get("UNIVERSITY_DB_USER", "root")
+DB_PASS = os.environ.get("UNIVERSITY_DB_PASS", "changed")
+DB_NAME = os.environ.get("UNIVERSITY_DB_NAME", "db10")   # <-- IMPORTANT: use the DB where your old tables exist
+
+# "mysql" (default) or "sqlite" (embedded file, no server; see sqlite_backend.py)
+DB_BACKEND = os.environ.get("UNIVERSITY_DB_BACKEND", "mysql")
+SQLITE_PATH = os.environ.get("UNIVERSITY_DB_SQLITE_PATH", "university_erp.sqlite3")
+
+POOL_MIN_SIZE = int(os.environ.get("UNIVERSITY_DB_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.environ.get("UNIVERSITY_DB_POOL_MAX", "8"))
+POOL_TIMEOUT = float(os.environ.get("UNIVERSITY_DB_POOL_TIMEOUT", "10"))
+# rows pulled from the server per round trip by DB.stream()
+STREAM_FETCH_SIZE = 1000
+
+
+# "MySQL server has gone away": the statement never reached the server, so it is safe to resend
+# (2013 "lost connection during query" is NOT retried, the write may already have happened)
+CONNECTION_LOST_CODES = (2006,)
+
+# deadlock / lock wait timeout: InnoDB rolled the transaction back, re-running it is safe
+DEADLOCK_CODES = (1213, 1205)
+DEADLOCK_RETRIES = 3
+DEADLOCK_BACKOFF = 0.02  # seconds, doubled per attempt (with jitter)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of pymysql connections (or anything `connect()` returns that
+    behaves like one, e.g. sqlite_backend.SQLiteConnection).
+
+    - keeps at least `min_size` idle connections open, never more than `max_size` in total
+    - every checkout pings the connection (reconnecting if MySQL dropped it after wait_timeout)
+    - records how long callers had to wait for a connection
+    """
+
+    def __init__(self, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, timeout=POOL_TIMEOUT, connect=None,
+                 **connect_kwargs):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.connect_kwargs = connect_kwargs
+        self._connect = connect or (lambda: pymysql.connect(autocommit=True, **self.connect_kwargs))
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0  # open connections (idle + checked out)
+
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "reconnects": 0,
+            "discarded": 0,
+            "timeouts": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+
+        for _ in range(self.min_size):
+            with self._lock:
+                self._size += 1
+            self._idle.put(self._open_reserved())
+
+    # ----------------- internals -----------------
+    def _open_reserved(self):
+        """Open a connection for a slot already counted in self._size."""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+        with self._lock:
+            self._stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._stats["discarded"] += 1
+
+    def _healthy(self, conn):
+        """Ping the server; pymysql reconnects in place if the socket died."""
+        try:
+            before = conn.thread_id() if conn.open else None
+            conn.ping(reconnect=True)
+            if conn.thread_id() != before:
+                with self._lock:
+                    self._stats["reconnects"] += 1
+            return True
+        except pymysql.err.Error:
+            return False
+
+    # ----------------- public -----------------
+    def acquire(self):
+        start = time.perf_counter()
+        deadline = start + self.timeout
+
+        while True:
+            conn = None
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                grow = False
+                with self._lock:
+                    if self._size < self.max_size:
+                        self._size += 1  # reserve the slot before connecting
+                        grow = True
+                if grow:
+                    conn = self._open_reserved()
+                else:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        with self._lock:
+                            self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"No DB connection available within {self.timeout}s")
+                    try:
+                        conn = self._idle.get(timeout=remaining)
+                    except queue.Empty:
+                        continue
+
+            if not self._healthy(conn):
+                self._discard(conn)
+                continue
+
+            waited = time.perf_counter() - start
+            with self._lock:
+                self._stats["checkouts"] += 1
+                self._stats["wait_total"] += waited
+                self._stats["wait_max"] = max(self._stats["wait_max"], waited)
+            return conn
+
+    def release(self, conn, broken=False):
+        if broken or not conn.open:
+            self._discard(conn)
+            return
+        if conn.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+            # someone left a transaction open; don't hand dirty state to the next caller
+            try:
+                conn.rollback()
+            except pymysql.err.Error:
+                self._discard(conn)
+                return
+        self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self):
+        """
+        Returns dict with pool size and checkout-wait metrics.
+        """
+        with self._lock:
+            s = dict(self._stats)
+            s["size"] = self._size
+        s["idle"] = self._idle.qsize()
+        s["in_use"] = s["size"] - s["idle"]
+        s["wait_avg"] = s["wait_total"] / s["checkouts"] if s["checkouts"] else 0.0
+        return s
+
 
 class DB:
-    def __init__(self):
-        self.conn = pymysql.connect(
-            host="localhost",
-            user="root",
-            password="changed",
-            database="db10",   # <-- IMPORTANT: use the DB where your old tables exist
-            autocommit=True
-        )
-
-    def run(self, query, params=None, fetch=False, fetchone=False):
+    def __init__(self, pool=None, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, timeout=POOL_TIMEOUT,
+                 host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME, stats=STATS,
+                 backend=DB_BACKEND, sqlite_path=SQLITE_PATH):
+        self.backend = backend
+        if pool is not None:
+            self.pool = pool
+        elif backend == "sqlite":
+            import sqlite_backend
+
+            # create / upgrade the file's schema once, before the pool hands out connections
+            conn = sqlite_backend.connect(sqlite_path)
+            try:
+                sqlite_backend.ensure_schema(conn)
+            finally:
+                conn.close()
+            self.pool = ConnectionPool(
+                min_size=min_size,
+                max_size=max_size,
+                timeout=timeout,
+                connect=lambda: sqlite_backend.connect(sqlite_path),
+            )
+        elif backend == "mysql":
+            self.pool = ConnectionPool(
+                min_size=min_size,
+                max_size=max_size,
+                timeout=timeout,
+                host=host,
+                user=user,
+                password=password,
+                database=database,
+            )
+        else:
+            raise ValueError(f"Unknown DB backend {backend!r} (use 'mysql' or 'sqlite')")
+        self._local = threading.local()
+        self.stats = stats  # query_stats.QueryStats, or None to turn timing off
+
+    def _record(self, query, started, rows, params, error=False):
+        if self.stats is not None:
+            self.stats.record(query, time.perf_counter() - started, rows, params, error)
+
+    @contextmanager
+    def connection(self):
+        """
+        Check out one connection for a block of work.
+        Calls to run() from the same thread inside the block reuse this connection,
+        so nested use is fine (the outermost block returns it to the pool).
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self.pool.acquire()
+        self._local.conn = conn
+        broken = False
+        try:
+            yield conn
+        except pymysql.err.OperationalError as e:
+            # 2xxx are client/socket errors; server errors (deadlock, ...) leave the connection usable
+            broken = not e.args or not isinstance(e.args[0], int) or e.args[0] >= 2000
+            raise
+        finally:
+            self._local.conn = None
+            self.pool.release(conn, broken=broken)
+
+    @contextmanager
+    def transaction(self):
+        """
+        One unit of work: run()/run_many() calls from this thread inside the block share
+        one connection and are committed once at the end, or rolled back if the block raises.
+
+        A nested transaction() becomes a SAVEPOINT, so an inner failure can be caught
+        without losing the outer work. Use atomic() to re-run a block on deadlock.
+        """
+        depth = getattr(self._local, "tx_depth", 0)
+        with self.connection() as conn:
+            self._local.tx_depth = depth + 1
+            try:
+                if depth:
+                    savepoint = f"sp_{depth}"
+                    self.run(f"SAVEPOINT {savepoint}")
+                    try:
+                        yield conn
+                    except BaseException:
+                        _quietly(self.run, f"ROLLBACK TO SAVEPOINT {savepoint}")
+                        raise
+                    self.run(f"RELEASE SAVEPOINT {savepoint}")
+                    return
+
+                conn.begin()
+                try:
+                    yield conn
+                    conn.commit()
+                except BaseException:
+                    _quietly(conn.rollback)
+                    raise
+            finally:
+                self._local.tx_depth = depth
+
+    def in_transaction(self):
+        return getattr(self._local, "tx_depth", 0) > 0
+
+    def atomic(self, fn, *args, retries=DEADLOCK_RETRIES, **kwargs):
+        """
+        fn(*args, **kwargs) inside transaction(). On deadlock / lock wait timeout the whole
+        transaction is re-run from the start (fn must be safe to call again), up to `retries` times.
+        Inside an outer transaction there is nothing to re-run, so the error is raised.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.transaction():
+                    return fn(*args, **kwargs)
+            except pymysql.err.OperationalError as e:
+                if not e.args or e.args[0] not in DEADLOCK_CODES or attempt >= retries or self.in_transaction():
+                    raise
+                attempt += 1
+                time.sleep(DEADLOCK_BACKOFF * (2 ** attempt) * random.random())
+
+    def in_connection(self):
+        """True if this thread already holds a connection via connection()."""
+        return getattr(self._local, "conn", None) is not None
+
+    def run(self, query, params=None, fetch=False, fetchone=False, lastrowid=False):
+        """lastrowid=True returns the AUTO_INCREMENT id of an INSERT instead of True."""
         params = params or ()
-        with self.conn.cursor() as cur:
-            cur.execute(query, params)
+        # a dropped socket is retried once on a fresh connection, unless we are inside
+        # a caller's connection() block (their session state would be lost)
+        retries = 0 if self.in_connection() else 1
+        while True:
+            started = time.perf_counter()
+            try:
+                with self.connection() as conn:
+                    with conn.cursor() as cur:
+                        try:
+                            cur.execute(query, params)
+                        except pymysql.err.Error:
+                            self._record(query, started, 0, params, error=True)
+                            raise
+
+                        if fetchone:
+                            row = cur.fetchone()
+                            self._record(query, started, 1 if row else 0, params)
+                            return row
+                        if fetch:
+                            rows = cur.fetchall()
+                            self._record(query, started, len(rows), params)
+                            return rows
 
-            if fetchone:
-                return cur.fetchone()
-            if fetch:
-                return cur.fetchall()
+                        self._record(query, started, cur.rowcount, params)
+                        if lastrowid:
+                            return cur.lastrowid
+                        # for INSERT/UPDATE/DELETE return True if query worked
+                        return True
+            except pymysql.err.OperationalError as e:
+                if retries and e.args and e.args[0] in CONNECTION_LOST_CODES:
+                    retries -= 1
+                    continue
+                raise
 
-            # for INSERT/UPDATE/DELETE return True if query worked
+    def run_many(self, query, seq_params):
+        """
+        executemany() on one connection. For `INSERT ... VALUES(%s,...)` pymysql sends
+        multi-row INSERTs, so keep ON DUPLICATE KEY UPDATE parts free of %s (use VALUES(col)).
+        """
+        seq_params = list(seq_params)
+        if not seq_params:
             return True
+        started = time.perf_counter()
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                try:
+                    cur.executemany(query, seq_params)
+                except pymysql.err.Error:
+                    self._record(query, started, 0, seq_params[0], error=True)
+                    raise
+                self._record(query, started, cur.rowcount, seq_params[0])
+        return True
+
+    def stream(self, query, params=None, fetch_size=STREAM_FETCH_SIZE):
+        """
+        Generator over the result rows using an unbuffered server-side cursor (SSCursor),
+        so memory stays flat no matter how many rows the query returns.
+
+        It checks out its own connection (an unbuffered result blocks the connection
+        until fully read), so it does not see a transaction open on this thread.
+        The connection goes back to the pool when the generator is exhausted or closed.
+        """
+        conn = self.pool.acquire()
+        broken = False
+        error = False
+        count = 0
+        started = time.perf_counter()
+        try:
+            with conn.cursor(pymysql.cursors.SSCursor) as cur:
+                cur.execute(query, params or ())
+                while True:
+                    rows = cur.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    count += len(rows)
+                    yield from rows
+        except pymysql.err.OperationalError:
+            broken = error = True
+            raise
+        except pymysql.err.Error:
+            error = True
+            raise
+        finally:
+            # time includes however long the consumer took between rows
+            self._record(query, started, count, params, error)
+            self.pool.release(conn, broken=broken)
+
+    def pool_stats(self):
+        return self.pool.stats()
+
+    def query_report(self, top=25):
+        """p50/p95/p99 per normalized statement (see query_stats.py)."""
+        return self.stats.report(top=top) if self.stats is not None else "Query stats are off."
+
+    def close(self):
+        self.pool.close()
+
+
+def _quietly(fn, *args):
+    # cleanup after a failure must not hide the original error
+    try:
+        fn(*args)
+    except pymysql.err.Error:
+        pass
+
+
+_shared_db = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_db():
+    """
+    One pooled DB per process. Panels, worker threads and servers should use this
+    instead of DB() so they don't each open their own connections.
+    """
+    global _shared_db
+    with _shared_lock:
+        if _shared_db is None:
+            _shared_db = DB()
+        return _shared_db
@@ -0,0 +1,363 @@
+"""
+Versioned schema migrations.
+
+    python migrations.py             # apply pending migrations
+    python migrations.py --dry-run   # print what would run, change nothing
+    python migrations.py --status    # show current / latest version
+    python migrations.py --target 3  # stop after version 3
+
+Applied versions are recorded in `schema_version`. Every step is idempotent
+(checks information_schema before changing anything), so re-running after a
+failure is safe; MySQL DDL commits implicitly, so steps are not transactional.
+Index builds use ALGORITHM=INPLACE, LOCK=NONE so reads and writes keep going
+while the index is built.
+"""
+import argparse
+import sys
+
+import pymysql
+
+from db import DB_HOST, DB_USER, DB_PASS, DB_NAME
+
+LOCK_NAME = "university_erp_schema_migrate"
+
+
+class MigrationError(Exception):
+    pass
+
+
+class MigrationContext:
+    """What a migration step gets: read helpers + an execute() that honours dry-run."""
+
+    def __init__(self, cur, dry_run=False, log=print):
+        self.cur = cur
+        self.dry_run = dry_run
+        self.log = log
+
+    def query(self, sql, params=None):
+        # reads always run, even in dry-run mode
+        self.cur.execute(sql, params or ())
+        return self.cur.fetchall()
+
+    def execute(self, sql, params=None):
+        if self.dry_run:
+            self.log("   [dry-run] " + " ".join(sql.split()))
+            return 0
+        self.cur.execute(sql, params or ())
+        return self.cur.rowcount
+
+    # ----------------- information_schema helpers -----------------
+    def table_exists(self, table):
+        return bool(self.query(
+            "SELECT 1 FROM information_schema.tables "
+            "WHERE table_schema=DATABASE() AND table_name=%s",
+            (table,)
+        ))
+
+    def column_exists(self, table, column):
+        return bool(self.query(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema=DATABASE() AND table_name=%s AND column_name=%s",
+            (table, column)
+        ))
+
+    def index_exists(self, table, index):
+        return bool(self.query(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema=DATABASE() AND table_name=%s AND index_name=%s LIMIT 1",
+            (table, index)
+        ))
+
+    def add_index(self, table, index, columns, unique=False):
+        """Online index build; no-op if the index already exists."""
+        if self.index_exists(table, index):
+            return
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        self.execute(
+            f"ALTER TABLE {table} ADD {kind} {index} ({columns}), ALGORITHM=INPLACE, LOCK=NONE"
+        )
+        self.log(f"   + index {table}.{index}")
+
+
+class Migration:
+    def __init__(self, version, description, steps):
+        """
+        steps: list of SQL strings and/or callables taking a MigrationContext.
+        """
+        self.version = version
+        self.description = description
+        self.steps = steps
+
+    def apply(self, ctx):
+        for step in self.steps:
+            if callable(step):
+                step(ctx)
+            else:
+                ctx.execute(step)
+
+
+# ======================= STEPS =======================
+BASE_TABLES = [
+"""
+CREATE TABLE IF NOT EXISTS users (
+  user_id INT AUTO_INCREMENT PRIMARY KEY,
+  user_name VARCHAR(100) NOT NULL,
+  password VARCHAR(255) NOT NULL,
+  email VARCHAR(150) NOT NULL UNIQUE,
+  role ENUM('admin','professor','student') NOT NULL,
+  mobile_no VARCHAR(20),
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+""",
+"""
+CREATE TABLE IF NOT EXISTS admin (
+  admin_id INT PRIMARY KEY,
+  FOREIGN KEY (admin_id) REFERENCES users(user_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE
+) ENGINE=InnoDB;
+""",
+"""
+CREATE TABLE IF NOT EXISTS professor (
+  professor_id INT PRIMARY KEY,
+  status ENUM('waiting','approved','rejected') DEFAULT 'waiting',
+  FOREIGN KEY (professor_id) REFERENCES users(user_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE
+) ENGINE=InnoDB;
+""",
+"""
+CREATE TABLE IF NOT EXISTS student (
+  student_id INT PRIMARY KEY,
+  FOREIGN KEY (student_id) REFERENCES users(user_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE
+) ENGINE=InnoDB;
+""",
+"""
+CREATE TABLE IF NOT EXISTS course (
+  course_id INT AUTO_INCREMENT PRIMARY KEY,
+  course_name VARCHAR(150) NOT NULL,
+  course_fees DECIMAL(10,2) NOT NULL,
+  course_duration VARCHAR(50) NOT NULL
+) ENGINE=InnoDB;
+""",
+"""
+CREATE TABLE IF NOT EXISTS course_professor (
+  course_id INT NOT NULL,
+  professor_id INT NOT NULL,
+  status ENUM('active','inactive') DEFAULT 'active',
+  PRIMARY KEY (course_id, professor_id),
+  FOREIGN KEY (course_id) REFERENCES course(course_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE,
+  FOREIGN KEY (professor_id) REFERENCES professor(professor_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE
+) ENGINE=InnoDB;
+""",
+"""
+CREATE TABLE IF NOT EXISTS enrollment (
+  course_id INT NOT NULL,
+  student_id INT NOT NULL,
+  status ENUM('enrolled','completed','dropped') DEFAULT 'enrolled',
+  PRIMARY KEY (course_id, student_id),
+  FOREIGN KEY (course_id) REFERENCES course(course_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE,
+  FOREIGN KEY (student_id) REFERENCES student(student_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE
+) ENGINE=InnoDB;
+""",
+"""
+CREATE TABLE IF NOT EXISTS professor_course_requests (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    professor_name VARCHAR(100) NOT NULL,
+    course_name VARCHAR(150) NOT NULL,
+    status ENUM('pending', 'accepted', 'rejected') DEFAULT 'pending',
+    requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY unique_request (professor_name, course_name)
+) ENGINE=InnoDB;
+"""
+]
+
+GRADES_TABLE = """
+CREATE TABLE IF NOT EXISTS grades (
+  course_id INT NOT NULL,
+  student_id INT NOT NULL,
+  grade VARCHAR(20) NOT NULL,
+  PRIMARY KEY (course_id, student_id),
+  FOREIGN KEY (course_id) REFERENCES course(course_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE,
+  FOREIGN KEY (student_id) REFERENCES student(student_id)
+    ON DELETE CASCADE
+    ON UPDATE CASCADE
+) ENGINE=InnoDB;
+"""
+
+
+def add_course_key(ctx):
+    """
+    course.course_key = LOWER(TRIM(course_name)) with a UNIQUE index, so CourseService
+    can look courses up with `course_key = %s` (index seek) instead of LOWER(...) (full scan).
+    """
+    if not ctx.column_exists("course", "course_key"):
+        # (course may not exist yet in a dry run against an empty database)
+        dupes = ctx.table_exists("course") and ctx.query(
+            "SELECT LOWER(TRIM(course_name)) AS k, COUNT(*) FROM course "
+            "GROUP BY k HAVING COUNT(*) > 1"
+        )
+        if dupes:
+            names = ", ".join(f"{k!r} x{n}" for k, n in dupes)
+            raise MigrationError(
+                f"course names are duplicated (ignoring case): {names}. Rename/merge them and re-run."
+            )
+        # a STORED generated column has to rebuild the table (no INPLACE for this one)
+        ctx.execute(
+            "ALTER TABLE course "
+            "ADD COLUMN course_key VARCHAR(150) "
+            "GENERATED ALWAYS AS (LOWER(TRIM(course_name))) STORED NOT NULL AFTER course_name"
+        )
+        ctx.log("   + column course.course_key")
+
+    ctx.add_index("course", "uq_course_key", "course_key", unique=True)
+
+
+def normalize_emails(ctx):
+    """users.email is UNIQUE already; store it lower-cased so `email = %s` finds it."""
+    try:
+        n = ctx.execute(
+            "UPDATE users SET email=LOWER(TRIM(email)) WHERE BINARY email <> LOWER(TRIM(email))"
+        )
+    except pymysql.err.IntegrityError as e:
+        raise MigrationError(f"some emails differ only by case, fix them by hand: {e}")
+    if n:
+        ctx.log(f"   normalized {n} email(s) to lower case")
+
+
+def add_user_search_index(ctx):
+    """Type-ahead search: WHERE role=? AND user_name LIKE 'pre%' ORDER BY user_name."""
+    ctx.add_index("users", "idx_users_role_name", "role, user_name")
+
+
+CHANGE_LOG_TABLE = """
+CREATE TABLE IF NOT EXISTS change_log (
+  seq BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  entity VARCHAR(32) NOT NULL,
+  entity_id INT NOT NULL,
+  ref_id INT NULL,
+  op ENUM('insert', 'update', 'delete') NOT NULL,
+  changed_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+  KEY idx_change_log_at (changed_at)
+) ENGINE=InnoDB;
+"""
+
+
+MIGRATIONS = [
+    Migration(1, "base tables", BASE_TABLES),
+    Migration(2, "grades table", [GRADES_TABLE]),
+    Migration(3, "indexable course_key / normalized emails", [add_course_key, normalize_emails]),
+    Migration(4, "user type-ahead search index", [add_user_search_index]),
+    Migration(5, "change log for CourseService.changes_since", [CHANGE_LOG_TABLE]),
+]
+
+
+# ======================= RUNNER =======================
+def connect(**overrides):
+    kwargs = dict(host=DB_HOST, user=DB_USER, password=DB_PASS, database=DB_NAME, autocommit=True)
+    kwargs.update(overrides)
+    return pymysql.connect(**kwargs)
+
+
+def current_version(cur):
+    cur.execute(
+        "SELECT 1 FROM information_schema.tables "
+        "WHERE table_schema=DATABASE() AND table_name='schema_version'"
+    )
+    if not cur.fetchone():
+        return 0
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cur.fetchone()[0]
+
+
+def latest_version():
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def migrate(conn, target=None, dry_run=False, log=print):
+    """
+    Apply pending migrations up to `target` (default: latest).
+    Returns the list of versions applied (or that would be applied in dry-run).
+    """
+    target = latest_version() if target is None else target
+    applied = []
+
+    with conn.cursor() as cur:
+        # only one runner at a time per database
+        cur.execute("SELECT GET_LOCK(%s, 30)", (LOCK_NAME,))
+        if cur.fetchone()[0] != 1:
+            raise MigrationError("another migration is running (could not get lock)")
+        try:
+            if not dry_run:
+                cur.execute(
+                    "CREATE TABLE IF NOT EXISTS schema_version ("
+                    "  version INT PRIMARY KEY,"
+                    "  description VARCHAR(255) NOT NULL,"
+                    "  applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+                    ") ENGINE=InnoDB"
+                )
+
+            version = current_version(cur)
+            ctx = MigrationContext(cur, dry_run=dry_run, log=log)
+
+            for m in MIGRATIONS:
+                if m.version <= version or m.version > target:
+                    continue
+                log(f"-> {m.version}: {m.description}")
+                m.apply(ctx)
+                if not dry_run:
+                    cur.execute(
+                        "INSERT INTO schema_version(version, description) VALUES(%s,%s)",
+                        (m.version, m.description)
+                    )
+                applied.append(m.version)
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cur.fetchone()
+
+    return applied
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Apply schema migrations.")
+    ap.add_argument("--dry-run", action="store_true", help="print statements, change nothing")
+    ap.add_argument("--target", type=int, default=None, help="stop after this version")
+    ap.add_argument("--status", action="store_true", help="show schema version and exit")
+    args = ap.parse_args(argv)
+
+    conn = connect()
+    try:
+        if args.status:
+            with conn.cursor() as cur:
+                print(f"schema version {current_version(cur)} (latest {latest_version()})")
+            return 0
+        try:
+            applied = migrate(conn, target=args.target, dry_run=args.dry_run)
+        except MigrationError as e:
+            print("❌ Migration failed:", e)
+            return 1
+        if not applied:
+            print("✅ Schema is up to date.")
+        elif args.dry_run:
+            print(f"Dry run: would apply {applied}")
+        else:
+            print(f"✅ Applied {applied}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
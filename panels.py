@@ -1,19 +1,61 @@
 import tkinter as tk
-from tkinter import messagebox, simpledialog, ttk
+from tkinter import filedialog, messagebox, simpledialog, ttk
+import csv
 import re
 
+from api_client import API_URL, RemoteCourseService
 from course_service import CourseService
+from query_stats import STATS, install_signal_handler
+from ui_async import TaskRunner
+from widgets import SearchSelect, VirtualList
 
-service = CourseService()
+# UNIVERSITY_API_URL set -> go through api_server.py instead of opening MySQL connections here
+service = RemoteCourseService(API_URL) if API_URL else CourseService()
+
+# the admin panel reads the change feed this often; only lists with changes are refreshed
+ADMIN_REFRESH_MS = 5000
 
 vcmd_person = None
 vcmd_course = None
+runner = None
 
 
 def init_ui(root: tk.Tk):
-    global vcmd_person, vcmd_course
+    global vcmd_person, vcmd_course, runner
     vcmd_person = (root.register(validate_person_name_input), "%P")
     vcmd_course = (root.register(validate_course_name_input), "%P")
+    runner = TaskRunner(root)
+
+    # Ctrl+Shift+D in any window (or SIGUSR1 on Linux/macOS) shows what the DB is doing
+    root.bind_all("<Control-Shift-D>", lambda e: open_query_stats_window(root))
+    install_signal_handler()
+
+
+# -------------------- Background calls --------------------
+def run_async(win, fn, *args, on_done=None, on_error=None, key=None, **kwargs):
+    """
+    Run fn(*args, **kwargs) (a service call) off the Tk thread.
+    on_done(result) / on_error(exc) are called back on the Tk thread, only if `win` still exists.
+    """
+    if on_error is None:
+        def on_error(exc):
+            messagebox.showerror("Database Error", str(exc), parent=win)
+    return runner.submit(win, fn, *args, on_done=on_done, on_error=on_error, key=key, **kwargs)
+
+
+def logout(win, root, role):
+    """End the session (the API token, when there is one) and go back to the login screen."""
+    end = getattr(service, "logout", None)
+    if end is not None:
+        # off the Tk thread and best effort: the local logout never waits on the server
+        run_async(root, end, on_error=lambda exc: None)
+    win.destroy()
+    open_auth_window(root, role)
+
+
+def bind_cancel(win):
+    """Esc cancels whatever this window is still waiting for."""
+    win.bind("<Escape>", lambda e: runner.cancel_all(win))
 
 
 def cap(text: str) -> str:
@@ -48,81 +90,143 @@ def validate_course_name_input(P):
     return has_letter
 
 
-# -------------------- Dropdown dialogs --------------------
-def select_course_dialog(parent, title="Select Course"):
-    courses = service.show_courses()
-    course_names = [c[0] for c in courses] if courses else []
+def open_query_stats_window(root):
+    win = tk.Toplevel(root)
+    win.title("Query Stats")
+    win.geometry("1000x420")
+
+    text = tk.Text(win, wrap="none", font=("Courier", 9))
+    text.pack(fill="both", expand=True)
+
+    def show(stats):
+        pool = stats["pool"]
+        text.delete("1.0", tk.END)
+        text.insert(tk.END, stats["queries"] + "\n\n")
+        text.insert(
+            tk.END,
+            f"pool: size={pool['size']} in_use={pool['in_use']} idle={pool['idle']} "
+            f"checkouts={pool['checkouts']} wait_avg={pool['wait_avg'] * 1000:.2f}ms "
+            f"wait_max={pool['wait_max'] * 1000:.2f}ms reconnects={pool['reconnects']}\n"
+        )
+
+    def refresh():
+        if isinstance(service, RemoteCourseService):
+            # the queries run on the API server (admin session only)
+            run_async(win, service.server_stats, on_done=show, key="stats")
+        else:
+            show({"pool": service.db.pool_stats(), "queries": STATS.report()})
+
+    btn = tk.Frame(win)
+    btn.pack(pady=6)
+    tk.Button(btn, text="Refresh", width=10, command=refresh).pack(side="left", padx=6)
+    tk.Button(btn, text="Reset", width=10, command=lambda: [STATS.reset(), refresh()]).pack(side="left", padx=6)
+    tk.Button(btn, text="Print", width=10, command=STATS.dump).pack(side="left", padx=6)
+    refresh()
 
+
+# -------------------- Search dialogs --------------------
+def _search_dialog(parent, title, label):
     dialog = tk.Toplevel(parent)
     dialog.title(title)
     dialog.transient(parent)
     dialog.grab_set()
     dialog.geometry("+{}+{}".format(parent.winfo_x() + 150, parent.winfo_y() + 150))
+    bind_cancel(dialog)
+
+    tk.Label(dialog, text=label, font=("Arial", 11)).pack(pady=10, padx=20)
+    return dialog
 
-    tk.Label(dialog, text="Select a course:", font=("Arial", 11)).pack(pady=10, padx=20)
 
-    combo = ttk.Combobox(dialog, values=course_names, state="readonly", width=32)
-    combo.pack(pady=5, padx=20)
-    if course_names:
-        combo.current(0)
+def _user_label(u):
+    return f"{u[1]}  <{u[2]}>  (ID:{u[0]})"
 
+
+def _user_page_key(u):
+    return (u[0], u[1])
+
+
+def select_course_dialog(parent, title="Select Course"):
+    dialog = _search_dialog(parent, title, "Type to search courses:")
     result = {"value": None}
 
     def on_ok():
-        v = combo.get().strip()
-        result["value"] = v if v else None
+        sel = picker.selected()
+        result["value"] = sel[0][1] if sel else None
         dialog.destroy()
 
-    def on_cancel():
-        dialog.destroy()
+    picker = SearchSelect(
+        dialog, runner,
+        search_fn=service.search_courses,
+        format_row=lambda c: c[1],
+        page_key=lambda c: c[1],
+        width=40, height=10,
+        on_activate=on_ok,
+    )
+    picker.pack(pady=5, padx=20, fill="both", expand=True)
 
     btn = tk.Frame(dialog)
     btn.pack(pady=15)
     tk.Button(btn, text="OK", width=10, command=on_ok).pack(side="left", padx=10)
-    tk.Button(btn, text="Cancel", width=10, command=on_cancel).pack(side="left", padx=10)
-
-    if not course_names:
-        messagebox.showwarning("No Courses", "No courses found. Ask admin to add courses first.", parent=dialog)
+    tk.Button(btn, text="Cancel", width=10, command=dialog.destroy).pack(side="left", padx=10)
 
     dialog.wait_window()
     return result["value"]
 
 
 def select_user_dialog(parent, title, role, only_approved_professors=True):
-    users = service.get_users_by_role(role, only_approved_professors=only_approved_professors)
+    dialog = _search_dialog(parent, title, f"Type to search {role}s (name or email):")
+    result = {"sel": None}
 
-    dialog = tk.Toplevel(parent)
-    dialog.title(title)
-    dialog.transient(parent)
-    dialog.grab_set()
-    dialog.geometry("+{}+{}".format(parent.winfo_x() + 150, parent.winfo_y() + 150))
+    def on_ok():
+        sel = picker.selected()
+        result["sel"] = tuple(sel[0]) if sel else None
+        dialog.destroy()
 
-    tk.Label(dialog, text=f"Select {role}:", font=("Arial", 11)).pack(pady=10, padx=20)
+    picker = SearchSelect(
+        dialog, runner,
+        search_fn=lambda prefix, after=None, limit=None: service.search_users(
+            role, prefix, limit=limit, after=after, only_approved_professors=only_approved_professors),
+        format_row=_user_label,
+        page_key=_user_page_key,
+        width=55, height=10,
+        on_activate=on_ok,
+    )
+    picker.pack(pady=5, padx=20, fill="both", expand=True)
 
-    values = [f"{u[1]}  <{u[2]}>  (ID:{u[0]})" for u in users]
-    combo = ttk.Combobox(dialog, values=values, state="readonly", width=45)
-    combo.pack(pady=5, padx=20)
-    if values:
-        combo.current(0)
+    btn = tk.Frame(dialog)
+    btn.pack(pady=15)
+    tk.Button(btn, text="OK", width=10, command=on_ok).pack(side="left", padx=10)
+    tk.Button(btn, text="Cancel", width=10, command=dialog.destroy).pack(side="left", padx=10)
+
+    dialog.wait_window()
+    return result["sel"]
 
-    result = {"sel": None}
+
+def select_users_dialog(parent, title, role, only_approved_professors=True):
+    """Like select_user_dialog but lets you pick many rows. Returns list[(user_id, user_name, email)]."""
+    dialog = _search_dialog(parent, title, f"Search {role}s, Ctrl/Shift-click to pick many:")
+    result = {"sel": []}
 
     def on_ok():
-        idx = combo.current()
-        if 0 <= idx < len(users):
-            result["sel"] = users[idx]
+        result["sel"] = [tuple(u) for u in picker.selected()]
         dialog.destroy()
 
-    def on_cancel():
-        dialog.destroy()
+    picker = SearchSelect(
+        dialog, runner,
+        search_fn=lambda prefix, after=None, limit=None: service.search_users(
+            role, prefix, limit=limit, after=after, only_approved_professors=only_approved_professors),
+        format_row=_user_label,
+        page_key=_user_page_key,
+        multiple=True,
+        width=55, height=14,
+    )
+    picker.pack(pady=5, padx=20, fill="both", expand=True)
 
     btn = tk.Frame(dialog)
     btn.pack(pady=15)
+    tk.Button(btn, text="Select All Shown", width=14, command=picker.select_all).pack(side="left", padx=10)
     tk.Button(btn, text="OK", width=10, command=on_ok).pack(side="left", padx=10)
-    tk.Button(btn, text="Cancel", width=10, command=on_cancel).pack(side="left", padx=10)
-
-    if not users:
-        messagebox.showwarning("No Users", f"No {role} users found.", parent=dialog)
+    tk.Button(btn, text="Cancel", width=10, command=dialog.destroy).pack(side="left", padx=10)
 
     dialog.wait_window()
     return result["sel"]
@@ -135,6 +239,7 @@ def open_auth_window(root, role: str):
     win.geometry("420x330")
     win.resizable(False, False)
     win.protocol("WM_DELETE_WINDOW", root.destroy)
+    bind_cancel(win)
 
     tk.Label(win, text=f"{cap(role)} Authentication", font=("Arial", 15, "bold")).pack(pady=12)
 
@@ -172,20 +277,30 @@ def open_auth_window(root, role: str):
                 messagebox.showwarning("Login Failed", "Password is required.", parent=win)
                 return
 
-            ok, res = service.login_user(email, password, role)
-            if not ok:
-                messagebox.showwarning("Login Failed", str(res), parent=win)
-                return
+            def on_done(out):
+                login_btn.config(state="normal")
+                ok, res = out
+                if not ok:
+                    messagebox.showwarning("Login Failed", str(res), parent=win)
+                    return
 
-            win.destroy()
-            if role == "admin":
-                open_admin_panel(root, res)
-            elif role == "professor":
-                open_professor_panel(root, res)
-            else:
-                open_student_panel(root, res)
+                win.destroy()
+                if role == "admin":
+                    open_admin_panel(root, res)
+                elif role == "professor":
+                    open_professor_panel(root, res)
+                else:
+                    open_student_panel(root, res)
 
-        tk.Button(body, text="Login", width=16, command=do_login).grid(row=3, column=0, columnspan=2, pady=10)
+            def on_error(exc):
+                login_btn.config(state="normal")
+                messagebox.showerror("Login Failed", f"Database error: {exc}", parent=win)
+
+            login_btn.config(state="disabled")
+            run_async(win, service.login_user, email, password, role, on_done=on_done, on_error=on_error, key="auth")
+
+        login_btn = tk.Button(body, text="Login", width=16, command=do_login)
+        login_btn.grid(row=3, column=0, columnspan=2, pady=10)
 
         # ✅ Only professor/student can register (button below form)
         if role != "admin":
@@ -245,23 +360,34 @@ def open_auth_window(root, role: str):
                 messagebox.showwarning("Register Failed", "Password is required.", parent=win)
                 return
 
-            ok, res = service.register_user(name, email, password, role, mobile)
-            if not ok:
-                messagebox.showwarning("Register Failed", str(res), parent=win)
-                return
-
-            if role == "professor":
-                messagebox.showinfo(
-                    "Registered",
-                    "Professor account created.\nStatus: waiting (admin must approve).",
-                    parent=win
-                )
-            else:
-                messagebox.showinfo("Registered", "Account created. Now login.", parent=win)
-
-            show_login()
-
-        tk.Button(body, text="Register", width=16, command=do_register).grid(row=5, column=0, columnspan=2, pady=10)
+            def on_done(out):
+                reg_btn.config(state="normal")
+                ok, res = out
+                if not ok:
+                    messagebox.showwarning("Register Failed", str(res), parent=win)
+                    return
+
+                if role == "professor":
+                    messagebox.showinfo(
+                        "Registered",
+                        "Professor account created.\nStatus: waiting (admin must approve).",
+                        parent=win
+                    )
+                else:
+                    messagebox.showinfo("Registered", "Account created. Now login.", parent=win)
+
+                show_login()
+
+            def on_error(exc):
+                reg_btn.config(state="normal")
+                messagebox.showerror("Register Failed", f"Database error: {exc}", parent=win)
+
+            reg_btn.config(state="disabled")
+            run_async(win, service.register_user, name, email, password, role, mobile,
+                      on_done=on_done, on_error=on_error, key="auth")
+
+        reg_btn = tk.Button(body, text="Register", width=16, command=do_register)
+        reg_btn.grid(row=5, column=0, columnspan=2, pady=10)
         tk.Button(body, text="Back to Login", width=16, command=show_login).grid(row=6, column=0, columnspan=2, pady=4)
 
     show_login()
@@ -271,9 +397,10 @@ def open_auth_window(root, role: str):
 def open_admin_panel(root, user_ctx):
     win = tk.Toplevel(root)
     win.title("Admin Panel")
-    win.geometry("920x640")
+    win.geometry("920x690")
     win.resizable(False, False)
     win.protocol("WM_DELETE_WINDOW", root.destroy)
+    bind_cancel(win)
 
     tk.Label(
         win,
@@ -283,37 +410,44 @@ def open_admin_panel(root, user_ctx):
 
     # -------- Courses --------
     tk.Label(win, text="Courses", font=("Arial", 12, "bold")).pack(pady=(6, 0))
-    course_list = tk.Listbox(win, width=90, height=7)
+    # only the visible page of courses is fetched and drawn, however many there are
+    course_list = VirtualList(
+        win, runner, service.show_courses, service.count_courses,
+        format_row=lambda r: r[0], page_key=lambda r: r[0],
+        empty_text="No courses available", width=90, height=7
+    )
     course_list.pack(pady=8)
 
     def refresh_courses():
-        course_list.delete(0, tk.END)
-        rows = service.show_courses() or []
-        if not rows:
-            course_list.insert(tk.END, "No courses available")
-        else:
-            for r in rows:
-                course_list.insert(tk.END, r[0])
+        course_list.refresh()
 
     def add_course():
         name = simpledialog.askstring("Add Course", "Course name:", parent=win)
         if not name:
             return
-        if service.add_course(cap(name)):
-            messagebox.showinfo("Success", "Course added.", parent=win)
-        else:
-            messagebox.showwarning("Failed", "Course exists / DB error.", parent=win)
-        refresh_courses()
+
+        def on_done(ok):
+            if ok:
+                messagebox.showinfo("Success", "Course added.", parent=win)
+            else:
+                messagebox.showwarning("Failed", "Course exists / DB error.", parent=win)
+            refresh_courses()
+
+        run_async(win, service.add_course, cap(name), on_done=on_done)
 
     def delete_course():
         course = select_course_dialog(win, "Delete Course")
         if not course:
             return
-        if service.delete_course(cap(course)):
-            messagebox.showinfo("Success", "Course deleted.", parent=win)
-        else:
-            messagebox.showwarning("Failed", "Course not found / DB error.", parent=win)
-        refresh_courses()
+
+        def on_done(ok):
+            if ok:
+                messagebox.showinfo("Success", "Course deleted.", parent=win)
+            else:
+                messagebox.showwarning("Failed", "Course not found / DB error.", parent=win)
+            refresh_courses()
+
+        run_async(win, service.delete_course, cap(course), on_done=on_done)
 
     def enroll_student_dropdown():
         sel = select_user_dialog(win, "Select Student", "student", only_approved_professors=False)
@@ -325,10 +459,40 @@ def open_admin_panel(root, user_ctx):
         if not course:
             return
 
-        if service.enroll_student_by_id(student_id, cap(course)):
-            messagebox.showinfo("Success", f"{student_name} enrolled in {cap(course)}.", parent=win)
-        else:
-            messagebox.showwarning("Failed", "Course not found / DB error.", parent=win)
+        def on_done(ok):
+            if ok:
+                messagebox.showinfo("Success", f"{student_name} enrolled in {cap(course)}.", parent=win)
+            else:
+                messagebox.showwarning("Failed", "Course not found / DB error.", parent=win)
+
+        run_async(win, service.enroll_student_by_id, student_id, cap(course), on_done=on_done)
+
+    def enroll_students_bulk():
+        sel = select_users_dialog(win, "Select Students", "student", only_approved_professors=False)
+        if not sel:
+            return
+
+        course = select_course_dialog(win, "Select Course")
+        if not course:
+            return
+
+        names = {u[0]: u[1] for u in sel}
+        run_async(win, service.enroll_students_bulk, cap(course), list(names),
+                  on_done=lambda outcome: show_bulk_result(course, names, outcome))
+
+    def show_bulk_result(course, names, outcome):
+        enrolled = [sid for sid, o in outcome.items() if o == "enrolled"]
+        already = [sid for sid, o in outcome.items() if o == "already enrolled"]
+        failed = [(sid, o) for sid, o in outcome.items() if o not in ("enrolled", "already enrolled")]
+
+        lines = [f"Enrolled: {len(enrolled)}", f"Already enrolled: {len(already)}"]
+        if failed:
+            lines.append(f"Failed: {len(failed)}")
+            lines += [f"  {names.get(sid, sid)}: {o}" for sid, o in failed[:15]]
+            if len(failed) > 15:
+                lines.append(f"  ... and {len(failed) - 15} more")
+        show = messagebox.showwarning if failed else messagebox.showinfo
+        show("Bulk Enroll", f"{cap(course)}\n\n" + "\n".join(lines), parent=win)
 
     def assign_professor_dropdown():
         sel = select_user_dialog(win, "Select Professor", "professor", only_approved_professors=True)
@@ -340,10 +504,13 @@ def open_admin_panel(root, user_ctx):
         if not course:
             return
 
-        if service.assign_professor_to_course_by_id(prof_id, cap(course)):
-            messagebox.showinfo("Success", f"{prof_name} assigned to {cap(course)}.", parent=win)
-        else:
-            messagebox.showwarning("Failed", "Course not found / DB error.", parent=win)
+        def on_done(ok):
+            if ok:
+                messagebox.showinfo("Success", f"{prof_name} assigned to {cap(course)}.", parent=win)
+            else:
+                messagebox.showwarning("Failed", "Course not found / DB error.", parent=win)
+
+        run_async(win, service.assign_professor_to_course_by_id, prof_id, cap(course), on_done=on_done)
 
     btn_frame = tk.Frame(win)
     btn_frame.pack(pady=8)
@@ -353,116 +520,415 @@ def open_admin_panel(root, user_ctx):
         .grid(row=1, column=0, padx=10, pady=6)
     tk.Button(btn_frame, text="Assign Professor (Dropdown)", width=24, command=assign_professor_dropdown)\
         .grid(row=1, column=1, padx=10, pady=6)
+    tk.Button(btn_frame, text="Enroll Many Students", width=24, command=enroll_students_bulk)\
+        .grid(row=2, column=0, columnspan=2, padx=10, pady=6)
 
     # -------- Professor approvals --------
     tk.Label(win, text="Professor Accounts (waiting)", font=("Arial", 12, "bold")).pack(pady=(14, 0))
-    prof_list = tk.Listbox(win, width=90, height=6)
+    prof_list = VirtualList(
+        win, runner,
+        lambda **page: service.get_professors_by_status("waiting", **page),
+        lambda: service.count_professors_by_status("waiting"),
+        format_row=lambda r: f"{r[0]} | {r[1]} | {r[2]} | {r[3]}",
+        page_key=lambda r: (r[0], r[1]), key=lambda r: r[0],
+        empty_text="No waiting professors", multiple=True, width=90, height=6
+    )
     prof_list.pack(pady=8)
 
     def refresh_prof_waiting():
-        prof_list.delete(0, tk.END)
-        rows = service.get_professors_by_status("waiting")
-        if not rows:
-            prof_list.insert(tk.END, "No waiting professors")
+        prof_list.refresh()
+
+    def set_selected_profs(status, verb):
+        if prof_list.all_selected:
+            # "Select All" covers rows that were never loaded: fetch just their ids
+            run_async(win, service.get_professors_by_status, "waiting",
+                      on_done=lambda rows: confirm_profs([r[0] for r in rows], status, verb))
+        else:
+            confirm_profs(prof_list.selected_keys(), status, verb)
+
+    def confirm_profs(ids, status, verb):
+        if not ids:
             return
-        for uid, name, email, status in rows:
-            prof_list.insert(tk.END, f"{uid} | {name} | {email} | {status}")
-
-    def _selected_prof_id():
-        if not prof_list.curselection():
-            return None
-        text = prof_list.get(prof_list.curselection()[0])
-        if "|" not in text:
-            return None
-        return int(text.split("|")[0].strip())
-
-    def approve_prof():
-        pid = _selected_prof_id()
-        if not pid:
+        if len(ids) > 1 and not messagebox.askyesno(verb, f"{verb} {len(ids)} professors?", parent=win):
             return
-        service.set_professor_account_status(pid, "approved")
-        refresh_prof_waiting()
-        messagebox.showinfo("Approved", "Professor approved.", parent=win)
 
-    def reject_prof():
-        pid = _selected_prof_id()
-        if not pid:
-            return
-        service.set_professor_account_status(pid, "rejected")
-        refresh_prof_waiting()
-        messagebox.showinfo("Rejected", "Professor rejected.", parent=win)
+        def on_done(ok):
+            if not ok:
+                messagebox.showwarning("Failed", "DB error.", parent=win)
+                return
+            prof_list.clear_selection()
+            prof_list.refresh()
+            messagebox.showinfo(status.title(), f"{len(ids)} professor(s) {status}.", parent=win)
+
+        run_async(win, service.set_professor_account_status_bulk, ids, status, on_done=on_done)
 
     prof_btn = tk.Frame(win)
     prof_btn.pack(pady=4)
-    tk.Button(prof_btn, text="Approve", width=12, command=approve_prof).pack(side="left", padx=10)
-    tk.Button(prof_btn, text="Reject", width=12, command=reject_prof).pack(side="left", padx=10)
+    tk.Button(prof_btn, text="Approve", width=12,
+              command=lambda: set_selected_profs("approved", "Approve")).pack(side="left", padx=10)
+    tk.Button(prof_btn, text="Reject", width=12,
+              command=lambda: set_selected_profs("rejected", "Reject")).pack(side="left", padx=10)
+    tk.Button(prof_btn, text="Select All", width=12,
+              command=prof_list.select_all).pack(side="left", padx=10)
+    tk.Button(prof_btn, text="Refresh", width=12, command=refresh_prof_waiting).pack(side="left", padx=10)
 
     tk.Button(
         win,
         text="Logout",
         width=12,
-        command=lambda: [win.destroy(), open_auth_window(root, "admin")]
+        command=lambda: logout(win, root, "admin")
     ).pack(pady=12)
 
-    refresh_courses()
-    refresh_prof_waiting()
+    feed = {"seq": None}  # service.changes_since() cursor
+
+    def on_feed(result):
+        # the lists load themselves when created, the first read only sets the cursor
+        full = result["full"] and feed["seq"] is not None
+        feed["seq"] = result["seq"]
+        entities = {c[1] for c in result["changes"]}
+        if full or "course" in entities:
+            refresh_courses()
+        if full or "professor" in entities:
+            refresh_prof_waiting()
+        if result["more"]:
+            read_feed()
+
+    def read_feed():
+        run_async(win, service.changes_since, feed["seq"], on_done=on_feed, key="feed")
+
+    def poll():
+        if not win.winfo_exists():
+            return
+        read_feed()
+        win.after(ADMIN_REFRESH_MS, poll)
+
+    poll()
 
 
 # ======================= PROFESSOR PANEL =======================
 def open_professor_panel(root, user_ctx):
     win = tk.Toplevel(root)
     win.title("Professor Panel")
-    win.geometry("760x520")
+    win.geometry("760x580")
     win.resizable(False, False)
     win.protocol("WM_DELETE_WINDOW", root.destroy)
+    bind_cancel(win)
 
     prof_id = user_ctx["user_id"]
     prof_name = user_ctx["user_name"]
 
     tk.Label(win, text=f"Professor Panel | Logged in: {prof_name}", font=("Arial", 14, "bold")).pack(pady=15)
 
-    def professor_view_courses():
-        rows = service.view_professor_courses_by_id(prof_id) or []
-        courses = [r[0] for r in rows]
-        messagebox.showinfo("My Courses", "\n".join(courses) if courses else "No assigned courses.", parent=win)
-
-    def professor_view_students():
+    def professor_open_roster():
+        def on_done(roster):
+            show_roster(roster or [])
+
+        run_async(win, service.get_professor_roster, prof_id, on_done=on_done, key="view")
+
+    def show_roster(roster):
+        top = tk.Toplevel(win)
+        top.title("My Classes")
+        top.geometry("720x480")
+        top.transient(win)
+        bind_cancel(top)
+
+        total = sum(len(students) for _, _, students in roster)
+        tk.Label(
+            top, text=f"{len(roster)} course(s), {total} enrolled student(s)", font=("Arial", 11, "bold")
+        ).pack(pady=8)
+
+        box = tk.Frame(top)
+        box.pack(fill="both", expand=True, padx=12)
+        tree = ttk.Treeview(box, columns=("email", "grade"), height=18)
+        tree.heading("#0", text="Course / Student")
+        tree.heading("email", text="Email")
+        tree.heading("grade", text="Grade")
+        tree.column("#0", width=300)
+        tree.column("email", width=260)
+        tree.column("grade", width=80)
+        scroll = tk.Scrollbar(box, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scroll.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scroll.pack(side="left", fill="y")
+
+        if not roster:
+            tree.insert("", tk.END, text="No assigned courses.")
+        for _, course_name, students in roster:
+            node = tree.insert("", tk.END, text=f"{course_name} ({len(students)})", open=len(roster) == 1)
+            for _, name, email, grade in students:
+                tree.insert(node, tk.END, text=name, values=(email, grade or "-"))
+
+        tk.Button(top, text="Close", width=12, command=top.destroy).pack(pady=8)
+
+    def professor_export_roster():
         course = select_course_dialog(win, "Select Course")
         if not course:
             return
-        rows = service.view_enrolled_students(cap(course)) or []
-        students = [r[0] for r in rows]
-        messagebox.showinfo("Enrolled Students", "\n".join(students) if students else "No students enrolled.", parent=win)
-
-    def professor_upload_grade():
-        sel = select_user_dialog(win, "Select Student", "student", only_approved_professors=False)
-        if not sel:
+        path = filedialog.asksaveasfilename(
+            parent=win, title="Export Roster", defaultextension=".csv",
+            initialfile=f"{cap(course)} roster.csv", filetypes=[("CSV files", "*.csv")]
+        )
+        if not path:
             return
-        sid, sname, _ = sel
 
-        course = select_course_dialog(win, "Select Course")
-        if not course:
+        def on_done(n):
+            if n is None:
+                messagebox.showwarning("Failed", "Course not found or not assigned to you.", parent=win)
+            else:
+                messagebox.showinfo("Exported", f"{n} student(s) written to\n{path}", parent=win)
+
+        run_async(win, service.export_enrolled_students_csv, cap(course), path,
+                  professor_id=prof_id, on_done=on_done, key="export")
+
+    def professor_open_gradebook():
+        def on_done(rows):
+            courses = [r[0] for r in rows or []]
+            if not courses:
+                messagebox.showinfo("Gradebook", "No assigned courses.", parent=win)
+                return
+            open_gradebook(courses)
+
+        run_async(win, service.view_professor_courses_by_id, prof_id, on_done=on_done, key="view")
+
+    def open_gradebook(courses):
+        top = tk.Toplevel(win)
+        top.title("Gradebook")
+        top.geometry("720x520")
+        top.transient(win)
+        bind_cancel(top)
+
+        state = {"course": None, "original": {}, "dirty": {}}
+
+        bar = tk.Frame(top)
+        bar.pack(fill="x", padx=12, pady=8)
+        tk.Label(bar, text="Course:").pack(side="left")
+        course_var = tk.StringVar(value=courses[0])
+        picker = ttk.Combobox(bar, textvariable=course_var, values=courses, state="readonly", width=40)
+        picker.pack(side="left", padx=6)
+
+        box = tk.Frame(top)
+        box.pack(fill="both", expand=True, padx=12)
+        tree = ttk.Treeview(box, columns=("name", "email", "grade"), show="headings", height=18)
+        for col, title, width in (("name", "Student", 240), ("email", "Email", 260), ("grade", "Grade", 100)):
+            tree.heading(col, text=title)
+            tree.column(col, width=width, anchor="w")
+        tree.tag_configure("dirty", background="#fff3b0")
+        tree.tag_configure("error", background="#f8c9c9")
+        scroll = tk.Scrollbar(box, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scroll.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scroll.pack(side="left", fill="y")
+
+        status = tk.Label(top, text="", anchor="w", fg="gray")
+        status.pack(fill="x", padx=12)
+
+        def show_status():
+            n = len(state["dirty"])
+            status.config(text=f"{len(state['original'])} student(s), {n} unsaved change(s)"
+                          " - double-click or Enter to edit a grade")
+
+        def confirm_discard():
+            return not state["dirty"] or messagebox.askyesno(
+                "Unsaved Changes", f"Discard {len(state['dirty'])} unsaved change(s)?", parent=top)
+
+        # ---- load (one query)
+        def load(_event=None):
+            if state["course"] == course_var.get():
+                return
+            if not confirm_discard():
+                course_var.set(state["course"])
+                return
+            course = course_var.get()
+
+            def on_done(rows):
+                if rows is None:
+                    messagebox.showwarning("Gradebook", "Course not found / not assigned to you.", parent=top)
+                    return
+                state["course"] = course
+                state["original"] = {str(uid): grade or "" for uid, _, _, grade in rows}
+                state["dirty"] = {}
+                tree.delete(*tree.get_children())
+                for uid, name, email, grade in rows:
+                    tree.insert("", tk.END, iid=str(uid), values=(name, email, grade or ""))
+                show_status()
+
+            status.config(text="Loading...")
+            run_async(top, service.get_gradebook, course, professor_id=prof_id, on_done=on_done, key="load")
+
+        picker.bind("<<ComboboxSelected>>", load)
+
+        # ---- in-place editing
+        editor = {"entry": None}
+
+        def set_grade(iid, value):
+            value = value.strip()
+            values = list(tree.item(iid, "values"))
+            values[2] = value
+            if value == state["original"].get(iid, ""):
+                state["dirty"].pop(iid, None)
+                tree.item(iid, values=values, tags=())
+            else:
+                state["dirty"][iid] = value
+                tree.item(iid, values=values, tags=("dirty",))
+            show_status()
+
+        def edit(iid):
+            close_editor()
+            bbox = tree.bbox(iid, "grade")
+            if not bbox:
+                return
+            x, y, w, h = bbox
+            entry = tk.Entry(tree)
+            entry.insert(0, tree.item(iid, "values")[2])
+            entry.select_range(0, tk.END)
+            entry.place(x=x, y=y, width=w, height=h)
+            entry.focus_set()
+            editor["entry"] = entry
+
+            def commit(move=0):
+                set_grade(iid, entry.get())
+                close_editor()
+                nxt = tree.next(iid) if move > 0 else tree.prev(iid) if move < 0 else ""
+                if nxt:
+                    tree.selection_set(nxt)
+                    tree.see(nxt)
+                    edit(nxt)
+                else:
+                    tree.focus_set()
+
+            def on_tab(_event):
+                commit(1)
+                return "break"
+
+            def on_escape(_event):
+                close_editor()
+                tree.focus_set()
+                return "break"  # don't let the window's Esc binding cancel loads
+
+            entry.bind("<Return>", lambda e: commit(1))
+            entry.bind("<Down>", lambda e: commit(1))
+            entry.bind("<Up>", lambda e: commit(-1))
+            entry.bind("<Tab>", on_tab)
+            entry.bind("<Escape>", on_escape)
+            entry.bind("<FocusOut>", lambda e: commit() if editor["entry"] is entry else None)
+
+        def close_editor():
+            entry, editor["entry"] = editor["entry"], None
+            if entry is not None:
+                entry.destroy()
+
+        def edit_selected(_event=None):
+            sel = tree.selection()
+            if sel:
+                edit(sel[0])
+
+        tree.bind("<Double-Button-1>", lambda e: edit(tree.identify_row(e.y)) if tree.identify_row(e.y) else None)
+        tree.bind("<Return>", edit_selected)
+
+        # ---- one batched save
+        def save():
+            close_editor()
+            if not state["dirty"]:
+                return
+            course = state["course"]
+            changes = {int(iid): grade for iid, grade in state["dirty"].items()}
+
+            def on_done(result):
+                rejected = {str(k): v for k, v in result["rejected"].items()}
+                # another course may have been loaded meanwhile: its rows are not the ones saved
+                if state["course"] == course:
+                    for iid, grade in changes.items():
+                        iid = str(iid)
+                        if not tree.exists(iid):
+                            continue
+                        if iid in rejected:
+                            if state["dirty"].get(iid) == grade:
+                                tree.item(iid, tags=("error",))
+                            continue
+                        state["original"][iid] = grade
+                        # re-check against the saved grade: the row may have been edited since
+                        set_grade(iid, tree.item(iid, "values")[2])
+                    show_status()
+                msg = f"Saved: {result['saved']}  Cleared: {result['cleared']}  Rejected: {len(rejected)}"
+                if state["course"] != course:
+                    msg = f"{course}\n\n{msg}"
+                if rejected:
+                    names = {iid: tree.item(iid, "values")[0] for iid in rejected if tree.exists(iid)}
+                    msg += "\n\n" + "\n".join(f"{names.get(i, i)}: {why}" for i, why in list(rejected.items())[:10])
+                    messagebox.showwarning("Gradebook", msg, parent=top)
+                else:
+                    messagebox.showinfo("Gradebook", msg, parent=top)
+
+            run_async(top, service.save_grades, course, changes, professor_id=prof_id, on_done=on_done, key="save")
+
+        def close():
+            if confirm_discard():
+                top.destroy()
+
+        btns = tk.Frame(top)
+        btns.pack(pady=8)
+        tk.Button(btns, text="Save Changes", width=16, command=save).pack(side="left", padx=6)
+        tk.Button(btns, text="Close", width=12, command=close).pack(side="left", padx=6)
+        top.protocol("WM_DELETE_WINDOW", close)
+        top.bind("<Control-s>", lambda e: save())
+
+        load()
+
+    def professor_import_grades():
+        path = filedialog.askopenfilename(
+            parent=win,
+            title="Import Gradebook CSV (student email or id, course, grade)",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not path:
             return
 
-        grade = simpledialog.askstring("Grade", f"Enter grade for {sname}:", parent=win)
-        if not grade:
+        def on_error(e):
+            if isinstance(e, (OSError, UnicodeDecodeError, csv.Error)):
+                messagebox.showerror("Import Failed", f"Could not read file:\n{e}", parent=win)
+            else:
+                messagebox.showerror("Import Failed", f"Database error: {e}", parent=win)
+
+        run_async(win, service.import_grades_csv, path, professor_id=prof_id,
+                  on_done=show_import_report, on_error=on_error, key="import")
+
+    def show_import_report(report):
+        rejected = report["rejected"]
+        msg = (
+            f"Rows: {report['rows']}\n"
+            f"Imported: {report['imported']}\n"
+            f"Rejected: {len(rejected)}\n"
+            f"Time: {report['seconds']:.1f}s"
+        )
+        if not rejected:
+            messagebox.showinfo("Import Done", msg, parent=win)
             return
 
-        ok = service.upload_student_grades_by_id(sid, cap(course), grade)
-        if ok:
-            messagebox.showinfo("Saved", "Grade saved.", parent=win)
-        else:
-            messagebox.showwarning("Failed", "Student not enrolled / wrong course / DB error.", parent=win)
+        preview = "\n".join(f"line {n}: {reason}" for n, _, reason in rejected[:10])
+        if not messagebox.askyesno("Import Done", f"{msg}\n\n{preview}\n\nSave rejected rows to a file?", parent=win):
+            return
+        out = filedialog.asksaveasfilename(
+            parent=win, title="Save Rejected Rows", defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not out:
+            return
+        with open(out, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["line", "reason", "row"])
+            for n, row, reason in rejected:
+                w.writerow([n, reason] + list(row))
 
-    tk.Button(win, text="View My Courses", width=32, command=professor_view_courses).pack(pady=10)
-    tk.Button(win, text="View Students in Course", width=32, command=professor_view_students).pack(pady=10)
-    tk.Button(win, text="Upload Student Grade (Dropdown)", width=32, command=professor_upload_grade).pack(pady=10)
+    tk.Button(win, text="My Classes (Roster)", width=32, command=professor_open_roster).pack(pady=10)
+    tk.Button(win, text="Gradebook", width=32, command=professor_open_gradebook).pack(pady=10)
+    tk.Button(win, text="Import Grades (CSV)", width=32, command=professor_import_grades).pack(pady=10)
+    tk.Button(win, text="Export Roster (CSV)", width=32, command=professor_export_roster).pack(pady=10)
 
     tk.Button(
         win,
         text="Logout",
         width=12,
-        command=lambda: [win.destroy(), open_auth_window(root, "professor")]
+        command=lambda: logout(win, root, "professor")
     ).pack(pady=15)
 
 
@@ -470,45 +936,72 @@ def open_professor_panel(root, user_ctx):
 def open_student_panel(root, user_ctx):
     win = tk.Toplevel(root)
     win.title("Student Panel")
-    win.geometry("760x480")
+    win.geometry("760x560")
     win.resizable(False, False)
     win.protocol("WM_DELETE_WINDOW", root.destroy)
+    bind_cancel(win)
 
     student_id = user_ctx["user_id"]
     student_name = user_ctx["user_name"]
 
     tk.Label(win, text=f"Student Panel | Logged in: {student_name}", font=("Arial", 14, "bold")).pack(pady=15)
 
+    # ---- My courses & grades (one query via get_student_dashboard)
+    tk.Label(win, text="My Courses & Grades", font=("Arial", 11, "bold")).pack()
+    box = tk.Frame(win)
+    box.pack(padx=20, pady=8, fill="both")
+    columns = ("course", "status", "grade", "fees", "duration")
+    table = ttk.Treeview(box, columns=columns, show="headings", height=12)
+    for col, title, width in (
+        ("course", "Course", 280), ("status", "Status", 100), ("grade", "Grade", 80),
+        ("fees", "Fees", 100), ("duration", "Duration", 120),
+    ):
+        table.heading(col, text=title)
+        table.column(col, width=width, anchor="w")
+    scroll = tk.Scrollbar(box, orient="vertical", command=table.yview)
+    table.configure(yscrollcommand=scroll.set)
+    table.pack(side="left", fill="both", expand=True)
+    scroll.pack(side="left", fill="y")
+    summary = tk.Label(win, text="Loading...", anchor="w", fg="gray")
+    summary.pack(padx=20, fill="x")
+
+    def refresh_dashboard():
+        def on_done(rows):
+            table.delete(*table.get_children())
+            rows = rows or []
+            for course, status, grade, fees, duration in rows:
+                table.insert("", tk.END, values=(course, status, grade or "-", fees, duration))
+            enrolled = sum(1 for r in rows if r[1] == "enrolled")
+            graded = sum(1 for r in rows if r[2])
+            summary.config(text=f"{enrolled} enrolled, {len(rows)} total, {graded} graded" if rows else "No courses yet.")
+
+        run_async(win, service.get_student_dashboard, student_id, on_done=on_done, key="dashboard")
+
     def student_enroll_course():
         course = select_course_dialog(win, "Select Course")
         if not course:
             return
-        ok = service.enroll_student_by_id(student_id, cap(course))
-        messagebox.showinfo(
-            "Enrolled" if ok else "Failed",
-            f"{student_name} -> {cap(course)}" if ok else "Course not found / DB error.",
-            parent=win
-        )
-
-    def student_view_courses():
-        rows = service.view_student_courses_by_id(student_id) or []
-        courses = [r[0] for r in rows]
-        messagebox.showinfo("My Courses", "\n".join(courses) if courses else "No courses found.", parent=win)
+        def on_done(ok):
+            messagebox.showinfo(
+                "Enrolled" if ok else "Failed",
+                f"{student_name} -> {cap(course)}" if ok else "Course not found / DB error.",
+                parent=win
+            )
+            if ok:
+                refresh_dashboard()
 
-    def student_view_grade():
-        course = select_course_dialog(win, "Select Course")
-        if not course:
-            return
-        g = service.view_student_grades_by_id(student_id, cap(course))
-        messagebox.showinfo("My Grade", g if g else "No grade found yet.", parent=win)
+        run_async(win, service.enroll_student_by_id, student_id, cap(course), on_done=on_done)
 
-    tk.Button(win, text="Enroll in Course", width=32, command=student_enroll_course).pack(pady=10)
-    tk.Button(win, text="View My Courses", width=32, command=student_view_courses).pack(pady=10)
-    tk.Button(win, text="View My Grade", width=32, command=student_view_grade).pack(pady=10)
+    btns = tk.Frame(win)
+    btns.pack(pady=8)
+    tk.Button(btns, text="Enroll in Course", width=20, command=student_enroll_course).pack(side="left", padx=8)
+    tk.Button(btns, text="Refresh", width=12, command=refresh_dashboard).pack(side="left", padx=8)
 
     tk.Button(
         win,
         text="Logout",
         width=12,
-        command=lambda: [win.destroy(), open_auth_window(root, "student")]
-    ).pack(pady=15)
+        command=lambda: logout(win, root, "student")
+    ).pack(pady=10)
+
+    refresh_dashboard()
@@ -0,0 +1,168 @@
+"""
+Per-statement timing for DB.run / run_many / stream.
+
+Statements are grouped by normalized SQL (literals, %s and IN/VALUES lists collapsed),
+so `WHERE user_id IN (%s,%s,%s)` and `IN (%s)` count as one query.
+
+    from query_stats import STATS
+    print(STATS.report())          # p50/p95/p99 per statement, slowest total first
+
+Slow statements (>= SLOW_QUERY_SECS) are logged on the "university_erp.db" logger with
+their parameters redacted. Set UNIVERSITY_DB_STATS_ON_EXIT=1 to print the report at exit,
+or send SIGUSR1 (where the OS has it) to print it from a running process.
+"""
+import atexit
+import logging
+import math
+import os
+import re
+import signal
+import sys
+import threading
+
+SLOW_QUERY_SECS = float(os.environ.get("UNIVERSITY_DB_SLOW_QUERY_SECS", "0.5"))
+SAMPLES_PER_QUERY = 2048  # latency samples kept per statement (ring buffer)
+
+log = logging.getLogger("university_erp.db")
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_ROW_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    sql = _SPACES.sub(" ", sql.strip())
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _ROW_LIST.sub("(...)", sql)
+    return sql
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    # nearest-rank
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class _Entry:
+    __slots__ = ("calls", "rows", "errors", "total", "max", "samples", "pos")
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+        self.pos = 0
+
+    def add(self, seconds, rows, error):
+        self.calls += 1
+        self.rows += max(rows or 0, 0)
+        self.errors += 1 if error else 0
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.samples) < SAMPLES_PER_QUERY:
+            self.samples.append(seconds)
+        else:
+            self.samples[self.pos] = seconds
+            self.pos = (self.pos + 1) % SAMPLES_PER_QUERY
+
+
+class QueryStats:
+    def __init__(self, slow_query_secs=SLOW_QUERY_SECS):
+        self.slow_query_secs = slow_query_secs
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def record(self, sql, seconds, rows=0, params=None, error=False):
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            entry.add(seconds, rows, error)
+
+        if self.slow_query_secs is not None and seconds >= self.slow_query_secs:
+            n = len(params) if isinstance(params, (list, tuple, dict)) else (0 if params is None else 1)
+            log.warning(
+                "slow query %.3fs rows=%s: %s [%d param(s) redacted]",
+                seconds, rows, _SPACES.sub(" ", sql.strip()), n
+            )
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        """
+        list[dict] per normalized statement, slowest total time first.
+        Times are in milliseconds.
+        """
+        with self._lock:
+            items = [(k, e.calls, e.rows, e.errors, e.total, e.max, sorted(e.samples))
+                     for k, e in self._entries.items()]
+
+        out = []
+        for sql, calls, rows, errors, total, mx, samples in items:
+            out.append({
+                "sql": sql,
+                "calls": calls,
+                "rows": rows,
+                "errors": errors,
+                "total_ms": total * 1000,
+                "avg_ms": total / calls * 1000 if calls else 0.0,
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "p99_ms": percentile(samples, 99) * 1000,
+                "max_ms": mx * 1000,
+            })
+        out.sort(key=lambda r: r["total_ms"], reverse=True)
+        return out
+
+    def report(self, top=25, width=90):
+        rows = self.snapshot()[:top]
+        if not rows:
+            return "No queries recorded."
+        lines = [
+            f"{'calls':>7} {'rows':>9} {'total ms':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  sql",
+        ]
+        for r in rows:
+            sql = r["sql"] if len(r["sql"]) <= width else r["sql"][:width - 3] + "..."
+            lines.append(
+                f"{r['calls']:>7} {r['rows']:>9} {r['total_ms']:>10.1f} {r['p50_ms']:>8.2f} "
+                f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f}  {sql}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, file=None):
+        print(self.report(), file=file or sys.stderr, flush=True)
+
+
+# one registry per process, shared by every DB
+STATS = QueryStats()
+
+
+def install_signal_handler(stats=STATS, signum=getattr(signal, "SIGUSR1", None)):
+    """`kill -USR1 <pid>` prints the report to stderr. No-op on Windows."""
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def handler(*_):
+        # the signal can land while this very thread holds stats._lock or is writing to
+        # stderr, so the report is built on a thread of its own, never in the handler
+        threading.Thread(target=stats.dump, name="query-stats-dump", daemon=True).start()
+
+    signal.signal(signum, handler)
+    return True
+
+
+if os.environ.get("UNIVERSITY_DB_STATS_ON_EXIT"):
+    atexit.register(STATS.dump)
@@ -0,0 +1,340 @@
+"""
+Embedded SQLite engine for laptops, CI boxes and offline demos (no MySQL server needed).
+
+    UNIVERSITY_DB_BACKEND=sqlite UNIVERSITY_DB_SQLITE_PATH=erp.sqlite3 python init_db_newschema.py
+    UNIVERSITY_DB_BACKEND=sqlite UNIVERSITY_DB_SQLITE_PATH=erp.sqlite3 python Admin/admin_app.py
+
+CourseService keeps writing MySQL dialect. SQLiteConnection translates each statement
+(%s, INSERT IGNORE, ON DUPLICATE KEY UPDATE, LOCK IN SHARE MODE, LIKE escapes) and
+mimics the part of the pymysql connection API that db.py uses; sqlite3 errors are
+re-raised as the matching pymysql.err classes, so callers catch one set of exceptions
+(a busy database becomes 1205 "lock wait timeout", which DB.atomic() retries).
+
+Connections run in WAL mode (readers never block the writer) with synchronous=NORMAL
+and a bigger page cache. Needs SQLite >= 3.35 (upserts without a conflict target).
+"""
+import functools
+import re
+import sqlite3
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+BUSY_TIMEOUT_MS = 5000
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",     # WAL + NORMAL: durable across app crashes, fsync per checkpoint
+    "PRAGMA foreign_keys=ON",        # ON DELETE CASCADE like InnoDB
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA cache_size=-65536",      # 64 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+]
+MIN_VERSION = (3, 35, 0)
+
+
+# ======================= dialect =======================
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\s+INTO\b", re.IGNORECASE)
+_UPSERT = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_VALUES_REF = re.compile(r"\bVALUES\s*\(\s*(\w+)\s*\)", re.IGNORECASE)
+_LOCKING = re.compile(r"\s+(?:LOCK\s+IN\s+SHARE\s+MODE|FOR\s+UPDATE|FOR\s+SHARE)\b", re.IGNORECASE)
+_LIKE_PARAM = re.compile(r"\bLIKE\s+\?(?!\s*ESCAPE)", re.IGNORECASE)
+_NOW6 = re.compile(r"\bCURRENT_TIMESTAMP\(6\)", re.IGNORECASE)
+
+# CURRENT_TIMESTAMP(6): UTC text with milliseconds, sorts like the MySQL TIMESTAMP(6) columns
+NOW = "strftime('%Y-%m-%d %H:%M:%f','now')"
+
+
+@functools.lru_cache(maxsize=2048)
+def translate(sql):
+    """MySQL statement as written in course_service.py -> SQLite statement."""
+    # leave string literals alone, rewrite the code between them
+    parts = []
+    pos = 0
+    for m in _STRING.finditer(sql):
+        parts.append(_translate_code(sql[pos:m.start()]))
+        parts.append(m.group(0).replace("\\'", "''"))
+        pos = m.end()
+    parts.append(_translate_code(sql[pos:]))
+    return "".join(parts)
+
+
+def _translate_code(code):
+    code = code.replace("%s", "?")
+    code = _INSERT_IGNORE.sub("INSERT OR IGNORE INTO", code)
+    code = _UPSERT.sub("ON CONFLICT DO UPDATE SET", code)
+    code = _VALUES_REF.sub(r"excluded.\1", code)
+    code = _LOCKING.sub("", code)
+    code = _NOW6.sub(NOW, code)
+    # MySQL LIKE escapes with backslash by default, SQLite has no default escape character
+    code = _LIKE_PARAM.sub("LIKE ? ESCAPE '\\\\'", code)
+    return code
+
+
+def _map_error(e):
+    msg = str(e)
+    if isinstance(e, sqlite3.IntegrityError):
+        if "FOREIGN KEY" in msg:
+            return pymysql.err.IntegrityError(1452, msg)
+        if "NOT NULL" in msg:
+            return pymysql.err.IntegrityError(1048, msg)
+        return pymysql.err.IntegrityError(1062, msg)
+    if isinstance(e, sqlite3.OperationalError):
+        if "locked" in msg or "busy" in msg:
+            return pymysql.err.OperationalError(1205, msg)
+        if "syntax" in msg or "no such" in msg:
+            return pymysql.err.ProgrammingError(1064, msg)
+        return pymysql.err.OperationalError(1105, msg)
+    if isinstance(e, sqlite3.ProgrammingError):
+        return pymysql.err.ProgrammingError(1064, msg)
+    return pymysql.err.InternalError(1105, msg)
+
+
+# ======================= pymysql look-alike =======================
+class SQLiteCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self._cur = conn._db.cursor()
+
+    def execute(self, query, params=None):
+        try:
+            self._cur.execute(translate(query), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _map_error(e) from e
+        return self._cur.rowcount
+
+    def executemany(self, query, seq_params):
+        try:
+            self._cur.executemany(translate(query), [tuple(p) for p in seq_params])
+        except sqlite3.Error as e:
+            raise _map_error(e) from e
+        return self._cur.rowcount
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cur.fetchmany(size or self._cur.arraysize)
+
+    def fetchall(self):
+        # pymysql returns a tuple of tuples; cached results rely on that being immutable
+        return tuple(self._cur.fetchall())
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    def close(self):
+        self._cur.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteConnection:
+    """The subset of pymysql.connections.Connection that DB / ConnectionPool use."""
+
+    def __init__(self, path):
+        if sqlite3.sqlite_version_info < MIN_VERSION:
+            raise RuntimeError(f"SQLite {sqlite3.sqlite_version} is too old, need >= 3.35")
+        # autocommit mode (isolation_level=None); begin() opens explicit transactions.
+        # Pooled connections move between threads, one thread at a time.
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False,
+                                   timeout=BUSY_TIMEOUT_MS / 1000)
+        # Unicode-aware LOWER(), so course_key matches CourseService._course_key() like MySQL does
+        self._db.create_function("lower", 1, lambda s: s.lower() if isinstance(s, str) else s,
+                                 deterministic=True)
+        for pragma in PRAGMAS:
+            self._db.execute(pragma)
+        self.path = path
+        self.open = True
+
+    def cursor(self, cursorclass=None):
+        # every sqlite3 cursor already streams, so SSCursor needs nothing special
+        return SQLiteCursor(self)
+
+    def begin(self):
+        # IMMEDIATE takes the write lock up front: two writers can't deadlock upgrading a read lock
+        self._execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        if self._db.in_transaction:
+            self._execute("COMMIT")
+
+    def rollback(self):
+        if self._db.in_transaction:
+            self._execute("ROLLBACK")
+
+    def _execute(self, sql):
+        try:
+            self._db.execute(sql)
+        except sqlite3.Error as e:
+            raise _map_error(e) from e
+
+    @property
+    def server_status(self):
+        return SERVER_STATUS.SERVER_STATUS_IN_TRANS if self._db.in_transaction else 0
+
+    def ping(self, reconnect=True):
+        if not self.open:
+            raise pymysql.err.OperationalError(2006, "SQLite connection is closed")
+
+    def thread_id(self):
+        return id(self)
+
+    def close(self):
+        if self.open:
+            self.open = False
+            self._db.close()
+
+
+# ======================= schema =======================
+# Same tables/indexes as migrations.py, in SQLite syntax: version 4 is the baseline,
+# every later MySQL migration gets a matching entry here.
+SCHEMA = [
+    (4, "baseline (MySQL migrations 1-4)", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+          user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+          user_name TEXT NOT NULL,
+          password TEXT NOT NULL,
+          email TEXT NOT NULL UNIQUE,
+          role TEXT NOT NULL CHECK (role IN ('admin','professor','student')),
+          mobile_no TEXT,
+          created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_users_role_name ON users(role, user_name)",
+        """
+        CREATE TABLE IF NOT EXISTS admin (
+          admin_id INTEGER PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE ON UPDATE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS professor (
+          professor_id INTEGER PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE ON UPDATE CASCADE,
+          status TEXT DEFAULT 'waiting' CHECK (status IN ('waiting','approved','rejected'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS student (
+          student_id INTEGER PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE ON UPDATE CASCADE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS course (
+          course_id INTEGER PRIMARY KEY AUTOINCREMENT,
+          course_name TEXT NOT NULL,
+          course_key TEXT GENERATED ALWAYS AS (LOWER(TRIM(course_name))) STORED NOT NULL,
+          course_fees NUMERIC NOT NULL,
+          course_duration TEXT NOT NULL
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_course_key ON course(course_key)",
+        """
+        CREATE TABLE IF NOT EXISTS course_professor (
+          course_id INTEGER NOT NULL REFERENCES course(course_id) ON DELETE CASCADE ON UPDATE CASCADE,
+          professor_id INTEGER NOT NULL REFERENCES professor(professor_id) ON DELETE CASCADE ON UPDATE CASCADE,
+          status TEXT DEFAULT 'active' CHECK (status IN ('active','inactive')),
+          PRIMARY KEY (course_id, professor_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_course_professor_professor ON course_professor(professor_id)",
+        """
+        CREATE TABLE IF NOT EXISTS enrollment (
+          course_id INTEGER NOT NULL REFERENCES course(course_id) ON DELETE CASCADE ON UPDATE CASCADE,
+          student_id INTEGER NOT NULL REFERENCES student(student_id) ON DELETE CASCADE ON UPDATE CASCADE,
+          status TEXT DEFAULT 'enrolled' CHECK (status IN ('enrolled','completed','dropped')),
+          PRIMARY KEY (course_id, student_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_enrollment_student ON enrollment(student_id)",
+        """
+        CREATE TABLE IF NOT EXISTS grades (
+          course_id INTEGER NOT NULL REFERENCES course(course_id) ON DELETE CASCADE ON UPDATE CASCADE,
+          student_id INTEGER NOT NULL REFERENCES student(student_id) ON DELETE CASCADE ON UPDATE CASCADE,
+          grade TEXT NOT NULL,
+          PRIMARY KEY (course_id, student_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_grades_student ON grades(student_id)",
+        """
+        CREATE TABLE IF NOT EXISTS professor_course_requests (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          professor_name TEXT NOT NULL,
+          course_name TEXT NOT NULL,
+          status TEXT DEFAULT 'pending' CHECK (status IN ('pending','accepted','rejected')),
+          requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+          UNIQUE (professor_name, course_name)
+        )
+        """,
+    ]),
+    (5, "change log for CourseService.changes_since", [
+        # AUTOINCREMENT: a seq is never handed out twice, even after the newest rows are purged
+        f"""
+        CREATE TABLE IF NOT EXISTS change_log (
+          seq INTEGER PRIMARY KEY AUTOINCREMENT,
+          entity TEXT NOT NULL,
+          entity_id INTEGER NOT NULL,
+          ref_id INTEGER,
+          op TEXT NOT NULL CHECK (op IN ('insert','update','delete')),
+          changed_at TEXT NOT NULL DEFAULT ({NOW})
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_change_log_at ON change_log(changed_at)",
+    ]),
+]
+
+
+def connect(path):
+    return SQLiteConnection(path)
+
+
+def current_version(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='schema_version'")
+        if not cur.fetchone()[0]:
+            return 0
+        cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        return cur.fetchone()[0]
+
+
+def ensure_schema(conn, log=None):
+    """Create / upgrade the SQLite schema. Returns the versions applied."""
+    applied = []
+    with conn.cursor() as cur:
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "  version INTEGER PRIMARY KEY,"
+            "  description TEXT NOT NULL,"
+            "  applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+            ")"
+        )
+        version = current_version(conn)
+        for v, description, statements in SCHEMA:
+            if v <= version:
+                continue
+            if log:
+                log(f"-> {v}: {description}")
+            conn.begin()
+            try:
+                for sql in statements:
+                    cur.execute(sql)
+                cur.execute("INSERT INTO schema_version(version, description) VALUES(%s,%s)", (v, description))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(v)
+    return applied
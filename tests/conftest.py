@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from course_service import CourseService  # noqa: E402
+from db import DB  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DB(backend="sqlite", sqlite_path=str(tmp_path / "erp.sqlite3"), max_size=2)
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def service(db):
+    return CourseService(db=db)
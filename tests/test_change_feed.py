@@ -0,0 +1,128 @@
+"""CourseService.changes_since on the SQLite backend: cursors, seq gaps, purges, paging."""
+import course_service
+from course_service import CHANGE_OVERLAP_SECS, _stamp_minus
+
+
+def log_row(service, seq, seconds_ago=0.0, entity="course", entity_id=1):
+    """A change_log row with an explicit seq, as if its transaction committed `seconds_ago`."""
+    changed_at = _stamp_minus(service._db_now(), seconds_ago)
+    service.db.run(
+        "INSERT INTO change_log(seq, entity, entity_id, op, changed_at) VALUES (%s, %s, %s, 'update', %s)",
+        (seq, entity, entity_id, changed_at)
+    )
+
+
+def seqs(feed):
+    return [c[0] for c in feed["changes"]]
+
+
+def test_first_call_is_full(service):
+    feed = service.changes_since(None)
+    assert feed["full"] is True
+    assert feed["changes"] == []
+    # an empty log: the cursor is valid and there is nothing newer
+    assert service.changes_since(feed["seq"]) == {"seq": 0, "full": False, "more": False, "changes": []}
+
+
+def test_writes_are_logged_in_order(service):
+    start = service.changes_since(None)["seq"]
+    service.add_course("Feed Course")
+    ok, user = service.register_user("Feed Student", "feed@x.edu", "pw", "student")
+    assert ok
+    service.enroll_student_by_id(user["user_id"], "Feed Course")
+    cid = service._get_course_id("Feed Course")
+
+    feed = service.changes_since(start)
+    assert not feed["full"] and not feed["more"]
+    assert [c[1:] for c in feed["changes"]] == [
+        ("course", cid, "insert"),
+        ("user", user["user_id"], "insert"),
+        ("enrollment", (cid, user["user_id"]), "update"),
+    ]
+    assert feed["seq"] == feed["changes"][-1][0]
+    assert service.changes_since(feed["seq"])["changes"] == []
+
+
+def test_young_gap_waits(service):
+    log_row(service, 1)
+    log_row(service, 3)  # seq 2 may still be an open transaction
+    feed = service.changes_since(0)
+    assert seqs(feed) == [1]
+    assert feed["seq"] == 1
+    assert not feed["more"]
+
+    # the missing row commits: the next call returns it and what follows
+    log_row(service, 2)
+    feed = service.changes_since(feed["seq"])
+    assert seqs(feed) == [2, 3]
+
+
+def test_old_gap_is_skipped(service):
+    log_row(service, 1, seconds_ago=CHANGE_OVERLAP_SECS * 4)
+    log_row(service, 3, seconds_ago=CHANGE_OVERLAP_SECS * 2)  # seq 2 rolled back long ago
+    feed = service.changes_since(0)
+    assert seqs(feed) == [1, 3]
+    assert feed["seq"] == 3
+
+
+def test_gap_at_the_cursor_waits_too(service):
+    for seq in range(1, 4):
+        log_row(service, seq, seconds_ago=60)
+    log_row(service, 5)
+    feed = service.changes_since(3)  # seq 4 is missing right after the cursor
+    assert feed["changes"] == [] and feed["seq"] == 3 and not feed["full"]
+
+
+def test_cursor_before_purged_rows_is_full(service):
+    for seq in range(10, 15):
+        log_row(service, seq, seconds_ago=60)
+    feed = service.changes_since(3)  # rows 4..9 were purged
+    assert feed["full"] is True
+    assert feed["changes"] == []
+    # the full reload cursor continues without another full reload
+    nxt = service.changes_since(feed["seq"])
+    assert not nxt["full"]
+    assert seqs(nxt) == [s for s in range(10, 15) if s > feed["seq"]]
+
+    # the row right before the oldest kept one is still a valid cursor
+    assert not service.changes_since(9)["full"]
+
+
+def test_cursor_ahead_of_the_log_is_full(service):
+    log_row(service, 1, seconds_ago=60)
+    assert service.changes_since(50)["full"] is True
+
+
+def test_more_paginates(service):
+    for seq in range(1, 8):
+        log_row(service, seq, seconds_ago=60)
+    seen, seq, calls = [], 0, 0
+    while True:
+        feed = service.changes_since(seq, limit=3)
+        calls += 1
+        seen += seqs(feed)
+        seq = feed["seq"]
+        if not feed["more"]:
+            break
+    assert seen == list(range(1, 8))
+    assert calls == 3
+    assert service.changes_since(seq)["changes"] == []
+
+
+def test_limit_is_clamped(service, monkeypatch):
+    monkeypatch.setattr(course_service, "CHANGE_LOG_MAX_LIMIT", 2)
+    for seq in range(1, 5):
+        log_row(service, seq, seconds_ago=60)
+    feed = service.changes_since(0, limit=100)
+    assert seqs(feed) == [1, 2] and feed["more"]
+    assert seqs(service.changes_since(0, limit=0)) == [1]
+
+
+def test_purge_keeps_recent_rows(service):
+    for seq in range(1, 6):
+        log_row(service, seq, seconds_ago=10 * 86400)
+    log_row(service, 6)
+    assert service.purge_change_log(keep_days=7, batch=2) == 5
+    assert service.db.run("SELECT seq FROM change_log", fetch=True) == ((6,),)
+    assert service.changes_since(0)["full"] is True
+    assert seqs(service.changes_since(5)) == [6]
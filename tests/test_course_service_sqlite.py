@@ -0,0 +1,68 @@
+"""CourseService end to end on a temporary SQLite file."""
+
+
+def register(service, name, email, role):
+    ok, user = service.register_user(name, email, "secret", role)
+    assert ok, user
+    return user["user_id"]
+
+
+def test_register_and_login(service):
+    sid = register(service, "Ada Lovelace", "ada@uni.edu", "student")
+
+    ok, _ = service.register_user("Ada Again", "ada@uni.edu", "secret", "student")
+    assert not ok
+    assert service.login_user("ada@uni.edu", "wrong", "student")[0] is False
+    assert service.login_user("ada@uni.edu", "secret", "professor")[0] is False
+    ok, user = service.login_user("ada@uni.edu", "secret", "student")
+    assert ok and user["user_id"] == sid
+
+
+def test_professor_needs_approval(service):
+    pid = register(service, "Alan Turing", "alan@uni.edu", "professor")
+    assert service.login_user("alan@uni.edu", "secret", "professor")[0] is False
+    assert [r[0] for r in service.get_professors_by_status("waiting")] == [pid]
+
+    assert service.set_professor_account_status(pid, "approved")
+    assert service.login_user("alan@uni.edu", "secret", "professor")[0] is True
+    assert service.get_professors_by_status("waiting") == []
+
+
+def test_courses_paginate(service):
+    for name in ("Physics", "Algebra", "Biology", "Chemistry"):
+        assert service.add_course(name)
+    assert not service.add_course("physics")  # same course_key
+
+    assert service.count_courses() == 4
+    first = service.show_courses(limit=2)
+    assert [r[0] for r in first] == ["Algebra", "Biology"]
+    rest = service.show_courses(after=first[-1][0], limit=2)
+    assert [r[0] for r in rest] == ["Chemistry", "Physics"]
+    assert [r[1] for r in service.search_courses("ch")] == ["Chemistry"]
+
+
+def test_enroll_grade_and_delete(service):
+    sid = register(service, "Grace Hopper", "grace@uni.edu", "student")
+    pid = register(service, "Edsger Dijkstra", "edsger@uni.edu", "professor")
+    service.set_professor_account_status(pid, "approved")
+    service.add_course("Compilers")
+
+    assert service.assign_professor_to_course_by_id(pid, "Compilers")
+    assert service.enroll_student_by_id(sid, "Compilers")
+    assert service.enroll_student_by_id(sid, "Compilers")  # re-enrolling is idempotent
+    assert not service.enroll_student_by_id(sid, "Nope")
+    assert list(service.view_student_courses_by_id(sid)) == [("Compilers",)]
+
+    assert service.upload_student_grades_by_id(sid, "Compilers", "A", professor_id=pid)
+    assert service.view_student_grades_by_id(sid, "Compilers") == "A"
+    assert service.get_gradebook("Compilers", professor_id=pid) == [(sid, "Grace Hopper", "grace@uni.edu", "A")]
+
+    result = service.save_grades("Compilers", {sid: "B+"}, professor_id=pid)
+    assert result["saved"] == 1 and not result["rejected"]
+    dashboard = service.get_student_dashboard(sid)
+    assert [(r[0], r[1], r[2]) for r in dashboard] == [("Compilers", "enrolled", "B+")]
+
+    assert service.delete_course("Compilers")
+    assert not service.view_student_courses_by_id(sid)
+    assert not service.get_student_dashboard(sid)
+    assert service.view_student_grades_by_id(sid, "Compilers") is None
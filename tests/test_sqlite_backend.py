@@ -0,0 +1,96 @@
+"""sqlite_backend: MySQL -> SQLite statement translation and error mapping."""
+import sqlite3
+
+import pymysql
+import pytest
+
+from sqlite_backend import NOW, _map_error, translate
+
+
+def test_placeholders():
+    assert translate("SELECT * FROM users WHERE email=%s AND role=%s") == \
+        "SELECT * FROM users WHERE email=? AND role=?"
+
+
+def test_string_literals_are_left_alone():
+    assert translate("SELECT '%s FOR UPDATE' FROM course WHERE course_id=%s") == \
+        "SELECT '%s FOR UPDATE' FROM course WHERE course_id=?"
+    assert translate(r"SELECT 'it\'s' FROM course") == "SELECT 'it''s' FROM course"
+
+
+def test_insert_ignore():
+    assert translate("INSERT IGNORE INTO student(student_id) VALUES(%s)") == \
+        "INSERT OR IGNORE INTO student(student_id) VALUES(?)"
+    assert translate("insert  ignore  into admin(admin_id) VALUES(%s)") == \
+        "INSERT OR IGNORE INTO admin(admin_id) VALUES(?)"
+
+
+def test_upsert():
+    sql = translate(
+        "INSERT INTO grades(course_id, student_id, grade) VALUES(%s,%s,%s) "
+        "ON DUPLICATE KEY UPDATE grade=VALUES(grade)"
+    )
+    assert sql == (
+        "INSERT INTO grades(course_id, student_id, grade) VALUES(?,?,?) "
+        "ON CONFLICT DO UPDATE SET grade=excluded.grade"
+    )
+
+
+@pytest.mark.parametrize("clause", ["FOR UPDATE", "LOCK IN SHARE MODE", "FOR SHARE", "for  update"])
+def test_locking_clauses_are_dropped(clause):
+    assert translate(f"SELECT status FROM professor WHERE professor_id=%s {clause}") == \
+        "SELECT status FROM professor WHERE professor_id=?"
+
+
+def test_like_gets_backslash_escape():
+    assert translate("SELECT course_name FROM course WHERE course_key LIKE %s") == \
+        "SELECT course_name FROM course WHERE course_key LIKE ? ESCAPE '\\'"
+    # an explicit ESCAPE is kept as written
+    assert translate("SELECT 1 FROM course WHERE course_key LIKE %s ESCAPE '!'") == \
+        "SELECT 1 FROM course WHERE course_key LIKE ? ESCAPE '!'"
+
+
+def test_current_timestamp_6():
+    assert translate("SELECT CURRENT_TIMESTAMP(6)") == f"SELECT {NOW}"
+
+
+def test_translated_statements_run(db):
+    for name in ("50%_off", "500 Days"):
+        db.run("INSERT INTO course(course_name, course_fees, course_duration) VALUES(%s, 0, 'NA')", (name,))
+    rows = db.run(
+        "SELECT course_name FROM course WHERE course_key LIKE %s FOR UPDATE",
+        ("50\\%\\_%",),
+        fetch=True
+    )
+    assert [r[0] for r in rows] == ["50%_off"]
+
+
+@pytest.mark.parametrize("error, kind, code", [
+    (sqlite3.IntegrityError("UNIQUE constraint failed: users.email"), pymysql.err.IntegrityError, 1062),
+    (sqlite3.IntegrityError("FOREIGN KEY constraint failed"), pymysql.err.IntegrityError, 1452),
+    (sqlite3.IntegrityError("NOT NULL constraint failed: users.email"), pymysql.err.IntegrityError, 1048),
+    (sqlite3.OperationalError("database is locked"), pymysql.err.OperationalError, 1205),
+    (sqlite3.OperationalError("database table is busy"), pymysql.err.OperationalError, 1205),
+    (sqlite3.OperationalError('near "SELEC": syntax error'), pymysql.err.ProgrammingError, 1064),
+    (sqlite3.OperationalError("no such table: nope"), pymysql.err.ProgrammingError, 1064),
+    (sqlite3.OperationalError("disk I/O error"), pymysql.err.OperationalError, 1105),
+    (sqlite3.ProgrammingError("Incorrect number of bindings supplied"), pymysql.err.ProgrammingError, 1064),
+    (sqlite3.DatabaseError("file is not a database"), pymysql.err.InternalError, 1105),
+])
+def test_map_error(error, kind, code):
+    mapped = _map_error(error)
+    assert type(mapped) is kind
+    assert mapped.args[0] == code
+
+
+def test_errors_surface_as_pymysql(db):
+    db.run("INSERT INTO users(user_name,password,email,role) VALUES('A','x','a@x.edu','student')")
+    with pytest.raises(pymysql.err.IntegrityError) as dup:
+        db.run("INSERT INTO users(user_name,password,email,role) VALUES('B','x','a@x.edu','student')")
+    assert dup.value.args[0] == 1062
+    with pytest.raises(pymysql.err.IntegrityError) as fk:
+        db.run("INSERT INTO student(student_id) VALUES(%s)", (999,))
+    assert fk.value.args[0] == 1452
+    with pytest.raises(pymysql.err.ProgrammingError) as bad:
+        db.run("SELECT * FROM no_such_table")
+    assert bad.value.args[0] == 1064
@@ -0,0 +1,146 @@
+import queue
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+UI_WORKERS = 4
+POLL_MS = 16  # ~60 fps; callbacks are delivered on the Tk thread at most this late
+
+
+class Task:
+    def __init__(self, owner, key, on_done, on_error):
+        self.owner = owner
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Drop the result. If the call has not started yet it never runs."""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class TaskRunner:
+    """
+    Runs blocking calls (CourseService / DB) on worker threads and hands results
+    back to the Tk main loop. Tk is not thread-safe, so workers only put results
+    on a queue; the main loop drains it with root.after().
+
+    owner: a Toplevel (or other widget). While it has tasks running its cursor is
+    'watch'; if it is destroyed, pending callbacks are skipped.
+    key: a new task with the same (owner, key) cancels the previous one, so
+    pressing "Refresh" twice doesn't paint stale results.
+    """
+
+    def __init__(self, root, workers=UI_WORKERS, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ui-worker")
+        self._results = queue.Queue()
+        self._running = {}   # owner -> set(Task)
+        self._keyed = {}     # (owner, key) -> Task
+        self._saved_cursor = {}
+        self._closed = False
+        self.root.after(self.poll_ms, self._poll)
+
+    # ----------------- public -----------------
+    def submit(self, owner, fn, *args, on_done=None, on_error=None, key=None, **kwargs):
+        task = Task(owner, key, on_done, on_error)
+
+        if key is not None:
+            old = self._keyed.get((owner, key))
+            if old is not None:
+                old.cancel()
+                self._finish(old)
+            self._keyed[(owner, key)] = task
+
+        self._running.setdefault(owner, set()).add(task)
+        self._set_busy(owner, True)
+
+        def work():
+            try:
+                res = fn(*args, **kwargs)
+            except Exception as e:
+                self._results.put((task, None, e))
+            else:
+                self._results.put((task, res, None))
+
+        task.future = self._pool.submit(work)
+        return task
+
+    def cancel_all(self, owner):
+        for task in list(self._running.get(owner, ())):
+            task.cancel()
+            self._finish(task)
+
+    def busy(self, owner):
+        return bool(self._running.get(owner))
+
+    def shutdown(self):
+        self._closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ----------------- main-thread side -----------------
+    def _poll(self):
+        if self._closed:
+            return
+        try:
+            while True:
+                try:
+                    task, res, exc = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self._deliver(task, res, exc)
+                except Exception:
+                    # same place Tk reports errors from button callbacks
+                    self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self.root.after(self.poll_ms, self._poll)
+
+    def _deliver(self, task, res, exc):
+        if task.cancelled:
+            return
+        self._finish(task)
+        if not _alive(task.owner):
+            return
+        if exc is not None:
+            if task.on_error:
+                task.on_error(exc)
+            else:
+                raise exc
+        elif task.on_done:
+            task.on_done(res)
+
+    def _finish(self, task):
+        tasks = self._running.get(task.owner)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._running[task.owner]
+                self._set_busy(task.owner, False)
+        if task.key is not None and self._keyed.get((task.owner, task.key)) is task:
+            del self._keyed[(task.owner, task.key)]
+
+    def _set_busy(self, owner, busy):
+        if not _alive(owner):
+            self._saved_cursor.pop(owner, None)
+            return
+        try:
+            if busy:
+                if owner not in self._saved_cursor:
+                    self._saved_cursor[owner] = owner.cget("cursor")
+                    owner.config(cursor="watch")
+            else:
+                owner.config(cursor=self._saved_cursor.pop(owner, ""))
+        except Exception:
+            pass
+
+
+def _alive(widget):
+    try:
+        return bool(widget.winfo_exists())
+    except Exception:
+        return False
@@ -0,0 +1,391 @@
+import tkinter as tk
+
+SEARCH_DEBOUNCE_MS = 250
+SEARCH_PAGE_SIZE = 50
+# VirtualList: rows per fetch, and how many rows beyond the view are kept loaded
+VIRTUAL_PAGE_SIZE = 100
+VIRTUAL_PREFETCH = 100
+
+_JUMP = object()  # VirtualList: page fetched by offset, its cursor comes with the rows
+
+
+class SearchSelect(tk.Frame):
+    """
+    Type-ahead list backed by a server-side search.
+
+    search_fn(prefix, after=..., limit=...) -> list of rows   (runs on a worker thread)
+    format_row(row) -> text shown in the list
+    page_key(row)   -> value passed as `after` to get the next page
+
+    Keystrokes are debounced; the next page is fetched when the list is scrolled to the end.
+    """
+
+    def __init__(self, master, runner, search_fn, format_row, page_key,
+                 multiple=False, width=50, height=12,
+                 page_size=SEARCH_PAGE_SIZE, debounce_ms=SEARCH_DEBOUNCE_MS, on_activate=None):
+        super().__init__(master)
+        self.runner = runner
+        self.search_fn = search_fn
+        self.format_row = format_row
+        self.page_key = page_key
+        self.page_size = page_size
+        self.debounce_ms = debounce_ms
+        self.on_activate = on_activate
+
+        self.rows = []
+        self._query = None
+        self._has_more = False
+        self._loading = False
+        self._after_id = None
+
+        self.var = tk.StringVar()
+        self.entry = tk.Entry(self, textvariable=self.var, width=width)
+        self.entry.pack(fill="x")
+
+        box = tk.Frame(self)
+        box.pack(fill="both", expand=True, pady=(6, 0))
+        self.listbox = tk.Listbox(
+            box,
+            selectmode=tk.EXTENDED if multiple else tk.BROWSE,
+            width=width,
+            height=height,
+            exportselection=False,
+        )
+        self.scroll = tk.Scrollbar(box, orient="vertical", command=self.listbox.yview)
+        self.listbox.config(yscrollcommand=self._on_scroll)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scroll.pack(side="left", fill="y")
+
+        self.status = tk.Label(self, text="", anchor="w", fg="gray")
+        self.status.pack(fill="x")
+
+        self.var.trace_add("write", lambda *_: self._schedule())
+        self.entry.bind("<Down>", self._focus_list)
+        self.entry.bind("<Return>", lambda e: self._activate())
+        self.listbox.bind("<Double-Button-1>", lambda e: self._activate())
+        self.listbox.bind("<Return>", lambda e: self._activate())
+
+        self.entry.focus_set()
+        self._start()
+
+    # ----------------- public -----------------
+    def selected(self):
+        return [self.rows[i] for i in self.listbox.curselection() if i < len(self.rows)]
+
+    def select_all(self):
+        self.listbox.select_set(0, tk.END)
+
+    # ----------------- search -----------------
+    def _schedule(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        self._after_id = self.after(self.debounce_ms, self._start)
+
+    def _start(self):
+        self._after_id = None
+        query = self.var.get().strip()
+        if query == self._query:
+            return
+        self._query = query
+        self.rows = []
+        self._has_more = False
+        self.listbox.delete(0, tk.END)
+        self._fetch(after=None)
+
+    def _fetch(self, after):
+        self._loading = True
+        self.status.config(text="Searching...")
+        query = self._query
+        self.runner.submit(
+            self, self.search_fn, query, after=after, limit=self.page_size,
+            on_done=lambda rows: self._on_page(query, rows),
+            on_error=self._on_error,
+            key="search",  # a newer keystroke cancels the older request
+        )
+
+    def _on_page(self, query, rows):
+        self._loading = False
+        if query != self._query:
+            return
+        rows = list(rows or [])
+        self.rows.extend(rows)
+        for r in rows:
+            self.listbox.insert(tk.END, self.format_row(r))
+        self._has_more = len(rows) >= self.page_size
+
+        if not self.rows:
+            self.status.config(text="No matches")
+        elif self._has_more:
+            self.status.config(text=f"{len(self.rows)} shown, scroll for more")
+        else:
+            self.status.config(text=f"{len(self.rows)} found")
+        if self.rows and not self.listbox.curselection():
+            self.listbox.select_set(0)
+
+    def _on_error(self, exc):
+        self._loading = False
+        self.status.config(text=f"Search failed: {exc}")
+
+    def _on_scroll(self, first, last):
+        self.scroll.set(first, last)
+        if float(last) >= 1.0 and self._has_more and not self._loading and self.rows:
+            self._fetch(after=self.page_key(self.rows[-1]))
+
+    # ----------------- keys -----------------
+    def _focus_list(self, _event):
+        self.listbox.focus_set()
+        if self.rows and not self.listbox.curselection():
+            self.listbox.select_set(0)
+
+    def _activate(self):
+        if self.on_activate and self.selected():
+            self.on_activate()
+
+
+class VirtualList(tk.Frame):
+    """
+    Listbox for long server-ordered lists: only the visible rows are rendered, and only
+    the pages around them are fetched and kept.
+
+    fetch_fn(after=..., limit=...) -> rows in list order   (keyset page, runs on a worker thread)
+    fetch_fn(offset=..., limit=...) -> the same rows by position (only for jumps, see below)
+    count_fn() -> number of rows                            (sizes the scrollbar)
+    format_row(row) -> text shown in the list
+    page_key(row)   -> value passed as `after` to get the rows that follow
+    key(row)        -> id reported by selected_keys()
+
+    Pages within `prefetch` rows of the view are fetched ahead, pages further away are
+    dropped; the `after` cursor of every page seen is kept, so scrolling back costs one
+    query. A jump to a page with no known cursor (dragging the scrollbar) reads that page
+    by offset once, with the row before it for its cursor, and pages on by keyset from
+    there. refresh() re-counts and re-fetches the pages on screen; a failed fetch is shown
+    below the list and retried on the next scroll, or by clicking the message.
+    """
+
+    def __init__(self, master, runner, fetch_fn, count_fn, format_row, page_key, key=None,
+                 multiple=False, width=50, height=12, empty_text="",
+                 page_size=VIRTUAL_PAGE_SIZE, prefetch=VIRTUAL_PREFETCH):
+        super().__init__(master)
+        self.runner = runner
+        self.fetch_fn = fetch_fn
+        self.count_fn = count_fn
+        self.format_row = format_row
+        self.page_key = page_key
+        self.key = key or page_key
+        self.height = height
+        self.empty_text = empty_text
+        self.page_size = page_size
+        self.prefetch = prefetch
+
+        self.total = 0
+        self.top = 0              # list index of the first visible row
+        self.pages = {}           # page number -> rows
+        self.anchors = {0: None}  # page number -> `after` cursor of its first row
+        self._stale = set()       # pages shown until their re-fetch after refresh() arrives
+        self._counted = False
+        self.all_selected = False
+        self._selected = set()    # keys, including rows scrolled out of view
+        self._loading = set()
+        self._gen = 0             # bumped by refresh(); results of older fetches are dropped
+
+        box = tk.Frame(self)
+        box.pack(fill="both", expand=True)
+        self.listbox = tk.Listbox(
+            box,
+            selectmode=tk.EXTENDED if multiple else tk.BROWSE,
+            width=width,
+            height=height,
+            exportselection=False,
+        )
+        self.scroll = tk.Scrollbar(box, orient="vertical", command=self._on_scrollbar)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scroll.pack(side="left", fill="y")
+
+        self.status = tk.Label(self, text="", anchor="w", fg="gray")
+        self.status.pack(fill="x")
+        self.status.bind("<Button-1>", lambda e: self.refresh())
+
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        # a plain click starts a new selection, also for rows that are not on screen
+        self.listbox.bind("<Button-1>", lambda e: self.clear_selection())
+        self.listbox.bind("<Control-Button-1>", lambda e: None)
+        self.listbox.bind("<Shift-Button-1>", lambda e: None)
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll_by(-3 if e.delta > 0 else 3))
+        self.listbox.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.listbox.bind("<Button-5>", lambda e: self._scroll_by(3))
+        self.listbox.bind("<Prior>", lambda e: self._scroll_by(-self.height))
+        self.listbox.bind("<Next>", lambda e: self._scroll_by(self.height))
+
+        self.refresh()
+
+    # ----------------- public -----------------
+    def refresh(self):
+        """Re-count and re-fetch what is on screen (after a change, see changes_since)."""
+        self._gen += 1
+        self._stale = set(self.pages)
+        self._loading.clear()
+        gen = self._gen
+        self.runner.submit(
+            self, self.count_fn,
+            on_done=lambda n: self._on_count(gen, n),
+            on_error=lambda exc: self._on_error(gen, None, exc),
+            key="count",
+        )
+        self._render()
+
+    def selected_keys(self):
+        """Keys of the selected rows; check all_selected first, select_all() does not load every key."""
+        return list(self._selected)
+
+    def select_all(self):
+        self.all_selected = True
+        self._render()
+
+    def clear_selection(self):
+        self.all_selected = False
+        self._selected.clear()
+
+    # ----------------- paging -----------------
+    def _row(self, i):
+        page = self.pages.get(i // self.page_size)
+        if page is None or i % self.page_size >= len(page):
+            return None
+        return page[i % self.page_size]
+
+    def _on_count(self, gen, n):
+        if gen != self._gen:
+            return
+        self._counted = True
+        self.status.config(text="")
+        self.total = n or 0
+        self._render()
+        self._ensure()
+
+    def _ensure(self):
+        """Fetch the pages around the view, drop the rest."""
+        if not self.total:
+            return
+        last_page = (self.total - 1) // self.page_size
+        first = max(0, (self.top - self.prefetch) // self.page_size)
+        last = min(last_page, (self.top + self.height + self.prefetch) // self.page_size)
+
+        for p in list(self.pages):
+            if p < first - 1 or p > last + 1:
+                del self.pages[p]
+
+        for p in range(first, last + 1):
+            if p in self._loading:
+                continue
+            if p in self.anchors:
+                if p not in self.pages or p in self._stale:
+                    self._fetch(p)
+            elif p - 1 not in self._loading:
+                self._fetch(p)  # no cursor and none on the way: read it by position
+            # else: the page before brings this page's cursor
+
+    def _fetch(self, p):
+        self._loading.add(p)
+        gen = self._gen
+        if p in self.anchors:
+            after = self.anchors[p]
+            page = {"after": after, "limit": self.page_size}
+        else:
+            after = _JUMP
+            page = {"offset": p * self.page_size - 1, "limit": self.page_size + 1}
+        self.runner.submit(
+            self, self.fetch_fn, **page,
+            on_done=lambda rows: self._on_page(gen, p, after, rows),
+            on_error=lambda exc: self._on_error(gen, p, exc),
+            key=("page", p),  # a re-fetch of the page cancels the older request
+        )
+
+    def _on_page(self, gen, p, after, rows):
+        if gen != self._gen:
+            return
+        self._loading.discard(p)
+        self.status.config(text="")
+        rows = list(rows or [])
+        if after is _JUMP:
+            if len(rows) < 2:
+                # the list ends before this page (rows were deleted since the count)
+                self.total = min(self.total, p * self.page_size - 1 + len(rows))
+                self._render()
+                self._ensure()
+                return
+            after, rows = self.page_key(rows[0]), rows[1:]
+            self.anchors.setdefault(p, after)
+        if p not in self.anchors or self.anchors[p] != after:
+            self._ensure()  # fetched from a cursor that has moved since
+            return
+        self._stale.discard(p)
+        self.pages[p] = rows
+        if len(rows) < self.page_size:
+            # the list ended early (rows were deleted since the count)
+            self.total = min(self.total, p * self.page_size + len(rows))
+        else:
+            anchor = self.page_key(rows[-1])
+            if self.anchors.get(p + 1) != anchor:
+                # rows were added / removed before the next pages: their cursors moved
+                for q in [q for q in self.anchors if q > p]:
+                    del self.anchors[q]
+                    self.pages.pop(q, None)
+                    self._loading.discard(q)
+                self.anchors[p + 1] = anchor
+        self._render()
+        self._ensure()
+
+    def _on_error(self, gen, p, exc):
+        if gen != self._gen:
+            return
+        self._loading.discard(p)
+        self.status.config(text=f"Loading failed: {exc} (click to retry)")
+
+    # ----------------- view -----------------
+    def _render(self):
+        self.top = max(0, min(self.top, self.total - self.height))
+        self.listbox.delete(0, tk.END)
+        if not self.total:
+            self.scroll.set(0, 1)
+            if self.empty_text and self._counted:
+                self.listbox.insert(tk.END, self.empty_text)
+            return
+
+        end = min(self.total, self.top + self.height)
+        for i in range(self.top, end):
+            row = self._row(i)
+            self.listbox.insert(tk.END, self.format_row(row) if row is not None else "...")
+            if row is not None and (self.all_selected or self.key(row) in self._selected):
+                self.listbox.select_set(i - self.top)
+        self.scroll.set(self.top / self.total, end / self.total)
+
+    def _scroll_to(self, top):
+        top = max(0, min(int(top), self.total - self.height))
+        if top != self.top:
+            self.top = top
+            self._render()
+            self._ensure()
+        return "break"
+
+    def _scroll_by(self, n):
+        return self._scroll_to(self.top + n)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(float(args[1]) * self.total)
+        elif args[0] == "scroll":
+            step = self.height if args[2] == "pages" else 1
+            self._scroll_by(int(args[1]) * step)
+
+    def _on_select(self, _event):
+        if not self.total:
+            return
+        chosen = set(self.listbox.curselection())
+        for line in range(min(self.height, self.total - self.top)):
+            row = self._row(self.top + line)
+            if row is None:
+                continue
+            if line in chosen:
+                self._selected.add(self.key(row))
+            else:
+                self._selected.discard(self.key(row))
+                self.all_selected = False